@@ -0,0 +1,182 @@
+# --- 1. IMPORTS ---
+import math
+import os
+import threading
+import time
+from flask import Response, g, request
+from metrics import Counter, Histogram
+
+# --- 2. CONSTANTS ---
+# Endpoint -> class. None: never shed nor counted (probes and scrapes must get through)
+DEFAULT_CLASSES = {
+    'static': 'static',
+    'public.index': 'listing', 'public.news': 'listing', 'public.months_problems': 'listing', 'public.api_posts': 'listing',
+    'public.search': 'listing', 'public.about': 'listing', 'public.materials': 'listing', 'public.team': 'listing',
+    'public.faq': 'listing', 'public.contact': 'listing',
+    'public.view_post': 'post',
+    'auth.login': 'auth', 'auth.logout': 'auth', 'auth.account_settings': 'auth',
+    'editor.post_editor': 'editor', 'editor.save_post': 'editor', 'editor.delete_post': 'editor', 'editor.drafts': 'editor',
+    'editor.upload_image': 'editor', 'auth.login_statistics': 'editor',
+    'profiling': 'editor', 'profiling_download': 'editor', 'memory': 'editor', 'jobs': 'editor',
+    'public.healthz': None, 'public.readyz': None, 'metrics': None,
+}
+# Requests of these classes may use the capacity held back for editors
+RESERVED_CLASSES = ('editor',)
+QUEUE_WAIT_BUCKETS = (0.001, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+
+
+# --- 3. ADMISSION CONTROL ---
+class Admission:
+    """Sheds load early, per endpoint class, instead of letting every request queue up.
+
+    Each request is classified by endpoint (static, listing, post, auth,
+    editor, other) before its view runs. It is turned away when its class
+    already has its limit of requests in flight, when all non-editor
+    requests together would eat into the threads reserved for editors, or
+    when it waited in waitress's task queue longer than its class allows.
+    An anonymous GET that has a cached page, even one from an older content
+    version, gets that copy instead; everything else gets a quick 503 with
+    Retry-After. Queue waits are only known under 'flask serve', which
+    times waitress's dispatcher through ``instrument``.
+
+    Configuration:
+        ADMISSION_CONTROL         False to admit everything
+        ADMISSION_CLASSES         endpoint -> class overrides (None exempts an endpoint)
+        ADMISSION_CLASS_LIMITS    class -> requests in flight at once (None: no limit of its own)
+        ADMISSION_MAX_QUEUE_WAIT  class -> seconds a request may have waited in the queue
+        ADMISSION_MAX_IN_FLIGHT   requests in flight per process (defaults to the waitress threads)
+        ADMISSION_EDITOR_RESERVE  of those, how many only editor routes may use
+        ADMISSION_RETRY_AFTER     seconds sent in Retry-After
+    """
+
+    def __init__(self, app=None, metrics=None, response_cache=None):
+        self.in_flight = {}
+        self.max_in_flight = None
+        self.dispatcher = None
+        self._local = threading.local()
+        self._lock = threading.Lock()
+        os.register_at_fork(after_in_child=self._after_fork)
+        self.decisions = Counter('nemo_admission_decisions_total', 'Admission decisions by endpoint class.', ('class', 'decision'))
+        self.queue_wait = Histogram('nemo_admission_queue_wait_seconds', "Time requests spent in waitress's task queue.",
+                                    ('class',), QUEUE_WAIT_BUCKETS)
+        if app is not None:
+            self.init_app(app, metrics, response_cache)
+
+    def init_app(self, app, metrics=None, response_cache=None):
+        app.config.setdefault('ADMISSION_CONTROL', True)
+        app.config.setdefault('ADMISSION_CLASSES', {})
+        app.config.setdefault('ADMISSION_CLASS_LIMITS', {'listing': 4, 'post': 4, 'auth': 2, 'other': 4})
+        app.config.setdefault('ADMISSION_MAX_QUEUE_WAIT', {'static': 2.0, 'listing': 0.5, 'post': 0.5, 'auth': 1.0, 'other': 1.0})
+        app.config.setdefault('ADMISSION_MAX_IN_FLIGHT', None)
+        app.config.setdefault('ADMISSION_EDITOR_RESERVE', 2)
+        app.config.setdefault('ADMISSION_RETRY_AFTER', 5)
+        self.app = app
+        self.response_cache = response_cache
+        self.classes = dict(DEFAULT_CLASSES, **app.config['ADMISSION_CLASSES'])
+        self.limits = app.config['ADMISSION_CLASS_LIMITS']
+        self.max_queue_wait = app.config['ADMISSION_MAX_QUEUE_WAIT']
+        self.max_in_flight = app.config['ADMISSION_MAX_IN_FLIGHT'] or self.max_in_flight
+        self.reserve = app.config['ADMISSION_EDITOR_RESERVE']
+        if app.config['ADMISSION_CONTROL']:
+            app.before_request(self._before_request)
+            app.teardown_request(self._teardown_request)
+        if metrics is not None:
+            metrics.register(self.decisions)
+            metrics.register(self.queue_wait)
+            metrics.callback('nemo_admission_in_flight', 'Requests being handled, by endpoint class.', self.stats_in_flight, labelname='class')
+            metrics.callback('nemo_admission_queue_depth', "Requests waiting in waitress's task queue.", self.queue_depth)
+        app.extensions['admission'] = self
+
+    def _after_fork(self):
+        self.in_flight = {}
+        self._lock = threading.Lock()
+
+    # --- Waitress integration ---
+    def instrument(self, dispatcher):
+        """Time how long each task waits in waitress's ``dispatcher`` before a thread takes it."""
+        self.dispatcher = dispatcher
+        if not self.app.config['ADMISSION_MAX_IN_FLIGHT']:
+            self.max_in_flight = len(dispatcher.threads)
+        add_task = dispatcher.add_task
+        local = self._local
+
+        def timed_add_task(task):
+            queued = time.perf_counter()
+            service = task.service
+
+            def timed_service():
+                local.queued = queued
+                try:
+                    return service()
+                finally:
+                    local.queued = None
+            task.service = timed_service
+            add_task(task)
+        dispatcher.add_task = timed_add_task
+
+    def queue_depth(self):
+        return len(self.dispatcher.queue) if self.dispatcher is not None else 0
+
+    # --- Decisions ---
+    def classify(self, endpoint):
+        return self.classes.get(endpoint, 'other') if endpoint is not None else 'other'
+
+    def _refusal(self, cls, waited):
+        """Why a ``cls`` request that waited ``waited`` seconds cannot start now (None if it can)."""
+        max_wait = self.max_queue_wait.get(cls)
+        if waited is not None and max_wait is not None and waited > max_wait:
+            return 'queue_wait'
+        limit = self.limits.get(cls)
+        if limit is not None and self.in_flight.get(cls, 0) >= limit:
+            return 'class_limit'
+        if self.max_in_flight:
+            total = sum(self.in_flight.values())
+            shared = sum(count for name, count in self.in_flight.items() if name not in RESERVED_CLASSES)
+            if total >= self.max_in_flight:
+                return 'in_flight'
+            if cls not in RESERVED_CLASSES and shared >= self.max_in_flight - self.reserve:
+                return 'reserved'
+        return None
+
+    def _before_request(self):
+        cls = self.classify(request.endpoint)
+        if cls is None:
+            return None
+        queued = getattr(self._local, 'queued', None)
+        waited = time.perf_counter() - queued if queued is not None else None
+        if waited is not None:
+            self.queue_wait.observe(waited, cls)
+        with self._lock:
+            reason = self._refusal(cls, waited)
+            if reason is None:
+                self.in_flight[cls] = self.in_flight.get(cls, 0) + 1
+        if reason is None:
+            g._admission_class = cls
+            self.decisions.inc(cls, 'admitted')
+            return None
+        return self.shed(cls, reason)
+
+    def _teardown_request(self, exc):
+        cls = g.pop('_admission_class', None)
+        if cls is not None:
+            with self._lock:
+                self.in_flight[cls] -= 1
+
+    def shed(self, cls, reason):
+        """The last cached copy of the page if there is one, else a 503."""
+        cache = self.response_cache
+        if cache is not None and not cache.should_bypass():
+            entry = cache.lookup(stale=True)
+            if entry is not None:
+                self.decisions.inc(cls, 'stale')
+                response = cache.respond(entry)
+                response.headers['Warning'] = '110 - "Response is Stale"'
+                return response
+        self.decisions.inc(cls, 'rejected_' + reason)
+        retry_after = self.app.config['ADMISSION_RETRY_AFTER']
+        return Response('The server is busy. Please try again in a few seconds.\n', 503, mimetype='text/plain',
+                        headers={'Retry-After': str(math.ceil(retry_after))})
+
+    def stats_in_flight(self):
+        with self._lock:
+            return dict(self.in_flight)
@@ -1,257 +1,215 @@
-# --- 1. IMPORTS & INITIALIZATION ---
-import os
-from datetime import datetime
-from flask import Flask, render_template, request, jsonify, redirect, url_for, flash
-from flask_sqlalchemy import SQLAlchemy
-from flask_flatpages import FlatPages
-from flask_login import LoginManager, UserMixin, login_user, logout_user, login_required, current_user
-from flask_migrate import Migrate
-from flask_bcrypt import Bcrypt
-from werkzeug.utils import secure_filename
-import uuid
-
-# --- 2. APP CONFIGURATION ---
-app = Flask(__name__)
-app.config['SQLALCHEMY_DATABASE_URI'] = 'sqlite:///posts.db'
-app.config['UPLOAD_FOLDER'] = 'static/uploads/'
-app.secret_key = 'CHANGE_THIS_IN_PRODUCTION' # NOTE: Remember to change this
-app.jinja_env.globals['title'] = 'NEMO'
-
-# FlatPages Configuration
-app.config['FLATPAGES_EXTENSION'] = '.md'
-app.config['FLATPAGES_ROOT'] = 'posts'
-app.config['FLATPAGES_AUTO_RELOAD'] = True
+# --- 1. IMPORTS ---
+import threading
+from functools import partial
+import click
+from flask import Flask, current_app, request
+from content_watcher import ContentWatcher, apply_to_flatpages, content_changed
+from extensions import (sqlite_profile, db, password_hasher, user_cache, login_manager, assets, uploads, pages, render_cache,
+                        metrics, profiler, catalog, response_cache, template_cache, admission, jobs, search_index)
+from models import User
+from freeze import freeze_command
+from assets import assets_cli
+from user_import import users_cli
+from serve import master_ready, serve_command, worker_started
+from profiling import profile_command
+
+# Importing this module must stay cheap: every worker, CLI command and script
+# pays for it. Content, the database and bcrypt are loaded on first use, and
+# Flask-Migrate (with alembic) only by 'flask db'. See benchmarks/startup.py.
+
+# --- 2. APP FACTORY ---
+def create_app(config=None):
+    """Build the application; ``config`` (a mapping) overrides defaults and the environment."""
+    app = Flask(__name__)
+    app.config['SQLALCHEMY_DATABASE_URI'] = 'sqlite:///posts.db'
+    app.config['UPLOAD_FOLDER'] = 'static/uploads/'
+    # Uploads are streamed to disk and stored once per content hash (see upload_store.py)
+    app.config['MAX_CONTENT_LENGTH'] = 16 * 1024 * 1024
+    app.secret_key = 'CHANGE_THIS_IN_PRODUCTION' # NOTE: Remember to change this
+
+    # FlatPages Configuration
+    app.config['FLATPAGES_EXTENSION'] = '.md'
+    app.config['FLATPAGES_ROOT'] = 'posts'
+    # Content reloads are driven by the watcher below, never by request threads
+    app.config['FLATPAGES_AUTO_RELOAD'] = False
+    # Only front matter stays in memory; bodies and their HTML go through an LRU (see page_store.py)
+    app.config['FLATPAGES_BODY_CACHE_MAX_BYTES'] = 32 * 1024 * 1024
+    app.config['CONTENT_WATCHER'] = 'auto'  # 'auto', 'inotify', 'poll' or None to disable
+    app.config['CONTENT_WATCHER_INTERVAL'] = 1.0
+
+    # Anonymous page cache: 'memory' (per process) or 'sqlite' (shared by all workers)
+    app.config['RESPONSE_CACHE_BACKEND'] = 'memory'
+    app.config['RESPONSE_CACHE_MAX_BYTES'] = 64 * 1024 * 1024
+    app.config['SEARCH_PAGE_SIZE'] = 20
+    app.config['SEARCH_MAX_PAGE'] = 1000
+    # Listings are paginated with keyset cursors; the home page shows only the latest news
+    app.config['LISTING_PAGE_SIZE'] = 24
+    app.config['LISTING_MAX_PAGE_SIZE'] = 100
+    app.config['INDEX_NEWS_LIMIT'] = 12
+    # Opt-in: send listing pages while they render instead of after (chunk size in characters)
+    app.config['STREAM_TEMPLATES'] = False
+    app.config['STREAM_TEMPLATES_BUFFER'] = 4096
+    # Login attempts: token buckets per client IP and per account (burst, tokens per second)
+    app.config['LOGIN_IP_BURST'] = 10
+    app.config['LOGIN_IP_RATE'] = 10 / 60
+    app.config['LOGIN_ACCOUNT_BURST'] = 5
+    app.config['LOGIN_ACCOUNT_RATE'] = 1 / 60
+    # SQLite tuning (see sqlite_profile.py): 'production', 'durable', 'default' or None
+    app.config['SQLITE_PROFILE'] = 'production'
+    app.config['SQLITE_POOL_SIZE'] = 8
+
+    # Deployment overrides from the environment, e.g. FLASK_SQLITE_PROFILE=durable
+    app.config.from_prefixed_env()
+    if config:
+        app.config.update(config)
+    # Only now: creating the Jinja environment reads TEMPLATES_AUTO_RELOAD
+    app.jinja_env.globals['title'] = 'NEMO'
+
+    init_extensions(app)
+    register_commands(app)
+    register_metrics(app)
+
+    # Route modules import the task functions, so tasks are registered before the blueprints
+    from public import public
+    from auth import auth
+    from editor import editor
+    app.register_blueprint(public)
+    app.register_blueprint(auth)
+    app.register_blueprint(editor)
+    return app
 
 # --- 3. EXTENSIONS INITIALIZATION ---
-db = SQLAlchemy(app)
-migrate = Migrate(app, db)
-bcrypt = Bcrypt(app)
-pages = FlatPages(app)
-login_manager = LoginManager()
-login_manager.init_app(app)
-login_manager.login_view = 'login'
-
-# --- 4. DATABASE MODELS ---
-# NOTE: The 'Post' model is likely obsolete (see section 7 below)
-class Post(db.Model):
-    id = db.Column(db.Integer, primary_key=True)
-    title = db.Column(db.String(100), nullable=False)
-    tags = db.Column(db.Text, nullable=True)
-    content = db.Column(db.Text, nullable=False)
-    desc = db.Column(db.String(200), nullable=False)
-    date = db.Column(db.DateTime, nullable=False, default=datetime)
-    image_path = db.Column(db.String(255))
-    status = db.Column(db.String(20), nullable=False, default='published')
-    post_type = db.Column(db.String(50), nullable=False, default='News')
-    is_solved = db.Column(db.Boolean, default=False)
-    solver_name = db.Column(db.String(100), nullable=True)
-    solution_content = db.Column(db.Text, nullable=True)
-
-class User(db.Model, UserMixin):
-    __tablename__ = 'user'
-    id = db.Column(db.String(36), primary_key=True, default=lambda: str(uuid.uuid4()))
-    email = db.Column(db.String(128), unique=True, nullable=False)
-    name = db.Column(db.String(100), nullable=True)
-    password_hash = db.Column(db.String(128))
-    is_authenticated = db.Column(db.Boolean, default=False)
-    about_me = db.Column(db.Text, nullable=True)
-    profile_image_path = db.Column(db.String(255), nullable=True, default='static/uploads/default_avatar.png')
-
-    def __init__(self, email:str, password:str, name:str):
-        self.email = email
-        self.password_hash = bcrypt.generate_password_hash(password).decode('utf-8')
-        self.name = name
-        self.is_authenticated = False
-
-    def check_password(self, password):
-        return bcrypt.check_password_hash(self.password_hash, password)
-    def authenticate(self): self.is_authenticated = True
-    def logout(self): self.is_authenticated = False
-
-# --- 5. AUTHENTICATION & USER MANAGEMENT ---
-@login_manager.user_loader
-def user_loader(user_id):
-    return db.session.get(User, user_id)
-
-@app.route('/login', methods=['GET', 'POST'])
-def login():
-    if request.method == 'POST':
-        user = User.query.filter_by(email=request.form['email']).first()
-        if user and user.check_password(request.form['password']):
-            user.authenticate()
-            db.session.commit()
-            login_user(user, remember=True)
-            return redirect(url_for('index'))
-        else:
-            flash('Invalid credentials.', 'danger')
-    return render_template('login.html')
-
-@app.route('/logout')
-@login_required
-def logout():
-    current_user.logout()
-    db.session.commit()
-    logout_user()
-    return redirect(url_for('index'))
-
-@app.route('/account-settings', methods=['GET', 'POST'])
-@login_required
-def account_settings():
-    if request.method == 'POST':
-        if not current_user.check_password(request.form.get('current_password')):
-            flash('Incorrect password. Please try again.', 'danger')
-            return redirect(url_for('account_settings'))
-
-        user = current_user
-        new_email = request.form.get('email')
-        if new_email != user.email and User.query.filter_by(email=new_email).first():
-            flash('That email address is already in use.', 'danger')
-            return redirect(url_for('account_settings'))
-
-        user.email = new_email
-        user.name = request.form.get('name')
-        user.about_me = request.form.get('about_me')
-        
-        new_password = request.form.get('password')
-        if new_password:
-            user.password_hash = bcrypt.generate_password_hash(new_password).decode('utf-8')
-            
-        if 'profile_pic' in request.files:
-            profile_pic = request.files['profile_pic']
-            if profile_pic.filename != '':
-                filename = secure_filename(profile_pic.filename)
-                image_path = os.path.join(app.config['UPLOAD_FOLDER'], filename)
-                profile_pic.save(image_path)
-                user.profile_image_path = image_path
-
-        db.session.commit()
-        flash('Your settings have been updated successfully!', 'success')
-        return redirect(url_for('account_settings'))
-    return render_template('account-settings.html', logado=current_user.is_authenticated)
-
-# --- 6. MAIN PAGE ROUTES ---
-@app.route('/')
-def index():
-    published_pages = [p for p in pages if p.meta.get('status') == 'published']
-    sorted_pages = sorted(published_pages, key=lambda p: p.meta.get('date', datetime.now()), reverse=True)
-    news_posts = [p for p in sorted_pages if p.path.startswith('news/')]
-    problem_post = next((p for p in sorted_pages if p.path.startswith('months-problems/') and not p.meta.get('is_solved')), None)
-    return render_template('index.html', logado=current_user.is_authenticated, news_posts=news_posts, problem_post=problem_post)
-
-@app.route('/about')
-def about(): return render_template('about.html', logado=current_user.is_authenticated)
-
-@app.route('/materials')
-def materials(): return render_template('materials.html', logado=current_user.is_authenticated)
-
-@app.route('/months-problems')
-def months_problems():
-    # Fetch all published "Month-Problem" posts from the file system
-    problem_pages = [p for p in pages if p.meta.get('status') == 'published' and p.path.startswith('months-problems/') and p.meta.get('post_type') == 'Month-Problem']
-    # Sort by 'is_solved' (False comes first), then by date (newest first)
-    sorted_problems = sorted(problem_pages, key=lambda p: (p.meta.get('is_solved', False), p.meta['date']), reverse=False)
-    return render_template('months-problems.html', logado=current_user.is_authenticated, post_list=sorted_problems)
-
-@app.route('/news')
-def news():
-    news_pages = [p for p in pages if p.meta.get('status') == 'published' and p.path.startswith('news/')]
-    sorted_news = sorted(news_pages, key=lambda p: p.meta.get('date', datetime.now()), reverse=True)
-    award_posts = [p for p in sorted_news if p.path.startswith('news/awards/')]
-    other_news_posts = [p for p in sorted_news if p.path.startswith('news/others/')]
-    return render_template('news.html', logado=current_user.is_authenticated, award_posts=award_posts, other_news_posts=other_news_posts)
-
-@app.route('/team')
-def team(): return render_template('team.html', logado=current_user.is_authenticated)
-
-@app.route('/faq')
-def faq(): return render_template('faq.html', logado=current_user.is_authenticated)
-
-@app.route('/contact')
-def contact(): return render_template('contact.html', logado=current_user.is_authenticated)
-
-@app.route('/post/<path:path>')
-def view_post(path):
-    post = pages.get_or_404(path)
-    author = None
-    author_email = post.meta.get('author_email')
-    if author_email:
-        author = User.query.filter_by(email=author_email).first()
-    return render_template('view-post-flat.html', post=post, author=author, logado=current_user.is_authenticated)
-
-# --- 7. DATABASE-BACKED POST EDITOR (LIKELY OBSOLETE) ---
-# The routes below are for a database-backed post editor. Since the site now uses
-# Markdown files (FlatPages) for all content, this entire section may be obsolete
-# and can likely be removed. It is kept here for now for safety.
-
-@app.route('/post/new')
-@app.route('/post/edit/<int:post_id>')
-@login_required
-def post_editor(post_id=None):
-    post = db.session.get(Post, post_id) if post_id else None
-    if post_id and not post:
-        flash("Post not found!", "danger")
-        return redirect(url_for('index'))
-    return render_template('post-editor.html', post=post, logado=current_user.is_authenticated)
-
-@app.route('/post/save', methods=['POST'], defaults={'post_id': None})
-@app.route('/post/save/<int:post_id>', methods=['POST'])
-@login_required
-def save_post(post_id):
-    post = db.session.get(Post, post_id) if post_id else Post()
-    if post_id and not post: return "Post not found", 404
-    post.status = 'draft' if 'save_draft' in request.form else 'published'
-    post.title = request.form.get('post-title')
-    post.desc = request.form.get('post-desc')
-    post.content = request.form.get('post-content')
-    post.tags = '|'.join([tag.strip() for tag in request.form.get('post-tags', '').splitlines() if tag.strip()]) or 'sem'
-    image = request.files.get('image')
-    if image and image.filename != '':
-        filename = secure_filename(image.filename)
-        image_path = os.path.join(app.config['UPLOAD_FOLDER'], filename)
-        image.save(image_path)
-        post.image_path = image_path
-    post.post_type = request.form.get('post_type')
-    if post.post_type == 'Month-Problem':
-        post.is_solved = 'is_solved' in request.form
-        if post.is_solved:
-            post.solver_name = request.form.get('solver_name')
-            post.solution_content = request.form.get('solution_content')
-        else:
-            post.solver_name = None
-            post.solution_content = None
-    if not post_id: db.session.add(post)
-    db.session.commit()
-    flash('Post saved successfully!', 'success')
-    return redirect(url_for('view_post', post_id=post.id))
-
-@app.route('/delete-post/<int:post_id>', methods=['POST'])
-@login_required
-def delete_post(post_id):
-    post = db.session.get(Post, post_id)
-    if post:
-        if post.image_path and os.path.exists(post.image_path):
-            os.remove(post.image_path)
-        db.session.delete(post)
-        db.session.commit()
-        flash('Post deleted successfully.', 'success')
-    return redirect(url_for('index'))
-
-@app.route('/drafts')
-@login_required
-def drafts():
-    draft_posts = Post.query.filter_by(status='draft').order_by(Post.date.desc()).all()
-    return render_template('drafts.html', post_list=draft_posts, len_post_list=len(draft_posts), logado=current_user.is_authenticated)
-
-@app.route('/upload-image', methods=['POST'])
-@login_required
-def upload_image():
-    file = request.files.get('file')
-    if not file: return jsonify({'error': 'No file uploaded.'}), 400
-    filename = secure_filename(file.filename)
-    file.save(os.path.join(app.config['UPLOAD_FOLDER'], filename))
-    url = url_for('static', filename=os.path.join('uploads', filename))
-    return jsonify({'location': url})
-
-# --- 8. MAIN EXECUTION ---
+def init_extensions(app):
+    sqlite_profile.init_app(app)
+    db.init_app(app)
+    sqlite_profile.attach(db)
+    password_hasher.init_app(app)
+    assets.init_app(app)
+    uploads.init_app(app)
+    pages.init_app(app)
+    render_cache.init_app(app)
+    metrics.init_app(app, db=db, pages=pages)
+    profiler.init_app(app, pages=pages)
+    response_cache.init_app(app)
+    template_cache.init_app(app)
+    # Sheds load per endpoint class before views run, serving stale cached pages when it can
+    admission.init_app(app, metrics=metrics, response_cache=response_cache)
+    # Slow follow-up work (file deletion, upload GC) runs off the request path; see jobs.py
+    jobs.init_app(app, metrics=metrics)
+    search_index.init_app(app)
+    # Sessions and author bylines are served from memory; see user_cache.py
+    user_cache.init_app(app, db, User)
+    login_manager.init_app(app)
+    login_manager.login_view = 'auth.login'
+    # Created stopped: nothing walks posts/ until the content is first needed
+    app.extensions['content_watcher'] = ContentWatcher(
+        pages.root, app.config['FLATPAGES_EXTENSION'], apply=partial(apply_to_flatpages, pages),
+        backend=app.config['CONTENT_WATCHER'] or 'auto', interval=app.config['CONTENT_WATCHER_INTERVAL'])
+    app.extensions['content_loaded'] = threading.Event()
+    app.before_request(_load_content_on_first_request)
+
+_content_lock = threading.Lock()
+
+def load_content(app, watch=True, search=True):
+    """Watch posts/, build the catalog and user cache, warm the render cache and search index.
+
+    Runs once per process, on the first request (the prefork master triggers it
+    through /readyz before forking, so workers start warm) rather than at import.
+    'flask freeze' calls it before forking its renderers, without the watcher
+    and the search index (``watch`` and ``search`` False).
+    """
+    loaded = app.extensions['content_loaded']
+    if loaded.is_set():
+        return
+    with _content_lock:
+        if loaded.is_set():
+            return
+        watcher = app.extensions['content_watcher']
+        if watch and app.config['CONTENT_WATCHER']:
+            watcher.start()
+        catalog.refresh(watcher.fingerprint)
+        with app.app_context():
+            user_cache.load_all()
+        # The whole site: entries it no longer uses can go
+        render_cache.warm(pages, evict=True)
+        if search:
+            threading.Thread(target=search_index.sync, args=(pages,), name='search-sync', daemon=True).start()
+        loaded.set()
+
+def _load_content_on_first_request():
+    # Liveness must answer even while the content is loading
+    if request.endpoint != 'public.healthz':
+        load_content(current_app._get_current_object())
+
+@content_changed.connect
+def _on_content_changed(sender, change):
+    catalog.refresh(change.fingerprint)
+    changed = [sender.page_path(filename) for filename in change.added + change.modified]
+    render_cache.warm([page for page in map(pages.get, changed) if page is not None], wait=True)
+    search_index.update(pages, changed + [sender.page_path(filename) for filename in change.removed])
+
+@master_ready.connect
+def _on_master_ready(app):
+    # Only the workers follow content changes and run jobs; each watcher catches up when it starts
+    app.extensions['content_watcher'].stop()
+    jobs.stop()
+
+@worker_started.connect
+def _on_worker_started(app):
+    # 'flask serve': no pooled connections or threads survive fork (--workers N)
+    with app.app_context():
+        db.engine.dispose(close=False)
+    if app.config['CONTENT_WATCHER'] and app.extensions['content_loaded'].is_set():
+        app.extensions['content_watcher'].start()
+    jobs.start()
+
+# --- 4. CLI & METRICS ---
+class LazyGroup(click.Group):
+    """A command group whose commands are imported the first time one is listed or run."""
+
+    def __init__(self, load, **kwargs):
+        super().__init__(**kwargs)
+        self._load = load
+        self._group = None
+
+    def _target(self):
+        if self._group is None:
+            self._group = self._load()
+        return self._group
+
+    def list_commands(self, ctx):
+        return self._target().list_commands(ctx)
+
+    def get_command(self, ctx, name):
+        return self._target().get_command(ctx, name)
+
+def register_commands(app):
+    app.cli.add_command(freeze_command)
+    app.cli.add_command(assets_cli)
+    app.cli.add_command(serve_command)
+    app.cli.add_command(profile_command)
+    app.cli.add_command(users_cli)
+
+    def migrate_commands():
+        # alembic is the slowest import of the app; only 'flask db ...' needs it
+        from flask_migrate import Migrate, cli
+        Migrate(app, db)
+        return cli.db
+    app.cli.add_command(LazyGroup(migrate_commands, name='db', help='Perform database migrations (Flask-Migrate).'))
+
+def register_metrics(app):
+    from auth import login_stats
+    metrics.callback('nemo_login_attempts_total', 'Login attempts by outcome.',
+                     lambda: {outcome: count for outcome, count in login_stats.items() if outcome != 'seconds'}, 'counter', 'outcome')
+    metrics.callback('nemo_password_hash_rejected_total', 'Password checks refused because the pool was full.',
+                     lambda: password_hasher.stats()['rejected'], 'counter')
+    metrics.callback('nemo_fragment_cache_lookups_total', 'Template fragment cache lookups by result.',
+                     lambda: (lambda stats: {'hit': stats['hits'], 'miss': stats['misses']})(template_cache.stats()), 'counter', 'result')
+    metrics.callback('nemo_published_posts', 'Published posts in the current catalog.', lambda: len(catalog.snapshot.by_path))
+
+# --- 5. MAIN EXECUTION ---
+# Development server only; in production use 'flask --app app serve' (see serve.py)
 if __name__ == "__main__":
+    app = create_app()
+    jobs.start()
     app.run(host='0.0.0.0', port=5000)
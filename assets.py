@@ -0,0 +1,200 @@
+# --- 1. IMPORTS ---
+import gzip
+import hashlib
+import json
+import mimetypes
+import os
+import posixpath
+import re
+import click
+from flask import current_app, request, send_from_directory, url_for
+from flask.cli import AppGroup
+
+try:
+    import brotli
+except ImportError:  # Optional: only gzip sidecars are written without it
+    brotli = None
+
+# --- 2. CONSTANTS ---
+MANIFEST_NAME = 'manifest.json'
+# Files worth precompressing; images, videos and PDFs are already compressed
+COMPRESSIBLE = ('.css', '.js', '.mjs', '.map', '.svg', '.json', '.txt', '.html', '.xml', '.ttf', '.otf', '.pfb', '.ftl')
+# References inside these files are rewritten to point at hashed names
+REWRITTEN = ('.css', '.js', '.mjs')
+# Directories holding user uploads are not versioned at build time
+SKIP_DIRS = ('uploads',)
+CSS_URL = re.compile(r'''url\(\s*(['"]?)([^'")]+)\1\s*\)''')
+SOURCE_MAP = re.compile(r'^(//# sourceMappingURL=)(\S+)\s*$', re.MULTILINE)
+mimetypes.add_type('application/json', '.map')
+mimetypes.add_type('text/javascript', '.mjs')
+
+
+# --- 3. BUILD STEP ---
+def _hashed_name(rel_path, content):
+    root, ext = posixpath.splitext(rel_path)
+    return '%s.%s%s' % (root, hashlib.sha256(content).hexdigest()[:10], ext)
+
+
+def _resolve(rel_path, reference, manifest):
+    """Hashed replacement for a relative ``reference`` found in ``rel_path``, or None."""
+    if reference.startswith(('data:', 'http:', 'https:', '//', '#', '/')):
+        return None
+    target = posixpath.normpath(posixpath.join(posixpath.dirname(rel_path), reference.split('?')[0].split('#')[0]))
+    hashed = manifest.get(target)
+    if hashed is None:
+        return None
+    return posixpath.relpath(hashed, posixpath.dirname(rel_path))
+
+
+def _rewrite(rel_path, content, manifest):
+    text = content.decode('utf-8')
+    if rel_path.endswith('.css'):
+        def replace_url(match):
+            hashed = _resolve(rel_path, match.group(2), manifest)
+            return match.group(0) if hashed is None else "url('%s')" % hashed
+        text = CSS_URL.sub(replace_url, text)
+
+    def replace_map(match):
+        hashed = _resolve(rel_path, match.group(2), manifest)
+        return match.group(0) if hashed is None else match.group(1) + hashed
+    text = SOURCE_MAP.sub(replace_map, text)
+    return text.encode('utf-8')
+
+
+def _write_if_missing(path, content):
+    if os.path.exists(path):
+        return False
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    with open(path + '.tmp', 'wb') as handler:
+        handler.write(content)
+    os.replace(path + '.tmp', path)
+    return True
+
+
+def build_assets(static_folder, dist_folder, prune=False):
+    """Write content-hashed copies of every static asset plus .gz/.br sidecars.
+
+    Files that reference other assets (CSS ``url()``, source maps) are
+    written after their dependencies so the references point at hashed names
+    too. Returns (manifest, number of files written).
+    """
+    sources = []
+    dist_name = os.path.relpath(dist_folder, static_folder)
+    for cur_path, dirnames, filenames in os.walk(static_folder):
+        rel_dir = os.path.relpath(cur_path, static_folder)
+        if rel_dir == '.':
+            dirnames[:] = [d for d in dirnames if d not in SKIP_DIRS and d != dist_name]
+        for name in filenames:
+            if ':' in name:
+                continue
+            sources.append(posixpath.normpath(posixpath.join(*rel_dir.split(os.sep), name)))
+
+    manifest, written = {}, 0
+    # Plain files first, then the files whose content depends on their hashes
+    for rel_path in sorted(sources, key=lambda p: (p.endswith(REWRITTEN), p)):
+        with open(os.path.join(static_folder, rel_path), 'rb') as handler:
+            content = handler.read()
+        if rel_path.endswith(REWRITTEN):
+            content = _rewrite(rel_path, content, manifest)
+        hashed = _hashed_name(rel_path, content)
+        manifest[rel_path] = hashed
+        target = os.path.join(dist_folder, hashed)
+        written += _write_if_missing(target, content)
+        if rel_path.endswith(COMPRESSIBLE):
+            compressed = gzip.compress(content, 9, mtime=0)
+            if len(compressed) < len(content) * 0.9:
+                written += _write_if_missing(target + '.gz', compressed)
+            if brotli is not None:
+                compressed = brotli.compress(content)
+                if len(compressed) < len(content) * 0.9:
+                    written += _write_if_missing(target + '.br', compressed)
+
+    with open(os.path.join(dist_folder, MANIFEST_NAME + '.tmp'), 'w') as handler:
+        json.dump(manifest, handler, indent=1, sort_keys=True)
+    os.replace(os.path.join(dist_folder, MANIFEST_NAME + '.tmp'), os.path.join(dist_folder, MANIFEST_NAME))
+
+    if prune:
+        keep = {MANIFEST_NAME}
+        for hashed in manifest.values():
+            keep.update((hashed, hashed + '.gz', hashed + '.br'))
+        for cur_path, _, filenames in os.walk(dist_folder):
+            for name in filenames:
+                rel_path = posixpath.join(*os.path.relpath(os.path.join(cur_path, name), dist_folder).split(os.sep))
+                if rel_path not in keep:
+                    os.remove(os.path.join(cur_path, name))
+    return manifest, written
+
+
+# --- 4. FLASK INTEGRATION ---
+class Assets:
+    """Serves fingerprinted assets and resolves names through the build manifest.
+
+    ``asset_url(filename)`` works like ``url_for('static', filename=...)`` but
+    returns the hashed copy under ``static/<ASSETS_DIST>/`` when one was built.
+    The static endpoint serves those with ``Cache-Control: immutable`` and picks
+    a precompressed sidecar according to ``Accept-Encoding``.
+    """
+
+    def __init__(self, app=None):
+        self.manifest = {}
+        if app is not None:
+            self.init_app(app)
+
+    def init_app(self, app):
+        app.config.setdefault('ASSETS_DIST', 'dist')
+        app.config.setdefault('ASSETS_MAX_AGE', 365 * 24 * 3600)
+        self.app = app
+        self.dist_folder = os.path.join(app.static_folder, app.config['ASSETS_DIST'])
+        self.load_manifest()
+        app.jinja_env.globals['asset_url'] = self.asset_url
+        app.view_functions['static'] = self.send_static_file
+        app.extensions['assets'] = self
+
+    def load_manifest(self):
+        try:
+            with open(os.path.join(self.dist_folder, MANIFEST_NAME)) as handler:
+                self.manifest = json.load(handler)
+        except FileNotFoundError:
+            self.manifest = {}
+
+    def asset_url(self, filename, **values):
+        filename = filename.lstrip('/')
+        hashed = self.manifest.get(filename)
+        if hashed is not None:
+            filename = '%s/%s' % (self.app.config['ASSETS_DIST'], hashed)
+        return url_for('static', filename=filename, **values)
+
+    def send_static_file(self, filename):
+        dist_prefix = self.app.config['ASSETS_DIST'] + '/'
+        if not filename.startswith(dist_prefix):
+            return self.app.send_static_file(filename)
+
+        name = filename[len(dist_prefix):]
+        mimetype = mimetypes.guess_type(name)[0] or 'application/octet-stream'
+        encoding = None
+        for candidate, suffix in (('br', '.br'), ('gzip', '.gz')):
+            if request.accept_encodings[candidate] and os.path.isfile(os.path.join(self.dist_folder, name + suffix)):
+                encoding = candidate
+                name += suffix
+                break
+        response = send_from_directory(self.dist_folder, name, mimetype=mimetype, max_age=self.app.config['ASSETS_MAX_AGE'])
+        if encoding:
+            response.headers['Content-Encoding'] = encoding
+        response.vary.add('Accept-Encoding')
+        response.cache_control.public = True
+        response.cache_control.immutable = True
+        return response
+
+
+# --- 5. CLI COMMANDS ---
+assets_cli = AppGroup('assets', help='Build fingerprinted, precompressed static assets.')
+
+
+@assets_cli.command('build')
+@click.option('--prune', is_flag=True, help='Delete hashed files that are no longer in the manifest.')
+def build_command(prune):
+    """Hash and precompress everything under static/ into the dist folder."""
+    assets = current_app.extensions['assets']
+    manifest, written = build_assets(current_app.static_folder, assets.dist_folder, prune=prune)
+    assets.load_manifest()
+    click.echo('%d assets in manifest, %d files written%s' % (len(manifest), written, '' if brotli else ' (install brotli for .br files)'))
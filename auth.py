@@ -0,0 +1,127 @@
+# --- 1. IMPORTS ---
+import math
+import threading
+import time
+from collections import Counter
+from flask import Blueprint, current_app, flash, jsonify, redirect, render_template, request, url_for
+from flask_login import current_user, login_required, login_user, logout_user
+from extensions import db, login_manager, password_hasher, uploads, user_cache
+from models import User
+from password_hasher import HasherBusy
+from rate_limit import TokenBucketLimiter
+from tasks import schedule_upload_gc
+
+# --- 2. BLUEPRINT ---
+# Login, logout and the account page
+auth = Blueprint('auth', __name__)
+
+# Login outcomes, measured apart from page traffic (per process)
+login_stats = Counter()
+login_stats_lock = threading.Lock()
+
+
+@auth.record_once
+def _init_limiters(state):
+    config = state.app.config
+    # Login attempts: token buckets per client IP and per account
+    state.app.extensions['login_limiters'] = {
+        'ip': TokenBucketLimiter(config['LOGIN_IP_RATE'], config['LOGIN_IP_BURST']),
+        'account': TokenBucketLimiter(config['LOGIN_ACCOUNT_RATE'], config['LOGIN_ACCOUNT_BURST']),
+    }
+
+# --- 3. HELPERS ---
+# Sessions and author bylines are served from memory; see user_cache.py
+@login_manager.user_loader
+def user_loader(user_id):
+    return user_cache.get(user_id)
+
+def count_login(outcome, seconds=0.0):
+    with login_stats_lock:
+        login_stats[outcome] += 1
+        login_stats['seconds'] += seconds
+
+# --- 4. ROUTES ---
+@auth.route('/login', methods=['GET', 'POST'])
+def login():
+    if request.method == 'POST':
+        email = request.form['email']
+        limiters = current_app.extensions['login_limiters']
+        # One IP cannot spray accounts nor many IPs hammer one account. The account is
+        # charged only for attempts its IP may make, so a blocked IP cannot lock it out
+        retry_after = limiters['ip'].consume(request.remote_addr) or limiters['account'].consume(email.strip().lower())
+        if retry_after:
+            count_login('limited')
+            flash('Too many login attempts. Please try again later.', 'danger')
+            return render_template('login.html'), 429, {'Retry-After': str(math.ceil(retry_after))}
+
+        started = time.perf_counter()
+        user = User.query.filter_by(email=email).first()
+        try:
+            valid = user is not None and user.check_password(request.form['password'])
+        except HasherBusy:
+            count_login('busy')
+            flash('The server is busy. Please try again in a few seconds.', 'danger')
+            return render_template('login.html'), 503, {'Retry-After': '5'}
+        count_login('succeeded' if valid else 'failed', time.perf_counter() - started)
+        if valid:
+            login_user(user, remember=True)
+            return redirect(url_for('public.index'))
+        else:
+            flash('Invalid credentials.', 'danger')
+    return render_template('login.html')
+
+@auth.route('/logout')
+@login_required
+def logout():
+    logout_user()
+    return redirect(url_for('public.index'))
+
+@auth.route('/login/stats')
+@login_required
+def login_statistics():
+    """Login traffic, measured apart from page traffic: outcomes, hashing pool and limiters."""
+    with login_stats_lock:
+        logins = dict(login_stats)
+    return jsonify(logins=logins, hasher=password_hasher.stats(),
+                   limiters={name: limiter.stats() for name, limiter in current_app.extensions['login_limiters'].items()})
+
+@auth.route('/account-settings', methods=['GET', 'POST'])
+@login_required
+def account_settings():
+    if request.method == 'POST':
+        # current_user is a read-only snapshot; changes go through the ORM object
+        user = db.session.get(User, current_user.id)
+        new_password = request.form.get('password')
+        try:
+            password_ok = user.check_password(request.form.get('current_password'))
+            new_password_hash = password_hasher.generate(new_password) if password_ok and new_password else None
+        except HasherBusy:
+            flash('The server is busy. Please try again in a few seconds.', 'danger')
+            return redirect(url_for('auth.account_settings'))
+        if not password_ok:
+            flash('Incorrect password. Please try again.', 'danger')
+            return redirect(url_for('auth.account_settings'))
+
+        new_email = request.form.get('email')
+        if new_email != user.email and User.query.filter_by(email=new_email).first():
+            flash('That email address is already in use.', 'danger')
+            return redirect(url_for('auth.account_settings'))
+
+        user.email = new_email
+        user.name = request.form.get('name')
+        user.about_me = request.form.get('about_me')
+        
+        if new_password_hash:
+            user.password_hash = new_password_hash
+            
+        if 'profile_pic' in request.files:
+            profile_pic = request.files['profile_pic']
+            if profile_pic.filename != '':
+                user.profile_image_path = uploads.save(profile_pic).path
+                schedule_upload_gc()
+
+        db.session.commit()
+        user_cache.invalidate(user.id)
+        flash('Your settings have been updated successfully!', 'success')
+        return redirect(url_for('auth.account_settings'))
+    return render_template('account-settings.html', logado=current_user.is_authenticated)
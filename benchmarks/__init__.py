@@ -0,0 +1,7 @@
+"""Reproducible load tests: synthetic content, an in-process waitress harness and result comparison.
+
+    python -m benchmarks generate /tmp/posts --posts 1000
+    python -m benchmarks run --sizes 10,1000,10000 --output bench.json
+    python -m benchmarks compare bench.json baseline.json
+    python -m benchmarks startup --budget 0.75
+"""
@@ -0,0 +1,241 @@
+# --- 1. IMPORTS ---
+import json
+import os
+import platform
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+import click
+from benchmarks.generate import generate_posts
+
+# --- 2. CONSTANTS ---
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+FORMAT_VERSION = 1
+# Metric -> direction that counts as worse; compared per size and per route
+ROUTE_METRICS = (('p50_ms', 'up'), ('p95_ms', 'up'), ('p99_ms', 'up'), ('throughput_rps', 'down'))
+
+
+# --- 3. RUNNING ---
+def _environment(workdir, cache):
+    """FLASK_* overrides that keep a run away from the real instance folder and content."""
+    env = dict(os.environ)
+    env.update({
+        'FLASK_FLATPAGES_ROOT': os.path.join(workdir, 'posts'),
+        'FLASK_SQLALCHEMY_DATABASE_URI': 'sqlite:///' + os.path.join(workdir, 'bench.db'),
+        'FLASK_RENDER_CACHE_PATH': os.path.join(workdir, 'render-cache.db'),
+        'FLASK_SEARCH_INDEX_PATH': os.path.join(workdir, 'search.db'),
+        'FLASK_RESPONSE_CACHE_PATH': os.path.join(workdir, 'response-cache.db'),
+        'FLASK_JOBS_PATH': os.path.join(workdir, 'jobs.db'),
+        'FLASK_CONTENT_WATCHER': 'null',
+        # The harness logs in from one address many times over
+        'FLASK_LOGIN_IP_BURST': '1000000000',
+        'FLASK_LOGIN_ACCOUNT_BURST': '1000000000',
+        # Measure the app, not the load shedding in front of it
+        'FLASK_ADMISSION_CONTROL': 'false',
+    })
+    if not cache:
+        env['FLASK_RESPONSE_CACHE_BACKEND'] = 'null'
+    return env
+
+
+def run_size(posts, options):
+    """Generate ``posts`` posts in a scratch folder and benchmark them in a fresh process."""
+    with tempfile.TemporaryDirectory(prefix='nemo-bench-') as workdir:
+        generate_posts(os.path.join(workdir, 'posts'), posts, seed=options['seed'])
+        spec = dict(options, posts=posts)
+        result = subprocess.run([sys.executable, '-m', 'benchmarks.harness', json.dumps(spec)], cwd=ROOT,
+                                env=_environment(workdir, options['cache']), stdout=subprocess.PIPE)
+    if result.returncode != 0:
+        raise click.ClickException('benchmark with %d posts failed (exit status %d)' % (posts, result.returncode))
+    return json.loads(result.stdout)
+
+
+def run_startup(posts, options):
+    """Start the app ``runs`` times in fresh processes over ``posts`` generated posts.
+
+    The scratch caches persist between runs, as they do across restarts, so
+    only the first run renders and indexes everything.
+    """
+    with tempfile.TemporaryDirectory(prefix='nemo-startup-') as workdir:
+        generate_posts(os.path.join(workdir, 'posts'), posts, seed=options['seed'])
+        env = _environment(workdir, True)
+        samples = []
+        for _ in range(options['runs']):
+            result = subprocess.run([sys.executable, '-m', 'benchmarks.startup', json.dumps(options)], cwd=ROOT, env=env,
+                                    stdout=subprocess.PIPE)
+            if result.returncode != 0:
+                raise click.ClickException('startup run failed (exit status %d)' % result.returncode)
+            samples.append(json.loads(result.stdout))
+        # A command that needs neither content nor the database, end to end
+        cli_seconds = []
+        for _ in range(options['runs']):
+            started = time.perf_counter()
+            subprocess.run([sys.executable, '-m', 'flask', '--app', 'app', 'users', '--help'], cwd=ROOT, env=env,
+                           stdout=subprocess.DEVNULL, check=True)
+            cli_seconds.append(time.perf_counter() - started)
+    summary = {key: round(statistics.median(sample[key] for sample in samples), 4)
+               for key in ('import_seconds', 'create_app_seconds', 'ready_seconds')}
+    summary['cli_seconds'] = round(statistics.median(cli_seconds), 4)
+    summary['lazy_modules_loaded'] = sorted({name for sample in samples for name in sample['lazy_modules_loaded']})
+    return summary
+
+
+def _git_revision():
+    try:
+        return subprocess.run(['git', 'rev-parse', '--short', 'HEAD'], cwd=ROOT, capture_output=True, text=True).stdout.strip() or None
+    except OSError:
+        return None
+
+
+# --- 4. COMPARISON ---
+def compare(current, baseline, threshold, memory_threshold):
+    """List regressions of ``current`` against ``baseline`` as human-readable lines.
+
+    Latency and RSS regress when they grow by more than the threshold (a
+    fraction), throughput when it drops by more than it. Sizes or routes
+    missing from either side are skipped.
+    """
+    regressions = []
+    baseline_sizes = {str(size['posts']): size for size in baseline['sizes']}
+
+    def check(label, now, before, direction, limit):
+        if now is None or not before:
+            return
+        change = (now - before) / before
+        if (direction == 'up' and change > limit) or (direction == 'down' and -change > limit):
+            regressions.append('%s: %s -> %s (%+.1f%%)' % (label, before, now, change * 100))
+
+    for size in current['sizes']:
+        before = baseline_sizes.get(str(size['posts']))
+        if before is None:
+            continue
+        for route, stats in size['routes'].items():
+            old = before['routes'].get(route)
+            if old is None:
+                continue
+            for metric, direction in ROUTE_METRICS:
+                check('%d posts %s %s' % (size['posts'], route, metric), stats.get(metric), old.get(metric), direction, threshold)
+            if stats.get('errors') and not old.get('errors'):
+                regressions.append('%d posts %s: %d errors (baseline had none)' % (size['posts'], route, stats['errors']))
+        check('%d posts peak_rss_mb' % size['posts'], size['memory']['after_load'].get('peak_rss_mb'),
+              before['memory']['after_load'].get('peak_rss_mb'), 'up', memory_threshold)
+    return regressions
+
+
+def _table(results):
+    lines = []
+    for size in results['sizes']:
+        memory = size['memory']['after_load']
+        lines.append('%d posts (%d published): startup %.2fs, RSS %s MiB, peak %s MiB' % (
+            size['posts'], size['published_posts'], size['startup_seconds'], memory.get('rss_mb', '?'), memory.get('peak_rss_mb', '?')))
+        lines.append('  %-16s %8s %7s %9s %9s %9s %10s' % ('route', 'requests', 'errors', 'p50 ms', 'p95 ms', 'p99 ms', 'req/s'))
+        for route, stats in size['routes'].items():
+            lines.append('  %-16s %8d %7d %9.2f %9.2f %9.2f %10.1f' % (
+                route, stats['requests'], stats['errors'], stats['p50_ms'], stats['p95_ms'], stats['p99_ms'], stats['throughput_rps']))
+    return '\n'.join(lines)
+
+
+# --- 5. CLI ---
+@click.group()
+def cli():
+    """Synthetic content generator and load tests for the site."""
+
+
+@cli.command('generate')
+@click.argument('output', type=click.Path(file_okay=False))
+@click.option('--posts', '-n', default=1000, show_default=True, help='Number of posts to write.')
+@click.option('--seed', default=0, show_default=True, help='Same seed, same files.')
+def generate_command(output, posts, seed):
+    """Write synthetic posts under OUTPUT (a FLATPAGES_ROOT-style tree)."""
+    written = generate_posts(output, posts, seed=seed)
+    click.echo(', '.join('%d in %s' % (count, section) for section, count in written.items()))
+
+
+@cli.command('run')
+@click.option('--sizes', default='10,1000,10000', show_default=True, help='Comma-separated post counts to benchmark.')
+@click.option('--requests', '-n', default=500, show_default=True, help='Requests per route.')
+@click.option('--login-requests', default=20, show_default=True, help='Login form submissions (each one runs bcrypt).')
+@click.option('--concurrency', '-c', default=8, show_default=True, help='Concurrent keep-alive clients.')
+@click.option('--threads', default=8, show_default=True, help='Waitress worker threads.')
+@click.option('--warmup', default=20, show_default=True, help='Unmeasured requests sent to each route first.')
+@click.option('--cache/--no-cache', default=True, show_default=True, help='Keep the anonymous response cache enabled.')
+@click.option('--seed', default=0, show_default=True, help='Seed for the content and the sampled posts.')
+@click.option('--warm-timeout', default=600, show_default=True, help='Seconds to wait for /readyz.')
+@click.option('--output', '-o', type=click.Path(dir_okay=False), help='Write the results JSON here.')
+@click.option('--baseline', type=click.Path(exists=True, dir_okay=False), help='Compare against this results JSON.')
+@click.option('--threshold', default=0.10, show_default=True, help='Allowed relative slowdown before flagging a regression.')
+@click.option('--memory-threshold', default=0.10, show_default=True, help='Allowed relative RSS growth.')
+def run_command(sizes, output, baseline, threshold, memory_threshold, **options):
+    """Benchmark every route against an in-process waitress server for each content size."""
+    results = {
+        'version': FORMAT_VERSION,
+        'created': time.strftime('%Y-%m-%dT%H:%M:%S%z'),
+        'revision': _git_revision(),
+        'python': platform.python_version(),
+        'cpus': os.cpu_count(),
+        'options': options,
+        'sizes': [],
+    }
+    for posts in [int(size) for size in sizes.split(',') if size.strip()]:
+        click.echo('Benchmarking %d posts...' % posts, err=True)
+        results['sizes'].append(run_size(posts, options))
+    click.echo(_table(results))
+    if output:
+        with open(output, 'w') as handler:
+            json.dump(results, handler, indent=1)
+    if baseline:
+        with open(baseline) as handler:
+            _report(compare(results, json.load(handler), threshold, memory_threshold))
+
+
+@cli.command('startup')
+@click.option('--posts', '-n', default=1000, show_default=True, help='Number of posts to load before /readyz answers.')
+@click.option('--runs', default=5, show_default=True, help='Cold starts to take the median of.')
+@click.option('--budget', default=0.75, show_default=True, help='Seconds allowed for import app + create_app() (median).')
+@click.option('--seed', default=0, show_default=True, help='Same seed, same files.')
+@click.option('--warm-timeout', default=600, show_default=True, help='Seconds to wait for /readyz.')
+def startup_command(posts, budget, **options):
+    """Time cold starts; exit status 1 over BUDGET or if 'flask db'/bcrypt modules load eagerly."""
+    summary = run_startup(posts, options)
+    startup = summary['import_seconds'] + summary['create_app_seconds']
+    click.echo('import %.3fs + create_app %.3fs = %.3fs (budget %.2fs); ready after %.3fs more; CLI round trip %.3fs' % (
+        summary['import_seconds'], summary['create_app_seconds'], startup, budget, summary['ready_seconds'], summary['cli_seconds']))
+    failures = []
+    if startup > budget:
+        failures.append('startup %.3fs is over the %.2fs budget' % (startup, budget))
+    if summary['lazy_modules_loaded']:
+        failures.append('loaded at startup: ' + ', '.join(summary['lazy_modules_loaded']))
+    for line in failures:
+        click.echo('  ' + line)
+    if failures:
+        raise click.exceptions.Exit(1)
+
+
+@cli.command('compare')
+@click.argument('current', type=click.Path(exists=True, dir_okay=False))
+@click.argument('baseline', type=click.Path(exists=True, dir_okay=False))
+@click.option('--threshold', default=0.10, show_default=True, help='Allowed relative slowdown before flagging a regression.')
+@click.option('--memory-threshold', default=0.10, show_default=True, help='Allowed relative RSS growth.')
+def compare_command(current, baseline, threshold, memory_threshold):
+    """Flag regressions of CURRENT against BASELINE (exit status 1 if any)."""
+    with open(current) as handler:
+        current = json.load(handler)
+    with open(baseline) as handler:
+        baseline = json.load(handler)
+    _report(compare(current, baseline, threshold, memory_threshold))
+
+
+def _report(regressions):
+    if not regressions:
+        click.echo('No regressions against the baseline.')
+        return
+    click.echo('%d regression(s) against the baseline:' % len(regressions))
+    for line in regressions:
+        click.echo('  ' + line)
+    raise click.exceptions.Exit(1)
+
+
+if __name__ == '__main__':
+    cli()
@@ -0,0 +1,100 @@
+# --- 1. IMPORTS ---
+import os
+import random
+from datetime import date, timedelta
+
+# --- 2. CONSTANTS ---
+# Share of each section in a generated archive
+SECTIONS = (('news/awards', 0.4), ('news/others', 0.4), ('months-problems', 0.2))
+WORDS = ('olimpíada matemática problema solução equipe prêmio medalha treino lista encontro grupo '
+         'estudantes competição universidade teorema prova indução grafo polinômio desigualdade '
+         'combinatória álgebra geometria número primo função sequência limite integral').split()
+FORMULAS = (r'$a^2 + b^2 = c^2$', r'$\sum_{k=1}^{n} k = \frac{n(n+1)}{2}$', r'$\int_0^1 x^2\,dx = \frac{1}{3}$',
+            r'$p \mid n^2 \Rightarrow p \mid n$', r'$\binom{2n}{n} \le 4^n$', r'$x + \frac{1}{x} \ge 2$')
+IMAGES = ('uploads/chess.jpg', 'uploads/clippy.webp', None)
+
+
+# --- 3. GENERATOR ---
+def _sentence(rng, words=12):
+    text = ' '.join(rng.choice(WORDS) for _ in range(rng.randint(words // 2, words)))
+    if rng.random() < 0.3:
+        text += ' ' + rng.choice(FORMULAS)
+    return text[0].upper() + text[1:] + '.'
+
+
+def _paragraph(rng):
+    return ' '.join(_sentence(rng) for _ in range(rng.randint(2, 6)))
+
+
+def _body(rng, paragraphs):
+    parts = ['## %s' % _sentence(rng, 6).rstrip('.')]
+    for index in range(paragraphs):
+        parts.append(_paragraph(rng))
+        roll = rng.random()
+        if roll < 0.15:
+            parts.append('$$\n%s\n$$' % rng.choice(FORMULAS).strip('$'))
+        elif roll < 0.3:
+            parts.append('\n'.join('- %s' % _sentence(rng, 8) for _ in range(rng.randint(2, 5))))
+        elif roll < 0.35:
+            parts.append('```python\nfor n in range(10):\n    print(n * n)\n```')
+        if index % 3 == 2:
+            parts.append('### %s' % _sentence(rng, 5).rstrip('.'))
+    return '\n\n'.join(parts) + '\n'
+
+
+def _quote(text):
+    return '"%s"' % text.replace('\\', '\\\\').replace('"', '\\"')
+
+
+def _header(rng, section, number, day):
+    published = rng.random() < 0.95
+    image = rng.choice(IMAGES)
+    lines = [
+        'title: %s' % _quote('%s %d' % (_sentence(rng, 5).rstrip('.'), number)),
+        'date: %s' % day.isoformat(),
+        'desc: %s' % _quote(_sentence(rng, 14)),
+        'author_email: "author%d@example.com"' % rng.randint(1, 20),
+    ]
+    if image:
+        lines.append('image: "%s"' % image)
+    if section == 'months-problems':
+        solved = rng.random() < 0.8
+        lines += [
+            'post_type: Month-Problem',
+            'status: %s' % ('published' if published else 'draft'),
+            '',  # problem headers contain a blank line, as in the real template
+            '# --- Problem Specific Fields ---',
+            'is_solved: %s' % ('true' if solved else 'false'),
+            'solver_name: %s' % _quote(rng.choice(WORDS).title() if solved else ''),
+            'solver_image: "uploads/solver-picture.jpg"',
+            'solution_content: |',
+        ]
+        lines += ['    ' + line for line in _body(rng, 2).splitlines()]
+    else:
+        lines += [
+            'post_type: News',
+            'category: "%s"' % ('Award' if section == 'news/awards' else 'General'),
+            'status: %s' % ('published' if published else 'draft'),
+        ]
+    return '\n'.join(lines)
+
+
+def generate_posts(root, count, seed=0, paragraphs=(3, 12)):
+    """Write ``count`` synthetic posts under ``root``; the same seed gives the same files.
+
+    Returns {section: number of files}.
+    """
+    rng = random.Random(seed)
+    written = {section: 0 for section, _ in SECTIONS}
+    weights = [share for _, share in SECTIONS]
+    start = date(2010, 1, 1)
+    for number in range(count):
+        section = rng.choices([name for name, _ in SECTIONS], weights)[0]
+        folder = os.path.join(root, *section.split('/'))
+        os.makedirs(folder, exist_ok=True)
+        day = start + timedelta(days=rng.randint(0, 15 * 365))
+        content = '%s\n\n---\n\n%s' % (_header(rng, section, number, day), _body(rng, rng.randint(*paragraphs)))
+        with open(os.path.join(folder, 'post-%06d.md' % number), 'w', encoding='utf-8') as handler:
+            handler.write(content)
+        written[section] += 1
+    return written
@@ -0,0 +1,184 @@
+# --- 1. IMPORTS ---
+import http.client
+import json
+import random
+import resource
+import sys
+import threading
+import time
+from urllib.parse import quote, urlencode
+
+# --- 2. CONSTANTS ---
+BENCH_EMAIL = 'bench@example.com'
+BENCH_PASSWORD = 'bench-password'
+# Responses that count as successful; logins answer 302 and /login re-renders with 200
+OK_STATUSES = (200, 302, 304)
+
+
+# --- 3. MEASUREMENT ---
+def percentile(values, fraction):
+    """Nearest-rank percentile of an already sorted list (None when empty)."""
+    if not values:
+        return None
+    index = min(len(values) - 1, max(0, int(round(fraction * len(values) + 0.5)) - 1))
+    return values[index]
+
+
+def summarize(latencies, errors, elapsed):
+    latencies = sorted(latencies)
+    count = len(latencies)
+    return {
+        'requests': count,
+        'errors': errors,
+        'p50_ms': _ms(percentile(latencies, 0.50)),
+        'p95_ms': _ms(percentile(latencies, 0.95)),
+        'p99_ms': _ms(percentile(latencies, 0.99)),
+        'mean_ms': _ms(sum(latencies) / count if count else None),
+        'throughput_rps': round(count / elapsed, 1) if elapsed > 0 else None,
+    }
+
+
+def _ms(seconds):
+    return None if seconds is None else round(seconds * 1000, 3)
+
+
+def memory_usage():
+    """Current and peak resident set size of this process, in MiB."""
+    usage = {}
+    try:
+        with open('/proc/self/status') as handler:
+            for line in handler:
+                key, _, value = line.partition(':')
+                if key in ('VmRSS', 'VmHWM'):
+                    usage['rss_mb' if key == 'VmRSS' else 'peak_rss_mb'] = round(int(value.split()[0]) / 1024, 1)
+    except OSError:  # Not Linux: ru_maxrss is KiB on Linux/BSD, bytes on macOS
+        peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+        usage['peak_rss_mb'] = round(peak / (1024 * 1024 if sys.platform == 'darwin' else 1024), 1)
+    return usage
+
+
+# --- 4. LOAD GENERATOR ---
+def drive(port, requests, concurrency):
+    """Send ``requests`` [(method, url, body)] from ``concurrency`` keep-alive clients.
+
+    Returns the route summary (latencies are measured per request, the
+    throughput over the whole phase).
+    """
+    queue = iter(requests)
+    queue_lock = threading.Lock()
+    latencies, errors = [], [0]
+    results_lock = threading.Lock()
+
+    def client():
+        conn = http.client.HTTPConnection('127.0.0.1', port, timeout=60)
+        mine, failed = [], 0
+        while True:
+            with queue_lock:
+                item = next(queue, None)
+            if item is None:
+                break
+            method, url, body = item
+            headers = {'Content-Type': 'application/x-www-form-urlencoded'} if body else {}
+            started = time.perf_counter()
+            try:
+                conn.request(method, url, body=body, headers=headers)
+                response = conn.getresponse()
+                response.read()
+                ok = response.status in OK_STATUSES
+                if response.will_close:
+                    conn.close()
+            except (OSError, http.client.HTTPException):
+                ok = False
+                conn.close()
+            mine.append(time.perf_counter() - started)
+            failed += not ok
+        conn.close()
+        with results_lock:
+            latencies.extend(mine)
+            errors[0] += failed
+
+    threads = [threading.Thread(target=client, name='bench-client-%d' % i) for i in range(concurrency)]
+    started = time.perf_counter()
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    return summarize(latencies, errors[0], time.perf_counter() - started)
+
+
+def scenarios(post_paths, requests, login_requests, seed):
+    """Route name -> list of (method, url, body) to send, in a fixed order."""
+    rng = random.Random(seed)
+    login = urlencode({'email': BENCH_EMAIL, 'password': BENCH_PASSWORD})
+    posts = ['/post/' + quote(rng.choice(post_paths)) for _ in range(requests)] if post_paths else []
+    return {
+        'index': [('GET', '/', None)] * requests,
+        'news': [('GET', '/news', None)] * requests,
+        'months_problems': [('GET', '/months-problems', None)] * requests,
+        'view_post': [('GET', url, None) for url in posts],
+        'login_form': [('GET', '/login', None)] * requests,
+        # bcrypt dominates here, so this phase is kept short
+        'login_submit': [('POST', '/login', login)] * login_requests,
+    }
+
+
+# --- 5. WORKER PROCESS ---
+def run(spec):
+    """Benchmark one content size; runs in a fresh interpreter configured via FLASK_* env vars."""
+    started = time.perf_counter()
+    import waitress
+    from waitress import wasyncore
+    from app import create_app
+    from extensions import db, catalog, user_cache
+    from models import User
+    from serve import wait_until_ready
+    # Content and the user cache load on the first request, after create_all below
+    app = create_app()
+
+    with app.app_context():
+        db.create_all()
+        user_cache.invalidate()
+        if User.query.filter_by(email=BENCH_EMAIL).first() is None:
+            db.session.add(User(BENCH_EMAIL, BENCH_PASSWORD, 'Bench'))
+            db.session.commit()
+    if not wait_until_ready(app, spec['warm_timeout']):
+        raise SystemExit('app did not become ready within %ss' % spec['warm_timeout'])
+    startup = time.perf_counter() - started
+    after_startup = memory_usage()
+
+    server = waitress.create_server(app, host='127.0.0.1', port=0, threads=spec['threads'])
+    stopping = threading.Event()
+
+    def serve():
+        while not stopping.is_set():
+            wasyncore.loop(timeout=0.2, map=server._map, count=1)
+    thread = threading.Thread(target=serve, name='waitress', daemon=True)
+    thread.start()
+    port = server.effective_port
+
+    post_paths = sorted(catalog.snapshot.by_path)
+    routes = {}
+    try:
+        for route, requests in scenarios(post_paths, spec['requests'], spec['login_requests'], spec['seed']).items():
+            if not requests:
+                continue
+            drive(port, requests[:spec['warmup']], min(spec['concurrency'], spec['warmup']) or 1)
+            routes[route] = drive(port, requests, spec['concurrency'])
+    finally:
+        stopping.set()
+        thread.join()
+        server.task_dispatcher.shutdown()
+        wasyncore.close_all(server._map)
+
+    return {
+        'posts': spec['posts'],
+        'published_posts': len(post_paths),
+        'startup_seconds': round(startup, 3),
+        'memory': {'after_startup': after_startup, 'after_load': memory_usage()},
+        'routes': routes,
+    }
+
+
+if __name__ == '__main__':
+    # Invoked by benchmarks.__main__ with the spec as JSON; results go to stdout, logs to stderr
+    json.dump(run(json.loads(sys.argv[1])), sys.stdout)
@@ -0,0 +1,38 @@
+# --- 1. IMPORTS ---
+import json
+import sys
+import time
+
+# --- 2. CONSTANTS ---
+# Must not be imported by 'import app' + create_app(): they belong to 'flask db' and to password hashing
+LAZY_MODULES = ('alembic', 'flask_migrate', 'bcrypt')
+
+
+# --- 3. WORKER PROCESS ---
+def run(spec):
+    """Time one cold start; runs in a fresh interpreter configured via FLASK_* env vars."""
+    started = time.perf_counter()
+    from app import create_app
+    imported = time.perf_counter()
+    app = create_app()
+    created = time.perf_counter()
+    loaded = sorted(name for name in LAZY_MODULES if name in sys.modules)
+
+    from extensions import db
+    from serve import wait_until_ready
+    with app.app_context():
+        db.create_all()
+    ready_started = time.perf_counter()
+    if not wait_until_ready(app, spec['warm_timeout']):
+        raise SystemExit('app did not become ready within %ss' % spec['warm_timeout'])
+    return {
+        'import_seconds': round(imported - started, 4),
+        'create_app_seconds': round(created - imported, 4),
+        'ready_seconds': round(time.perf_counter() - ready_started, 4),
+        'lazy_modules_loaded': loaded,
+    }
+
+
+if __name__ == '__main__':
+    # Invoked by benchmarks.__main__ with the spec as JSON; results go to stdout, logs to stderr
+    json.dump(run(json.loads(sys.argv[1])), sys.stdout)
@@ -0,0 +1,143 @@
+# --- 1. IMPORTS ---
+import base64
+import json
+import math
+import threading
+from bisect import bisect_right
+from datetime import date, datetime, time
+from types import MappingProxyType
+
+# --- 2. CONSTANTS & HELPERS ---
+NEWS_PREFIX = 'news/'
+AWARDS_PREFIX = 'news/awards/'
+OTHER_NEWS_PREFIX = 'news/others/'
+PROBLEMS_PREFIX = 'months-problems/'
+EPOCH = datetime(1970, 1, 1)
+# Undated posts list as the newest; a fixed stamp keeps their cursors valid across snapshots
+UNDATED = datetime(9999, 12, 31)
+# Public section names (listing API) -> CatalogSnapshot attribute
+SECTIONS = {'news': 'news', 'awards': 'awards', 'others': 'other_news', 'problems': 'problems'}
+# Shape of each list's sort key, which is what its cursors decode to
+KEY_TYPES = {'news': (float, str), 'awards': (float, str), 'other_news': (float, str), 'problems': (int, float, str)}
+
+
+def post_date(page, default=None):
+    """Return the post date as a datetime so dates and datetimes sort together."""
+    value = page.meta.get('date')
+    if isinstance(value, datetime):
+        return value
+    if isinstance(value, date):
+        return datetime.combine(value, time.min)
+    return default if default is not None else datetime.now()
+
+
+def encode_cursor(key):
+    """Opaque, URL-safe token for a position in a sorted listing."""
+    return base64.urlsafe_b64encode(json.dumps(key, separators=(',', ':')).encode('utf-8')).decode('ascii').rstrip('=')
+
+
+def _valid_part(value, kind):
+    if kind is str:
+        return isinstance(value, str)
+    if isinstance(value, bool) or not isinstance(value, (int, float)):
+        return False
+    return isinstance(value, int) if kind is int else math.isfinite(value)
+
+
+def decode_cursor(cursor, types):
+    """Inverse of encode_cursor for a key shaped like ``types``; raises ValueError for anything else."""
+    try:
+        key = json.loads(base64.urlsafe_b64decode(cursor + '=' * (-len(cursor) % 4)))
+    except (ValueError, TypeError) as error:
+        raise ValueError('invalid cursor') from error
+    if not isinstance(key, list) or len(key) != len(types) or not all(map(_valid_part, key, types)):
+        raise ValueError('invalid cursor')
+    return tuple(key)
+
+
+# --- 3. SNAPSHOT ---
+class CatalogSnapshot:
+    """Immutable view of the published posts, built once per content change.
+
+    Every list is a tuple already in the order the templates display it, so
+    routes only pick the attribute they need.
+    """
+    __slots__ = ('version', 'built_at', 'by_path', 'news', 'awards', 'other_news', 'problems', 'open_problem', '_keys')
+
+    def __init__(self, version, pages):
+        built_at = datetime.now()
+        published = [p for p in pages if p.meta.get('status') == 'published']
+        stamps = {p.path: (post_date(p, UNDATED) - EPOCH).total_seconds() for p in published}
+
+        # Every list is ordered by a unique key, which doubles as its pagination
+        # cursor: newest first (path breaks ties), problems open ones first.
+        def newest_first(p):
+            return (-stamps[p.path], p.path)
+
+        def open_first(p):
+            return (int(bool(p.meta.get('is_solved', False))), stamps[p.path], p.path)
+
+        ordered = sorted(published, key=newest_first)
+        news = tuple(p for p in ordered if p.path.startswith(NEWS_PREFIX))
+        problems = sorted((p for p in published if p.path.startswith(PROBLEMS_PREFIX) and p.meta.get('post_type') == 'Month-Problem'), key=open_first)
+
+        self.version = version
+        self.built_at = built_at
+        self.by_path = MappingProxyType({p.path: p for p in published})
+        self.news = news
+        self.awards = tuple(p for p in news if p.path.startswith(AWARDS_PREFIX))
+        self.other_news = tuple(p for p in news if p.path.startswith(OTHER_NEWS_PREFIX))
+        self.problems = tuple(problems)
+        self.open_problem = next((p for p in ordered if p.path.startswith(PROBLEMS_PREFIX) and not p.meta.get('is_solved')), None)
+        self._keys = {
+            'news': tuple(map(newest_first, self.news)),
+            'awards': tuple(map(newest_first, self.awards)),
+            'other_news': tuple(map(newest_first, self.other_news)),
+            'problems': tuple(map(open_first, self.problems)),
+        }
+
+    def page(self, section, cursor=None, limit=20):
+        """Return (posts, next_cursor) for the ``limit`` posts of ``section`` after ``cursor``.
+
+        The cursor is the sort key of the last post already shown, so finding
+        the page is a binary search no matter how deep it is.
+        """
+        attribute = SECTIONS[section]
+        posts, keys = getattr(self, attribute), self._keys[attribute]
+        start = bisect_right(keys, decode_cursor(cursor, KEY_TYPES[attribute])) if cursor else 0
+        end = start + limit
+        next_cursor = encode_cursor(keys[end - 1]) if end < len(posts) else None
+        return posts[start:end], next_cursor
+
+
+# --- 4. CATALOG ---
+class PostCatalog:
+    """Holds the current CatalogSnapshot and swaps in a new one when the content changes.
+
+    Readers never block: they grab whatever snapshot is current. ``refresh``
+    is called by the content watcher after the pages were updated; it builds
+    the next snapshot off the request path and publishes it with a single
+    attribute assignment.
+    """
+
+    def __init__(self, pages, version=None):
+        self.pages = pages
+        self.version = version
+        self._lock = threading.Lock()
+        self._snapshot = None
+
+    @property
+    def snapshot(self):
+        snapshot = self._snapshot
+        if snapshot is None:
+            with self._lock:
+                if self._snapshot is None:
+                    self._snapshot = CatalogSnapshot(self.version, self.pages)
+                snapshot = self._snapshot
+        return snapshot
+
+    def refresh(self, version=None):
+        with self._lock:
+            self.version = version
+            self._snapshot = CatalogSnapshot(version, self.pages)
+        return self._snapshot
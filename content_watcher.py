@@ -0,0 +1,328 @@
+# --- 1. IMPORTS ---
+import ctypes
+import ctypes.util
+import hashlib
+import logging
+import os
+import select
+import struct
+import threading
+from blinker import Namespace
+
+logger = logging.getLogger(__name__)
+
+# --- 2. SIGNALS ---
+# Sent once per batch of changes under the watched tree, after the pages have
+# been updated. Receivers get the ContentChange as the ``change`` keyword.
+_signals = Namespace()
+content_changed = _signals.signal('content-changed')
+
+
+class ContentChange:
+    """Files added, modified and removed in one batch, plus the new tree fingerprint."""
+    __slots__ = ('added', 'modified', 'removed', 'fingerprint')
+
+    def __init__(self, added, modified, removed, fingerprint):
+        self.added = tuple(sorted(added))
+        self.modified = tuple(sorted(modified))
+        self.removed = tuple(sorted(removed))
+        self.fingerprint = fingerprint
+
+    def __bool__(self):
+        return bool(self.added or self.modified or self.removed)
+
+    def __repr__(self):
+        return '<ContentChange +%d ~%d -%d %s>' % (len(self.added), len(self.modified), len(self.removed), self.fingerprint[:8])
+
+
+# --- 3. INOTIFY BACKEND ---
+IN_ATTRIB = 0x00000004
+IN_CLOSE_WRITE = 0x00000008
+IN_MOVED_FROM = 0x00000040
+IN_MOVED_TO = 0x00000080
+IN_CREATE = 0x00000100
+IN_DELETE = 0x00000200
+IN_DELETE_SELF = 0x00000400
+IN_MOVE_SELF = 0x00000800
+IN_Q_OVERFLOW = 0x00004000
+IN_IGNORED = 0x00008000
+IN_ISDIR = 0x40000000
+WATCH_MASK = IN_ATTRIB | IN_CLOSE_WRITE | IN_MOVED_FROM | IN_MOVED_TO | IN_CREATE | IN_DELETE | IN_DELETE_SELF | IN_MOVE_SELF
+_EVENT_HEADER = struct.Struct('iIII')
+
+
+class _Inotify:
+    """Thin ctypes wrapper around Linux inotify that reports dirty directories."""
+
+    def __init__(self):
+        libc = ctypes.CDLL(ctypes.util.find_library('c') or 'libc.so.6', use_errno=True)
+        if not hasattr(libc, 'inotify_init1'):
+            raise OSError('inotify is not available on this platform')
+        self._libc = libc
+        self.fd = libc.inotify_init1(os.O_NONBLOCK | os.O_CLOEXEC)
+        if self.fd < 0:
+            raise OSError(ctypes.get_errno(), 'inotify_init1 failed')
+        self._dirs = {}
+
+    def add_tree(self, directory):
+        for cur_path, _, _ in os.walk(directory):
+            wd = self._libc.inotify_add_watch(self.fd, os.fsencode(cur_path), WATCH_MASK)
+            if wd >= 0:
+                self._dirs[wd] = cur_path
+
+    def read(self, timeout):
+        """Wait up to ``timeout`` seconds and return (dirty directories, overflowed)."""
+        ready, _, _ = select.select([self.fd], [], [], timeout)
+        if not ready:
+            return set(), False
+        try:
+            data = os.read(self.fd, 64 * 1024)
+        except BlockingIOError:
+            return set(), False
+
+        dirty, overflow, offset = set(), False, 0
+        while offset < len(data):
+            wd, mask, _, name_len = _EVENT_HEADER.unpack_from(data, offset)
+            name = data[offset + _EVENT_HEADER.size:offset + _EVENT_HEADER.size + name_len].rstrip(b'\0')
+            offset += _EVENT_HEADER.size + name_len
+            if mask & IN_Q_OVERFLOW:
+                overflow = True
+                continue
+            directory = self._dirs.get(wd)
+            if directory is None:
+                continue
+            if mask & IN_IGNORED:
+                del self._dirs[wd]
+                continue
+            dirty.add(directory)
+            if mask & IN_ISDIR and mask & (IN_CREATE | IN_MOVED_TO):
+                self.add_tree(os.path.join(directory, os.fsdecode(name)))
+        return dirty, overflow
+
+    def close(self):
+        os.close(self.fd)
+
+
+# --- 4. WATCHER ---
+class ContentWatcher:
+    """Background thread that keeps a page collection in sync with a directory tree.
+
+    Only the files that were added, modified or removed are handed to
+    ``apply``; afterwards a single ``content_changed`` signal is sent. Request
+    threads never stat the tree themselves.
+
+    ``backend`` is 'inotify', 'poll' or 'auto' (inotify, falling back to
+    polling directory mtimes every ``interval`` seconds with a full file
+    sweep every ``full_scan_every`` ticks to catch in-place edits).
+    """
+
+    def __init__(self, root, extension, apply=None, backend='auto', interval=1.0, full_scan_every=30, debounce=0.2):
+        self.root = os.path.abspath(root)
+        self.extensions = tuple(extension.split(',')) if isinstance(extension, str) else tuple(extension)
+        self.apply = apply
+        self.backend = backend
+        self.interval = interval
+        self.full_scan_every = full_scan_every
+        self.debounce = debounce
+        self.fingerprint = None
+        self._files = {}
+        self._dir_mtimes = {}
+        self._lock = threading.Lock()
+        self._stop = threading.Event()
+        self._thread = None
+        self._inotify = None
+        os.register_at_fork(after_in_child=self._after_fork)
+
+    def _after_fork(self):
+        # The watching thread does not exist in a forked child, and the inotify
+        # descriptor must not be shared with the parent; call start() again.
+        if self._inotify is not None:
+            self._inotify.close()
+            self._inotify = None
+        self._thread = None
+        self._lock = threading.Lock()
+        self._stop = threading.Event()
+
+    def start(self):
+        """Take the baseline listing (or catch up with it) synchronously, then watch in a daemon thread."""
+        if self._thread is not None:
+            return self
+        if self.backend in ('auto', 'inotify'):
+            try:
+                self._inotify = _Inotify()
+                self._inotify.add_tree(self.root)
+            except OSError:
+                if self.backend == 'inotify':
+                    raise
+                logger.info('inotify unavailable, polling %s every %ss', self.root, self.interval)
+                self._inotify = None
+        if self._files:
+            # Restarted (after stop() or in a forked child): publish what changed meanwhile
+            self.check_now()
+        else:
+            with self._lock:
+                self._scan(self._walk_dirs(self.root))
+                self.fingerprint = self._compute_fingerprint()
+        self._stop.clear()
+        self._thread = threading.Thread(target=self._run, name='content-watcher', daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self):
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join()
+            self._thread = None
+        if self._inotify is not None:
+            self._inotify.close()
+            self._inotify = None
+
+    def check_now(self):
+        """Synchronously rescan the whole tree and publish any changes."""
+        return self._process(set(self._dir_mtimes) | {self.root})
+
+    def page_path(self, filename):
+        """Page path FlatPages uses for ``filename`` (relative, no extension, '/'-separated)."""
+        rel_path = os.path.relpath(filename, self.root)
+        for extension in self.extensions:
+            if rel_path.endswith(extension):
+                rel_path = rel_path[:-len(extension)]
+                break
+        return '/'.join(rel_path.split(os.sep))
+
+    # --- Thread loop ---
+    def _run(self):
+        ticks = 0
+        while not self._stop.is_set():
+            try:
+                if self._inotify is not None:
+                    dirty, overflow = self._inotify.read(0.5)
+                    if overflow:
+                        dirty = set(self._dir_mtimes) | {self.root}
+                    elif dirty:
+                        # Collect the rest of a burst (editors write, rename and chmod)
+                        self._stop.wait(self.debounce)
+                        more, overflow = self._inotify.read(0)
+                        dirty |= set(self._dir_mtimes) if overflow else more
+                else:
+                    self._stop.wait(self.interval)
+                    ticks += 1
+                    if self.full_scan_every and ticks % self.full_scan_every == 0:
+                        dirty = set(self._dir_mtimes)
+                    else:
+                        dirty = self._changed_dirs()
+                if dirty:
+                    self._process(dirty)
+            except Exception:
+                logger.exception('Content watcher failed while scanning %s', self.root)
+
+    def _changed_dirs(self):
+        dirty = set()
+        for directory, mtime in list(self._dir_mtimes.items()):
+            try:
+                if os.stat(directory).st_mtime_ns != mtime:
+                    dirty.add(directory)
+            except FileNotFoundError:
+                dirty.add(os.path.dirname(directory))
+        return dirty
+
+    def _process(self, dirty):
+        with self._lock:
+            added, modified, removed = self._scan(dirty)
+            if not (added or modified or removed):
+                return None
+            self.fingerprint = self._compute_fingerprint()
+            change = ContentChange(added, modified, removed, self.fingerprint)
+            if self.apply is not None:
+                self.apply(self, change)
+        logger.info('Content changed: %r', change)
+        content_changed.send(self, change=change)
+        return change
+
+    # --- Scanning ---
+    def _walk_dirs(self, directory):
+        return {cur_path for cur_path, _, _ in os.walk(directory)}
+
+    def _scan(self, dirty):
+        """Compare the files directly inside ``dirty`` directories against the index."""
+        added, modified, removed = [], [], []
+        pending = set(dirty)
+        seen = set()
+        while pending:
+            directory = pending.pop()
+            if directory in seen or not (directory == self.root or directory.startswith(self.root + os.sep)):
+                continue
+            seen.add(directory)
+            current = {}
+            try:
+                self._dir_mtimes[directory] = os.stat(directory).st_mtime_ns
+                with os.scandir(directory) as entries:
+                    for entry in entries:
+                        if entry.is_dir(follow_symlinks=False):
+                            if entry.path not in self._dir_mtimes:
+                                pending.add(entry.path)
+                        elif entry.name.endswith(self.extensions):
+                            stat = entry.stat()
+                            current[entry.path] = (stat.st_mtime_ns, stat.st_size)
+            except FileNotFoundError:
+                # The directory itself (and everything below it) went away
+                self._dir_mtimes.pop(directory, None)
+                for gone in [d for d in self._dir_mtimes if d.startswith(directory + os.sep)]:
+                    del self._dir_mtimes[gone]
+                    seen.add(gone)
+                prefix = directory + os.sep
+                for filename in [f for f in self._files if f.startswith(prefix)]:
+                    del self._files[filename]
+                    removed.append(filename)
+                continue
+
+            for filename, signature in current.items():
+                previous = self._files.get(filename)
+                if previous is None:
+                    added.append(filename)
+                elif previous != signature:
+                    modified.append(filename)
+                self._files[filename] = signature
+            for filename in [f for f in self._files if os.path.dirname(f) == directory and f not in current]:
+                del self._files[filename]
+                removed.append(filename)
+            # Subdirectories that disappeared since the last scan
+            for child in [d for d in self._dir_mtimes if os.path.dirname(d) == directory and not os.path.isdir(d)]:
+                pending.add(child)
+        return added, modified, removed
+
+    def _compute_fingerprint(self):
+        digest = hashlib.sha1()
+        for filename in sorted(self._files):
+            mtime, size = self._files[filename]
+            digest.update(('%s\0%d\0%d\n' % (os.path.relpath(filename, self.root), mtime, size)).encode('utf-8', 'surrogateescape'))
+        return digest.hexdigest()
+
+
+# --- 5. FLATPAGES INTEGRATION ---
+def apply_to_flatpages(pages, watcher, change):
+    """Re-parse only the changed files and swap in a new FlatPages page dict."""
+    if '_pages' not in pages.__dict__:
+        # Nothing loaded yet; the first access will read the tree as it is now
+        return
+    current = dict(pages._pages)
+    case_insensitive = pages.config('case_insensitive')
+    for filename in change.removed:
+        pages._file_cache.pop(filename, None)
+        path = watcher.page_path(filename)
+        current.pop(path.lower() if case_insensitive else path, None)
+    for filename in change.added + change.modified:
+        path = watcher.page_path(filename)
+        rel_path = os.path.dirname(os.path.relpath(filename, watcher.root))
+        try:
+            page = pages._load_file(path, filename, rel_path)
+        except FileNotFoundError:
+            # Removed again before we got to it; the next scan reports it
+            continue
+        if page is None:
+            # Unparseable front matter (logged by the page store): drop the page
+            current.pop(path.lower() if case_insensitive else path, None)
+            continue
+        current[path.lower() if case_insensitive else path] = page
+    # A single assignment, so concurrent readers see the old or the new dict
+    pages._pages = current
@@ -1,10 +1,13 @@
 # --- 1. IMPORTS ---
 from getpass import getpass
-from app import app, db, User 
+from app import create_app
+from extensions import db
+from models import User
 
 # --- 2. MAIN SCRIPT LOGIC ---
 def main():
     """Main function to handle the user creation process."""
+    app = create_app()
     with app.app_context():
         print("--- Create a New User ---")
 
@@ -0,0 +1,83 @@
+# --- 1. IMPORTS ---
+from flask import Blueprint, flash, jsonify, redirect, render_template, request, url_for
+from flask_login import current_user, login_required
+from extensions import db, jobs, uploads
+from models import Post
+from tasks import schedule_upload_gc
+
+# --- 2. BLUEPRINT ---
+# Editing the database-backed posts; every route needs a login
+editor = Blueprint('editor', __name__)
+
+# --- 3. ROUTES: DATABASE-BACKED POST EDITOR (LIKELY OBSOLETE) ---
+# The routes below are for a database-backed post editor. Since the site now uses
+# Markdown files (FlatPages) for all content, this entire section may be obsolete
+# and can likely be removed. It is kept here for now for safety.
+
+@editor.route('/post/new')
+@editor.route('/post/edit/<int:post_id>')
+@login_required
+def post_editor(post_id=None):
+    post = db.session.get(Post, post_id) if post_id else None
+    if post_id and not post:
+        flash("Post not found!", "danger")
+        return redirect(url_for('public.index'))
+    return render_template('post-editor.html', post=post, logado=current_user.is_authenticated)
+
+@editor.route('/post/save', methods=['POST'], defaults={'post_id': None})
+@editor.route('/post/save/<int:post_id>', methods=['POST'])
+@login_required
+def save_post(post_id):
+    post = db.session.get(Post, post_id) if post_id else Post()
+    if post_id and not post: return "Post not found", 404
+    post.status = 'draft' if 'save_draft' in request.form else 'published'
+    post.title = request.form.get('post-title')
+    post.desc = request.form.get('post-desc')
+    post.content = request.form.get('post-content')
+    post.tags = '|'.join([tag.strip() for tag in request.form.get('post-tags', '').splitlines() if tag.strip()]) or 'sem'
+    image = request.files.get('image')
+    if image and image.filename != '':
+        if post.image_path:
+            schedule_upload_gc()
+        post.image_path = uploads.save(image).path
+    post.post_type = request.form.get('post_type')
+    if post.post_type == 'Month-Problem':
+        post.is_solved = 'is_solved' in request.form
+        if post.is_solved:
+            post.solver_name = request.form.get('solver_name')
+            post.solution_content = request.form.get('solution_content')
+        else:
+            post.solver_name = None
+            post.solution_content = None
+    if not post_id: db.session.add(post)
+    db.session.commit()
+    flash('Post saved successfully!', 'success')
+    return redirect(url_for('public.view_post', post_id=post.id))
+
+@editor.route('/delete-post/<int:post_id>', methods=['POST'])
+@login_required
+def delete_post(post_id):
+    post = db.session.get(Post, post_id)
+    if post:
+        image_path = post.image_path
+        db.session.delete(post)
+        db.session.commit()
+        # Content-addressed images may be shared with other posts and users, so the GC decides on those
+        if image_path and not uploads.is_blob(image_path):
+            jobs.enqueue('files.delete', key='delete:' + image_path, path=image_path)
+        schedule_upload_gc()
+        flash('Post deleted successfully.', 'success')
+    return redirect(url_for('public.index'))
+
+@editor.route('/drafts')
+@login_required
+def drafts():
+    draft_posts = Post.query.filter_by(status='draft').order_by(Post.date.desc()).all()
+    return render_template('drafts.html', post_list=draft_posts, len_post_list=len(draft_posts), logado=current_user.is_authenticated)
+
+@editor.route('/upload-image', methods=['POST'])
+@login_required
+def upload_image():
+    file = request.files.get('file')
+    if not file: return jsonify({'error': 'No file uploaded.'}), 400
+    return jsonify({'location': uploads.save(file).url})
@@ -0,0 +1,41 @@
+# --- 1. IMPORTS ---
+from flask_login import LoginManager
+from flask_sqlalchemy import SQLAlchemy
+from admission import Admission
+from assets import Assets
+from catalog import PostCatalog
+from jobs import JobQueue
+from metrics import Metrics
+from page_store import PageStore
+from password_hasher import PasswordHasher
+from profiling import Profiler
+from render_cache import RenderCache
+from response_cache import ResponseCache
+from search import SearchIndex
+from sqlite_profile import SQLiteProfile
+from template_cache import TemplateCache
+from upload_store import UploadStore
+from user_cache import UserCache
+
+# --- 2. EXTENSIONS ---
+# Created unbound so models and blueprints can import them; create_app() in
+# app.py binds them to the application (one application per process).
+# Nothing here reads content, opens the database or loads bcrypt.
+sqlite_profile = SQLiteProfile()
+db = SQLAlchemy()
+password_hasher = PasswordHasher()
+user_cache = UserCache()
+login_manager = LoginManager()
+assets = Assets()
+uploads = UploadStore()
+pages = PageStore()
+render_cache = RenderCache()
+metrics = Metrics()
+profiler = Profiler()
+# The version is the content watcher's fingerprint, set when the content is loaded
+catalog = PostCatalog(pages)
+response_cache = ResponseCache(version=lambda: catalog.version)
+template_cache = TemplateCache(version=lambda: catalog.version)
+admission = Admission()
+jobs = JobQueue()
+search_index = SearchIndex()
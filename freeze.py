@@ -0,0 +1,180 @@
+# --- 1. IMPORTS ---
+import hashlib
+import json
+import multiprocessing
+import os
+import shutil
+import time
+from concurrent.futures import ProcessPoolExecutor
+from urllib.parse import unquote
+import click
+from flask import current_app, url_for
+from flask.cli import with_appcontext
+from catalog import CatalogSnapshot
+from response_cache import templates_fingerprint
+
+# --- 2. CONSTANTS ---
+PUBLIC_ENDPOINTS = ('public.index', 'public.about', 'public.materials', 'public.months_problems', 'public.news',
+                    'public.team', 'public.faq', 'public.contact')
+MANIFEST_NAME = '.freeze-manifest.json'
+# Below this many pages the pool costs more than it saves
+POOL_THRESHOLD = 8
+
+
+# --- 3. HELPERS ---
+def _digest(*parts):
+    digest = hashlib.sha1()
+    for part in parts:
+        digest.update(part.encode('utf-8', 'surrogateescape') if isinstance(part, str) else part)
+        digest.update(b'\0')
+    return digest.hexdigest()
+
+
+def _post_key(page):
+    return _digest(page.path, repr(sorted(page.meta.items())), page.body)
+
+
+def _listing_key(posts):
+    # Listings are frozen unpaginated; the tag retires pages frozen when they were not
+    return _digest('unpaginated', *('%s\0%r' % (p.path, sorted(p.meta.items())) for p in posts))
+
+
+def output_path(url):
+    """File a URL is written to: '/' -> index.html, '/about' -> about.html."""
+    path = unquote(url).strip('/')
+    return 'index.html' if not path else path + '.html'
+
+
+def collect_pages(pages):
+    """Map every frozen URL to the hash of the inputs its HTML depends on."""
+    snapshot = CatalogSnapshot(None, pages)
+    templates = templates_fingerprint(current_app)
+    dependencies = {
+        'public.index': _listing_key(snapshot.news + ((snapshot.open_problem,) if snapshot.open_problem else ())),
+        'public.news': _listing_key(snapshot.awards + snapshot.other_news),
+        'public.months_problems': _listing_key(snapshot.problems),
+    }
+    targets = {}
+    for endpoint in PUBLIC_ENDPOINTS:
+        targets[url_for(endpoint)] = _digest(templates, dependencies.get(endpoint, ''))
+    for path, page in snapshot.by_path.items():
+        targets[url_for('public.view_post', path=path)] = _digest(templates, _post_key(page))
+    return targets
+
+
+def copy_static(source, destination):
+    """Copy static assets, skipping files whose size and mtime already match."""
+    copied = 0
+    for cur_path, _, filenames in os.walk(source):
+        target_dir = os.path.join(destination, os.path.relpath(cur_path, source))
+        os.makedirs(target_dir, exist_ok=True)
+        for name in filenames:
+            src, dst = os.path.join(cur_path, name), os.path.join(target_dir, name)
+            src_stat = os.stat(src)
+            try:
+                dst_stat = os.stat(dst)
+                if dst_stat.st_size == src_stat.st_size and int(dst_stat.st_mtime) == int(src_stat.st_mtime):
+                    continue
+            except FileNotFoundError:
+                pass
+            shutil.copy2(src, dst)
+            copied += 1
+    return copied
+
+
+# --- 4. RENDERING (runs in pool workers) ---
+_worker_app = None
+
+
+def _init_worker(app):
+    global _worker_app
+    _worker_app = app
+    # Forked from the CLI process after load_content(): never reuse its pooled database connections
+    with app.app_context():
+        app.extensions['sqlalchemy'].engine.dispose(close=False)
+
+
+def render_urls(urls, output, app=None):
+    """Render ``urls`` as an anonymous visitor and write them under ``output``."""
+    app = app or _worker_app
+    failures = []
+    client = app.test_client()
+    for url in urls:
+        response = client.get(url)
+        if response.status_code != 200:
+            failures.append((url, response.status_code))
+            continue
+        filename = os.path.join(output, output_path(url))
+        os.makedirs(os.path.dirname(filename), exist_ok=True)
+        tmp = filename + '.tmp'
+        with open(tmp, 'wb') as handler:
+            handler.write(response.get_data())
+        os.replace(tmp, filename)
+    return failures
+
+
+# --- 5. CLI COMMAND ---
+@click.command('freeze')
+@click.argument('output', default='build', type=click.Path(file_okay=False))
+@click.option('--jobs', '-j', default=os.cpu_count() or 1, show_default=True, help='Worker processes used to render pages.')
+@click.option('--force', is_flag=True, help='Rewrite every page, ignoring the previous manifest.')
+@with_appcontext
+def freeze_command(output, jobs, force):
+    """Export the public site as static HTML for nginx or a CDN.
+
+    Only pages whose inputs changed since the last run are rewritten. Listings
+    are exported unpaginated. Serve the result with e.g.
+    ``try_files $uri $uri.html $uri/index.html =404;``.
+    """
+    started = time.perf_counter()
+    app = current_app._get_current_object()
+    pages = app.extensions['flatpages'][None]
+    os.makedirs(output, exist_ok=True)
+    manifest_path = os.path.join(output, MANIFEST_NAME)
+    manifest = {}
+    if not force and os.path.exists(manifest_path):
+        with open(manifest_path) as handler:
+            manifest = json.load(handler)
+
+    # A static site cannot follow 'load more' cursors nor call /api/posts: list
+    # every post on one page, and keep these pages out of the live response cache
+    app.config['LISTING_PAGE_SIZE'] = len(list(pages)) + 1
+    app.extensions['response_cache'].backend = None
+    # Loaded once here, so forked renderers inherit it warm; nothing to watch or search
+    from app import load_content
+    load_content(app, watch=False, search=False)
+
+    with app.test_request_context():
+        targets = collect_pages(pages)
+    todo = [url for url, key in targets.items() if manifest.get(url) != key or not os.path.exists(os.path.join(output, output_path(url)))]
+    removed = [url for url in manifest if url not in targets]
+
+    failures = []
+    if len(todo) < POOL_THRESHOLD or jobs <= 1:
+        failures = render_urls(todo, output, app)
+    else:
+        chunks = [todo[i::jobs] for i in range(jobs)]
+        context = multiprocessing.get_context('fork')
+        with ProcessPoolExecutor(jobs, mp_context=context, initializer=_init_worker, initargs=(app,)) as pool:
+            for chunk_failures in pool.map(render_urls, chunks, [output] * len(chunks)):
+                failures.extend(chunk_failures)
+
+    for url in removed:
+        try:
+            os.remove(os.path.join(output, output_path(url)))
+        except FileNotFoundError:
+            pass
+
+    failed = {url for url, _ in failures}
+    new_manifest = {url: key for url, key in targets.items() if url not in failed}
+    with open(manifest_path + '.tmp', 'w') as handler:
+        json.dump(new_manifest, handler, indent=1, sort_keys=True)
+    os.replace(manifest_path + '.tmp', manifest_path)
+
+    copied = copy_static(app.static_folder, os.path.join(output, app.static_url_path.strip('/')))
+    click.echo('Frozen %d of %d pages (%d removed, %d static files copied) in %.2fs'
+               % (len(todo) - len(failures), len(targets), len(removed), copied, time.perf_counter() - started))
+    for url, status in failures:
+        click.echo('  %s -> HTTP %d' % (url, status), err=True)
+    if failures:
+        raise click.exceptions.Exit(1)
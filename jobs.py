@@ -0,0 +1,298 @@
+# --- 1. IMPORTS ---
+import json
+import logging
+import os
+import sqlite3
+import threading
+import time
+import traceback
+from flask import abort, jsonify, request
+from flask_login import login_required
+from metrics import Counter, Histogram
+
+logger = logging.getLogger(__name__)
+
+# --- 2. CONSTANTS ---
+STATES = ('queued', 'running', 'done', 'failed')
+JOB_FIELDS = ('id', 'name', 'key', 'args', 'state', 'attempts', 'run_at', 'created', 'started', 'finished', 'error')
+SCHEMA = '''
+CREATE TABLE IF NOT EXISTS jobs (
+    id INTEGER PRIMARY KEY,
+    name TEXT NOT NULL,
+    key TEXT,
+    args TEXT NOT NULL,
+    state TEXT NOT NULL DEFAULT 'queued',
+    attempts INTEGER NOT NULL DEFAULT 0,
+    run_at REAL NOT NULL,
+    created REAL NOT NULL,
+    started REAL,
+    finished REAL,
+    locked_until REAL,
+    error TEXT
+);
+CREATE INDEX IF NOT EXISTS ix_jobs_state_run_at ON jobs (state, run_at);
+-- One waiting job per key: enqueueing the same key again is a no-op
+CREATE UNIQUE INDEX IF NOT EXISTS ux_jobs_queued_key ON jobs (key) WHERE state = 'queued';
+CREATE INDEX IF NOT EXISTS ix_jobs_running_key ON jobs (key) WHERE state = 'running';
+'''
+# Oldest runnable job whose key has no live running job
+CLAIM = '''
+UPDATE jobs SET state = 'running', attempts = attempts + 1, started = :now, locked_until = :lease
+WHERE id = (
+    SELECT id FROM jobs AS waiting
+    WHERE state = 'queued' AND run_at <= :now AND (key IS NULL OR NOT EXISTS (
+        SELECT 1 FROM jobs AS running WHERE running.key = waiting.key AND running.state = 'running'))
+    ORDER BY run_at, id LIMIT 1)
+RETURNING id, name, key, args, attempts, run_at, created
+'''
+
+
+def _job(row):
+    job = dict(zip(JOB_FIELDS, row))
+    job['args'] = json.loads(job['args'])
+    return job
+
+
+# --- 3. JOB QUEUE ---
+class JobQueue:
+    """Durable background jobs: a SQLite table next to the database, run by worker threads.
+
+    Requests call ``enqueue`` and return; a job is a row until some worker
+    (in this process or another one sharing the file) claims it. A key
+    deduplicates jobs (only one per key waits at a time) and serializes
+    them (a job waits while another with its key runs). A failed job is
+    retried with exponential backoff up to JOBS_MAX_ATTEMPTS times. A job
+    whose process died holds a lease that expires after JOBS_TIMEOUT, then
+    it is run again, so nothing queued is lost across restarts.
+
+    Workers run in the processes 'flask serve' serves requests from (see
+    ``start``); CLI commands and the test client only enqueue. Tasks are plain
+    functions registered with ``@jobs.task('name')``; they run inside an
+    app context with the JSON arguments given to ``enqueue``.
+
+    Configuration:
+        JOBS_PATH           SQLite file (defaults to the instance folder)
+        JOBS_WORKERS        worker threads per process (0 to only enqueue)
+        JOBS_MAX_ATTEMPTS   runs before a job is marked failed
+        JOBS_RETRY_DELAY    seconds before the first retry (doubled each time)
+        JOBS_TIMEOUT        seconds a running job may take before it counts as lost
+        JOBS_POLL_INTERVAL  seconds idle workers wait before looking again
+        JOBS_KEEP_FINISHED  seconds done and failed jobs stay visible
+    """
+
+    def __init__(self, app=None, metrics=None):
+        self.tasks = {}
+        self.path = None
+        self._local = threading.local()
+        self._wakeup = threading.Event()
+        self._threads = []
+        self._start_lock = threading.Lock()
+        self._stopping = threading.Event()
+        self._purged = 0.0
+        os.register_at_fork(after_in_child=self._after_fork)
+        self.runs = Counter('nemo_jobs_total', 'Job runs by task and outcome.', ('name', 'outcome'))
+        self.wait = Histogram('nemo_job_wait_seconds', 'Time from a job being due to a worker starting it.', ('name',))
+        self.duration = Histogram('nemo_job_duration_seconds', 'Time a job run took.', ('name',))
+        if app is not None:
+            self.init_app(app, metrics)
+
+    def _after_fork(self):
+        # Worker threads and SQLite connections do not survive fork; see start()
+        self._local = threading.local()
+        self._wakeup = threading.Event()
+        self._threads = []
+        self._start_lock = threading.Lock()
+        self._stopping = threading.Event()
+
+    def init_app(self, app, metrics=None):
+        app.config.setdefault('JOBS_PATH', os.path.join(app.instance_path, 'jobs.db'))
+        app.config.setdefault('JOBS_WORKERS', 2)
+        app.config.setdefault('JOBS_MAX_ATTEMPTS', 5)
+        app.config.setdefault('JOBS_RETRY_DELAY', 10.0)
+        app.config.setdefault('JOBS_TIMEOUT', 600.0)
+        app.config.setdefault('JOBS_POLL_INTERVAL', 2.0)
+        app.config.setdefault('JOBS_KEEP_FINISHED', 7 * 24 * 3600)
+        self.app = app
+        self.path = app.config['JOBS_PATH']
+        os.makedirs(os.path.dirname(os.path.abspath(self.path)), exist_ok=True)
+        self._connect().executescript(SCHEMA)
+        app.add_url_rule('/admin/jobs', 'jobs', login_required(self.jobs_view), methods=['GET', 'POST'])
+        if metrics is not None:
+            metrics.register(self.runs)
+            metrics.register(self.wait)
+            metrics.register(self.duration)
+            metrics.callback('nemo_jobs', 'Jobs in the queue table by state.', self.counts, labelname='state')
+        app.extensions['jobs'] = self
+
+    def _connect(self):
+        conn = getattr(self._local, 'conn', None)
+        if conn is None:
+            conn = sqlite3.connect(self.path, timeout=10, isolation_level=None)
+            conn.execute('PRAGMA journal_mode=WAL')
+            conn.execute('PRAGMA synchronous=NORMAL')
+            self._local.conn = conn
+        return conn
+
+    # --- Producing ---
+    def task(self, name):
+        """Decorator registering a function as the task ``name``."""
+        def register(function):
+            self.tasks[name] = function
+            return function
+        return register
+
+    def enqueue(self, name, key=None, delay=0.0, **args):
+        """Queue ``name(**args)`` to run after ``delay`` seconds; returns the job id.
+
+        With a ``key``, a job already waiting under that key is kept instead
+        (its id is returned) and the new one is dropped.
+        """
+        if name not in self.tasks:
+            raise KeyError('Unknown task: %r' % name)
+        now = time.time()
+        conn = self._connect()
+        try:
+            job_id = conn.execute('INSERT INTO jobs (name, key, args, run_at, created) VALUES (?, ?, ?, ?, ?)',
+                                  (name, key, json.dumps(args), now + delay, now)).lastrowid
+        except sqlite3.IntegrityError:
+            row = conn.execute("SELECT id FROM jobs WHERE key = ? AND state = 'queued'", (key,)).fetchone()
+            # The waiting job was claimed in between: try once more
+            return row[0] if row else self.enqueue(name, key, delay, **args)
+        if not delay:
+            self._wakeup.set()
+        return job_id
+
+    # --- Consuming ---
+    def start(self):
+        """Start JOBS_WORKERS threads in this process unless they are running.
+
+        Called through serve.worker_started, in each process that serves
+        requests; never in the pre-fork master nor in other CLI commands.
+        """
+        if self._threads or not self.app.config['JOBS_WORKERS']:
+            return
+        with self._start_lock:
+            if self._threads:
+                return
+            stopping = self._stopping = threading.Event()
+            threads = [threading.Thread(target=self._work, args=(stopping,), name='jobs-%d' % number, daemon=True)
+                       for number in range(self.app.config['JOBS_WORKERS'])]
+            for thread in threads:
+                thread.start()
+            self._threads = threads
+
+    def stop(self, timeout=None):
+        """Let the workers finish their current job and exit."""
+        self._stopping.set()
+        self._wakeup.set()
+        for thread in self._threads:
+            thread.join(timeout)
+        self._threads = []
+
+    def _work(self, stopping):
+        while not stopping.is_set():
+            try:
+                job = self.claim()
+            except sqlite3.OperationalError:
+                logger.warning('Could not claim a job (database busy)')
+                job = None
+            if job is None:
+                self._wakeup.wait(self.app.config['JOBS_POLL_INTERVAL'])
+                self._wakeup.clear()
+                continue
+            self.run(job)
+
+    def claim(self):
+        """Mark the next runnable job as running and return it (None if there is none)."""
+        now = time.time()
+        conn = self._connect()
+        conn.execute('BEGIN IMMEDIATE')
+        try:
+            self._recover(conn, now)
+            row = conn.execute(CLAIM, {'now': now, 'lease': now + self.app.config['JOBS_TIMEOUT']}).fetchone()
+            conn.execute('COMMIT')
+        except Exception:
+            conn.execute('ROLLBACK')
+            raise
+        if row is None:
+            return None
+        return dict(zip(('id', 'name', 'key', 'args', 'attempts', 'run_at', 'created'), row), args=json.loads(row[3]))
+
+    def _recover(self, conn, now):
+        # Jobs whose worker died (crash, SIGKILL, deploy) go back in the queue
+        for job_id, key in conn.execute("SELECT id, key FROM jobs WHERE state = 'running' AND locked_until < ?", (now,)).fetchall():
+            self._retry_or_fail(conn, job_id, key, 'lease expired (worker lost)', now)
+        if now - self._purged > 60:
+            self._purged = now
+            conn.execute("DELETE FROM jobs WHERE state IN ('done', 'failed') AND finished < ?",
+                         (now - self.app.config['JOBS_KEEP_FINISHED'],))
+
+    def run(self, job):
+        started = time.time()
+        self.wait.observe(max(0.0, started - max(job['run_at'], job['created'])), job['name'])
+        function = self.tasks.get(job['name'])
+        try:
+            if function is None:
+                raise KeyError('Unknown task: %r' % job['name'])
+            with self.app.app_context():
+                function(**job['args'])
+        except Exception:
+            logger.exception('Job %d (%s) failed on attempt %d', job['id'], job['name'], job['attempts'])
+            self.runs.inc(job['name'], 'error')
+            conn = self._connect()
+            conn.execute('BEGIN IMMEDIATE')
+            try:
+                self._retry_or_fail(conn, job['id'], job['key'], traceback.format_exc(limit=5), time.time())
+                conn.execute('COMMIT')
+            except Exception:
+                conn.execute('ROLLBACK')
+                raise
+        else:
+            self.runs.inc(job['name'], 'done')
+            self._connect().execute("UPDATE jobs SET state = 'done', finished = ?, locked_until = NULL, error = NULL WHERE id = ?",
+                                    (time.time(), job['id']))
+        finally:
+            self.duration.observe(time.time() - started, job['name'])
+
+    def _retry_or_fail(self, conn, job_id, key, error, now):
+        attempts = conn.execute('SELECT attempts FROM jobs WHERE id = ?', (job_id,)).fetchone()[0]
+        if attempts >= self.app.config['JOBS_MAX_ATTEMPTS']:
+            conn.execute("UPDATE jobs SET state = 'failed', finished = ?, locked_until = NULL, error = ? WHERE id = ?",
+                         (now, error, job_id))
+            return
+        if key is not None and conn.execute("SELECT 1 FROM jobs WHERE key = ? AND state = 'queued'", (key,)).fetchone():
+            # A newer job with the same key is already waiting and will do the work
+            conn.execute("UPDATE jobs SET state = 'done', finished = ?, locked_until = NULL, error = ? WHERE id = ?",
+                         (now, 'superseded after: ' + error, job_id))
+            return
+        delay = self.app.config['JOBS_RETRY_DELAY'] * 2 ** (attempts - 1)
+        conn.execute("UPDATE jobs SET state = 'queued', run_at = ?, locked_until = NULL, error = ? WHERE id = ?",
+                     (now + delay, error, job_id))
+
+    # --- Inspection ---
+    def counts(self):
+        counts = dict.fromkeys(STATES, 0)
+        counts.update(self._connect().execute('SELECT state, count(*) FROM jobs GROUP BY state'))
+        return counts
+
+    def jobs_view(self):
+        """Queue depth per state and the latest jobs; POST retry=<id> or cancel=<id>."""
+        conn = self._connect()
+        if request.method == 'POST':
+            values = request.get_json(silent=True) or request.form
+            try:
+                if values.get('retry'):
+                    conn.execute("UPDATE jobs SET state = 'queued', run_at = ?, attempts = 0, finished = NULL WHERE id = ? AND state = 'failed'",
+                                 (time.time(), int(values['retry'])))
+                    self._wakeup.set()
+                if values.get('cancel'):
+                    conn.execute("DELETE FROM jobs WHERE id = ? AND state = 'queued'", (int(values['cancel']),))
+            except (ValueError, sqlite3.IntegrityError):
+                abort(400)
+        state = request.args.get('state')
+        limit = min(request.args.get('limit', 50, type=int), 500)
+        where, params = ('WHERE state = ?', (state, limit)) if state in STATES else ('', (limit,))
+        rows = conn.execute('SELECT %s FROM jobs %s ORDER BY id DESC LIMIT ?' % (', '.join(JOB_FIELDS), where), params).fetchall()
+        oldest = conn.execute("SELECT min(run_at) FROM jobs WHERE state = 'queued' AND run_at <= ?", (time.time(),)).fetchone()[0]
+        return jsonify(counts=self.counts(), oldest_due_seconds=round(time.time() - oldest, 3) if oldest else None,
+                       workers=len(self._threads), tasks=sorted(self.tasks), jobs=[_job(row) for row in rows])
@@ -0,0 +1,283 @@
+# --- 1. IMPORTS ---
+import math
+import threading
+import time
+from bisect import bisect_left
+from contextvars import ContextVar
+from flask import Response, abort, before_render_template, request, template_rendered
+from sqlalchemy import event
+
+# --- 2. CONSTANTS ---
+LATENCY_BUCKETS = (0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+COUNT_BUCKETS = (0, 1, 2, 5, 10, 20, 50, 100)
+# Per-request breakdown, in the order of RequestTimings' fields
+COMPONENTS = ('sql', 'template', 'markdown', 'flatpages')
+
+
+# --- 3. METRIC TYPES ---
+def _format_labels(names, values, extra=''):
+    pairs = ['%s="%s"' % (name, str(value).replace('\\', r'\\').replace('"', r'\"').replace('\n', r'\n'))
+             for name, value in zip(names, values)]
+    if extra:
+        pairs.append(extra)
+    return '{%s}' % ','.join(pairs) if pairs else ''
+
+
+def _format_value(value):
+    if value == math.inf:
+        return '+Inf'
+    return repr(float(value)) if isinstance(value, float) else str(value)
+
+
+class Counter:
+    kind = 'counter'
+
+    def __init__(self, name, documentation, labelnames=()):
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = tuple(labelnames)
+        self._values = {}
+        self._lock = threading.Lock()
+
+    def inc(self, *labels, amount=1):
+        with self._lock:
+            self._values[labels] = self._values.get(labels, 0) + amount
+
+    def samples(self):
+        with self._lock:
+            items = list(self._values.items())
+        for labels, value in items:
+            yield self.name, _format_labels(self.labelnames, labels), value
+
+
+class Histogram:
+    kind = 'histogram'
+
+    def __init__(self, name, documentation, labelnames=(), buckets=LATENCY_BUCKETS):
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = tuple(labelnames)
+        self.buckets = tuple(buckets)
+        self._values = {}
+        self._lock = threading.Lock()
+
+    def observe(self, value, *labels):
+        index = bisect_left(self.buckets, value)
+        with self._lock:
+            series = self._values.get(labels)
+            if series is None:
+                # per-bucket counts (+Inf last), sum
+                series = self._values[labels] = [[0] * (len(self.buckets) + 1), 0.0]
+            series[0][index] += 1
+            series[1] += value
+
+    def samples(self):
+        with self._lock:
+            items = [(labels, list(counts), total) for labels, (counts, total) in self._values.items()]
+        for labels, counts, total in items:
+            cumulative = 0
+            for bound, count in zip(self.buckets + (math.inf,), counts):
+                cumulative += count
+                yield self.name + '_bucket', _format_labels(self.labelnames, labels, 'le="%s"' % _format_value(bound)), cumulative
+            yield self.name + '_sum', _format_labels(self.labelnames, labels), total
+            yield self.name + '_count', _format_labels(self.labelnames, labels), cumulative
+
+
+class Callback:
+    """Values read at scrape time from ``function``: a number or {label value: number}."""
+
+    def __init__(self, name, documentation, function, kind='gauge', labelname=None):
+        self.name = name
+        self.documentation = documentation
+        self.function = function
+        self.kind = kind
+        self.labelname = labelname
+
+    def samples(self):
+        value = self.function()
+        if isinstance(value, dict):
+            for label, number in sorted(value.items()):
+                yield self.name, _format_labels((self.labelname,), (label,)), number
+        else:
+            yield self.name, '', value
+
+
+# --- 4. PER-REQUEST STATE ---
+class RequestTimings:
+    __slots__ = ('started', 'sql', 'queries', 'template', 'markdown', 'flatpages', 'template_depth', 'template_started')
+
+    def __init__(self):
+        self.started = time.perf_counter()
+        self.sql = self.template = self.markdown = self.flatpages = 0.0
+        self.queries = self.template_depth = 0
+        self.template_started = 0.0
+
+
+_current = ContextVar('request_timings', default=None)
+
+
+# --- 5. FLASK INTEGRATION ---
+class Metrics:
+    """Low-overhead request instrumentation exported in Prometheus text format.
+
+    Every request records its wall time per endpoint plus how much of it went
+    to SQL (cursor events), Jinja (render signals), Markdown and FlatPages
+    file parsing. Bookkeeping is a few perf_counter calls and one short lock
+    per histogram, so it can stay on in production. Values are per process:
+    with 'flask serve --workers N' every worker keeps its own.
+
+    Configuration:
+        METRICS_SERVER_TIMING  add a Server-Timing header with the breakdown
+        METRICS_TOKEN          if set, /metrics requires "Authorization: Bearer <token>"
+    """
+
+    def __init__(self, app=None, db=None, pages=None):
+        self.registry = []
+        self.requests = self.register(Counter('nemo_http_requests_total', 'HTTP requests handled.', ('endpoint', 'method', 'status')))
+        self.latency = self.register(Histogram('nemo_http_request_duration_seconds', 'Wall time per request.', ('endpoint', 'method')))
+        self.components = {name: self.register(Histogram('nemo_http_request_%s_seconds' % name, 'Time per request spent in %s.' % name, ('endpoint',)))
+                           for name in COMPONENTS}
+        self.queries = self.register(Histogram('nemo_http_request_sql_queries', 'SQL statements per request.', ('endpoint',), COUNT_BUCKETS))
+        self.markdown = self.register(Histogram('nemo_markdown_render_seconds', 'Markdown-to-HTML calls, cache lookups included (any thread).'))
+        self.flatpages = self.register(Histogram('nemo_flatpages_load_seconds', 'Reading and parsing one FlatPages file (any thread).'))
+        if app is not None:
+            self.init_app(app, db, pages)
+
+    def register(self, metric):
+        self.registry.append(metric)
+        return metric
+
+    def callback(self, name, documentation, function, kind='gauge', labelname=None):
+        return self.register(Callback(name, documentation, function, kind, labelname))
+
+    def init_app(self, app, db=None, pages=None):
+        app.config.setdefault('METRICS_SERVER_TIMING', False)
+        app.config.setdefault('METRICS_TOKEN', None)
+        self.app = app
+        app.before_request(self._before_request)
+        app.after_request(self._after_request)
+        app.teardown_request(self._teardown_request)
+        before_render_template.connect(self._before_template, app)
+        template_rendered.connect(self._after_template, app)
+        app.add_url_rule('/metrics', 'metrics', self.export)
+        if db is not None:
+            with app.app_context():
+                event.listen(db.engine, 'before_cursor_execute', self._before_cursor)
+                event.listen(db.engine, 'after_cursor_execute', self._after_cursor)
+        self._wrap_renderer(app)
+        if pages is not None:
+            self._wrap_loader(pages)
+        app.extensions['metrics'] = self
+
+    # --- Instrumentation hooks ---
+    def _wrap_renderer(self, app):
+        renderer = app.config.get('FLATPAGES_HTML_RENDERER')
+        if renderer is None:
+            return
+
+        # Keep the (body, flatpages) signature, FlatPages counts the arguments
+        def html_renderer(body, flatpages):
+            started = time.perf_counter()
+            try:
+                return renderer(body, flatpages)
+            finally:
+                self._add('markdown', self.markdown, time.perf_counter() - started)
+        app.config['FLATPAGES_HTML_RENDERER'] = html_renderer
+
+    def _wrap_loader(self, pages):
+        load_file = pages._load_file
+
+        def timed_load_file(path, filename, rel_path):
+            started = time.perf_counter()
+            try:
+                return load_file(path, filename, rel_path)
+            finally:
+                self._add('flatpages', self.flatpages, time.perf_counter() - started)
+        pages._load_file = timed_load_file
+
+        # PageStore reads bodies separately, on a body cache miss
+        load_content = getattr(pages, 'load_content', None)
+        if load_content is None:
+            return
+
+        def timed_load_content(page):
+            started = time.perf_counter()
+            try:
+                return load_content(page)
+            finally:
+                self._add('flatpages', self.flatpages, time.perf_counter() - started)
+        pages.load_content = timed_load_content
+
+    def _add(self, component, histogram, elapsed):
+        histogram.observe(elapsed)
+        timings = _current.get()
+        if timings is not None:
+            setattr(timings, component, getattr(timings, component) + elapsed)
+
+    def _before_cursor(self, conn, cursor, statement, parameters, context, executemany):
+        conn.info.setdefault('metrics_started', []).append(time.perf_counter())
+
+    def _after_cursor(self, conn, cursor, statement, parameters, context, executemany):
+        stack = conn.info.get('metrics_started')
+        started = stack.pop() if stack else None
+        timings = _current.get()
+        if started is not None and timings is not None:
+            timings.sql += time.perf_counter() - started
+            timings.queries += 1
+
+    def _before_template(self, sender, template, context, **extra):
+        timings = _current.get()
+        if timings is not None:
+            if timings.template_depth == 0:
+                timings.template_started = time.perf_counter()
+            timings.template_depth += 1
+
+    def _after_template(self, sender, template, context, **extra):
+        timings = _current.get()
+        if timings is not None and timings.template_depth:
+            timings.template_depth -= 1
+            if timings.template_depth == 0:
+                timings.template += time.perf_counter() - timings.template_started
+
+    def _before_request(self):
+        _current.set(RequestTimings())
+
+    def _after_request(self, response):
+        timings = _current.get()
+        if timings is None:
+            return response
+        elapsed = time.perf_counter() - timings.started
+        endpoint = request.endpoint or 'unmatched'
+        self.requests.inc(endpoint, request.method, response.status_code)
+        self.latency.observe(elapsed, endpoint, request.method)
+        for name in COMPONENTS:
+            self.components[name].observe(getattr(timings, name), endpoint)
+        self.queries.observe(timings.queries, endpoint)
+        if self.app.config['METRICS_SERVER_TIMING']:
+            response.headers['Server-Timing'] = ', '.join([
+                'app;dur=%.1f' % (elapsed * 1000),
+                'sql;dur=%.1f;desc="%d queries"' % (timings.sql * 1000, timings.queries),
+                'tpl;dur=%.1f' % (timings.template * 1000),
+                'md;dur=%.1f' % (timings.markdown * 1000),
+                'pages;dur=%.1f' % (timings.flatpages * 1000),
+            ])
+        return response
+
+    def _teardown_request(self, exc):
+        _current.set(None)
+
+    # --- Export ---
+    def render(self):
+        lines = []
+        for metric in self.registry:
+            lines.append('# HELP %s %s' % (metric.name, metric.documentation))
+            lines.append('# TYPE %s %s' % (metric.name, metric.kind))
+            for name, labels, value in metric.samples():
+                lines.append('%s%s %s' % (name, labels, _format_value(value)))
+        return '\n'.join(lines) + '\n'
+
+    def export(self):
+        token = self.app.config['METRICS_TOKEN']
+        if token and request.headers.get('Authorization') != 'Bearer %s' % token:
+            abort(401)
+        return Response(self.render(), content_type='text/plain; version=0.0.4; charset=utf-8')
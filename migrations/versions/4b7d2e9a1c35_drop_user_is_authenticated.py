@@ -0,0 +1,27 @@
+"""Drop user.is_authenticated; login state lives in the session
+
+Revision ID: 4b7d2e9a1c35
+Revises: cfb204091c73
+Create Date: 2026-10-17 09:12:40.118204
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '4b7d2e9a1c35'
+down_revision = 'cfb204091c73'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    # SQLite cannot drop columns in place on every version, so use batch mode
+    with op.batch_alter_table('user', schema=None) as batch_op:
+        batch_op.drop_column('is_authenticated')
+
+
+def downgrade():
+    with op.batch_alter_table('user', schema=None) as batch_op:
+        batch_op.add_column(sa.Column('is_authenticated', sa.Boolean(), nullable=True))
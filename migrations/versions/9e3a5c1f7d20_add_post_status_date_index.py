@@ -0,0 +1,25 @@
+"""Add an index on post(status, date) for the drafts listing
+
+Revision ID: 9e3a5c1f7d20
+Revises: 4b7d2e9a1c35
+Create Date: 2026-10-17 10:41:05.532917
+
+"""
+from alembic import op
+
+
+# revision identifiers, used by Alembic.
+revision = '9e3a5c1f7d20'
+down_revision = '4b7d2e9a1c35'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    # drafts() filters on status and orders by date. user.email needs no index
+    # of its own: its UNIQUE constraint is already backed by one.
+    op.create_index('ix_post_status_date', 'post', ['status', 'date'], unique=False)
+
+
+def downgrade():
+    op.drop_index('ix_post_status_date', table_name='post')
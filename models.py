@@ -0,0 +1,42 @@
+# --- 1. IMPORTS ---
+import uuid
+from datetime import datetime
+from flask_login import UserMixin
+from extensions import db, password_hasher
+
+
+# --- 2. DATABASE MODELS ---
+# NOTE: The 'Post' model is likely obsolete (see editor.py)
+class Post(db.Model):
+    __table_args__ = (db.Index('ix_post_status_date', 'status', 'date'),)
+    id = db.Column(db.Integer, primary_key=True)
+    title = db.Column(db.String(100), nullable=False)
+    tags = db.Column(db.Text, nullable=True)
+    content = db.Column(db.Text, nullable=False)
+    desc = db.Column(db.String(200), nullable=False)
+    date = db.Column(db.DateTime, nullable=False, default=datetime)
+    image_path = db.Column(db.String(255))
+    status = db.Column(db.String(20), nullable=False, default='published')
+    post_type = db.Column(db.String(50), nullable=False, default='News')
+    is_solved = db.Column(db.Boolean, default=False)
+    solver_name = db.Column(db.String(100), nullable=True)
+    solution_content = db.Column(db.Text, nullable=True)
+
+class User(db.Model, UserMixin):
+    __tablename__ = 'user'
+    id = db.Column(db.String(36), primary_key=True, default=lambda: str(uuid.uuid4()))
+    email = db.Column(db.String(128), unique=True, nullable=False)
+    name = db.Column(db.String(100), nullable=True)
+    password_hash = db.Column(db.String(128))
+    about_me = db.Column(db.Text, nullable=True)
+    profile_image_path = db.Column(db.String(255), nullable=True, default='static/uploads/default_avatar.png')
+
+    def __init__(self, email:str, password:str, name:str):
+        self.email = email
+        # Created by scripts and the CLI only, so hash right here instead of on the pool
+        self.password_hash = password_hasher.generate(password, inline=True)
+        self.name = name
+
+    # Login state lives in the session (UserMixin.is_authenticated), not in the table
+    def check_password(self, password):
+        return password_hasher.check(self.password_hash, password)
@@ -0,0 +1,306 @@
+# --- 1. IMPORTS ---
+import logging
+import os
+import sys
+import threading
+from collections import OrderedDict
+from collections.abc import Mapping
+from inspect import getfullargspec
+import yaml
+from flask_flatpages import FlatPages
+from werkzeug.utils import cached_property, import_string
+
+# --- 2. CONSTANTS ---
+# Front-matter fields kept in memory for every post: what listings, the
+# catalog and the cards need. Anything else (solution_content, ...) is read
+# back from the file together with the body.
+LISTING_FIELDS = ('title', 'date', 'desc', 'image', 'status', 'post_type', 'category', 'author_email',
+                  'is_solved', 'solver_name', 'solver_image')
+_MISSING = object()
+logger = logging.getLogger(__name__)
+YAML_LOADER = getattr(yaml, 'CSafeLoader', yaml.SafeLoader)
+
+
+def _parse_meta(text, path):
+    meta = {}
+    for doc in yaml.load_all(text, Loader=YAML_LOADER):
+        if doc is not None:
+            if not isinstance(doc, dict):
+                raise ValueError("Expected a dict in metadata for '%s', got %s" % (path, type(doc).__name__))
+            meta.update(doc)
+    return meta
+
+
+def _read_header(handler):
+    """Front matter read line by line up to the '---' that closes it; None without one.
+
+    A '---' opening the file is a document start, not the end of the header.
+    Only column-0 markers count, so an indented '---' inside a block scalar
+    (a Markdown rule in ``solution_content``) does not end it.
+    """
+    lines = []
+    for line in handler:
+        if line.rstrip() == '---':
+            if any(previous.strip() for previous in lines):
+                return ''.join(lines)
+            continue
+        lines.append(line)
+    return None
+
+
+# --- 3. PAGES ---
+class PageMeta(Mapping):
+    """Read-only ``page.meta``: listing fields from memory, the rest from the file on demand."""
+    __slots__ = ('_page',)
+
+    def __init__(self, page):
+        self._page = page
+
+    def __getitem__(self, key):
+        if key in LISTING_FIELDS:
+            value = getattr(self._page, key)
+            if value is _MISSING:
+                raise KeyError(key)
+            return value
+        return self._page.extra_meta[key]
+
+    def __iter__(self):
+        page = self._page
+        for key in LISTING_FIELDS:
+            if getattr(page, key) is not _MISSING:
+                yield key
+        yield from page.extra_meta
+
+    def __len__(self):
+        return sum(1 for _ in self)
+
+    def __repr__(self):
+        return '<PageMeta %r>' % self._page.path
+
+
+class LazyPage:
+    """A post whose body and uncommon metadata stay on disk until someone asks.
+
+    Quacks like ``flask_flatpages.Page`` (path, folder, meta, body, html,
+    ``page['title']``); body, extra metadata and rendered HTML come from the
+    store's byte-bounded LRU.
+    """
+    __slots__ = ('path', 'folder', 'filename', 'store') + LISTING_FIELDS
+
+    def __init__(self, store, path, folder, filename, meta):
+        self.store = store
+        self.path = path
+        self.folder = folder
+        self.filename = filename
+        for key in LISTING_FIELDS:
+            setattr(self, key, meta.get(key, _MISSING))
+
+    @property
+    def meta(self):
+        return PageMeta(self)
+
+    @property
+    def extra_meta(self):
+        return self.store.content(self).extra
+
+    @property
+    def body(self):
+        return self.store.content(self).body
+
+    @property
+    def html(self):
+        return self.store.html(self)
+
+    def __getitem__(self, name):
+        return self.meta[name]
+
+    def __html__(self):
+        return self.html
+
+    def __repr__(self):
+        return '<LazyPage %r>' % self.path
+
+
+# --- 4. BODY CACHE ---
+class _Content:
+    __slots__ = ('page', 'body', 'extra', 'html', 'size')
+
+    def __init__(self, page, body, extra):
+        self.page = page
+        self.body = body
+        self.extra = extra
+        self.html = None
+        self.size = sys.getsizeof(body) + sum(sys.getsizeof(value) for value in extra.values())
+
+
+class BodyCache:
+    """LRU of loaded post contents, bounded by their approximate size in bytes."""
+
+    def __init__(self, max_bytes):
+        self.max_bytes = max_bytes
+        self.size = 0
+        self.hits = self.misses = 0
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+        os.register_at_fork(after_in_child=self._after_fork)
+
+    def _after_fork(self):
+        self._lock = threading.Lock()
+
+    def get(self, page):
+        with self._lock:
+            entry = self._entries.get(page.filename)
+            # An entry for an older version of the file belongs to another page object
+            if entry is None or entry.page is not page:
+                self.misses += 1
+                return None
+            self._entries.move_to_end(page.filename)
+            self.hits += 1
+            return entry
+
+    def put(self, entry):
+        with self._lock:
+            previous = self._entries.pop(entry.page.filename, None)
+            if previous is not None:
+                self.size -= previous.size
+            self._entries[entry.page.filename] = entry
+            self.size += entry.size
+            self._evict()
+
+    def set_html(self, entry, html):
+        """Attach rendered HTML to ``entry`` and charge it to the budget."""
+        with self._lock:
+            if entry.html is not None:
+                return
+            entry.html = html
+            added = sys.getsizeof(html)
+            entry.size += added
+            if self._entries.get(entry.page.filename) is entry:
+                self.size += added
+                self._evict()
+
+    def _evict(self):
+        while self.size > self.max_bytes:
+            _, evicted = self._entries.popitem(last=False)
+            self.size -= evicted.size
+
+    def discard(self, filename):
+        with self._lock:
+            entry = self._entries.pop(filename, None)
+            if entry is not None:
+                self.size -= entry.size
+
+    def stats(self):
+        with self._lock:
+            return {'entries': len(self._entries), 'bytes': self.size, 'max_bytes': self.max_bytes,
+                    'hits': self.hits, 'misses': self.misses}
+
+
+# --- 5. FLATPAGES INTEGRATION ---
+class PageStore(FlatPages):
+    """FlatPages that reads only the front matter up front and bodies on demand.
+
+    Startup and content reloads parse each file's YAML header (stopping at the
+    ``---`` line that ends it) into a ``LazyPage`` holding just the listing
+    fields, so memory grows with the number of posts, not with their size.
+    ``view_post``, the search index and the render warm-up get bodies through
+    a byte-bounded LRU, which also keeps the rendered HTML of recent posts.
+    The page dict, ``_load_file`` and ``_file_cache`` work like FlatPages',
+    so the content watcher and the metrics hooks apply unchanged.
+
+    Configuration:
+        FLATPAGES_BODY_CACHE_MAX_BYTES  byte budget for loaded bodies and their HTML
+    """
+
+    default_config = FlatPages.default_config + (('body_cache_max_bytes', 32 * 1024 * 1024),)
+
+    def init_app(self, app):
+        super().init_app(app)
+        self.body_cache = BodyCache(self.config('body_cache_max_bytes'))
+        self._walk_lock = threading.Lock()
+
+    @cached_property
+    def _pages(self):
+        # The render warm-up and the search sync both start by listing the pages:
+        # walk the tree once, not once per thread
+        with self._walk_lock:
+            pages = self.__dict__.get('_pages')
+            if pages is None:
+                pages = {path: page for path, page in FlatPages._pages.fget(self).items() if page is not None}
+            return pages
+
+    def _load_file(self, path, filename, rel_path):
+        """LazyPage for ``filename``, or None (logged) when its front matter cannot be parsed."""
+        mtime = os.path.getmtime(filename)
+        cached = self._file_cache.get(filename)
+        if cached and cached[1] == mtime:
+            return cached[0]
+        try:
+            meta, _ = self._read(filename, path, header_only=True)
+        except (yaml.YAMLError, ValueError) as error:
+            # One broken post must not keep the whole collection from loading
+            logger.warning('Skipping %s: invalid front matter (%s)', filename, error)
+            page = None
+        else:
+            page = LazyPage(self, path, rel_path, filename, meta)
+        self.body_cache.discard(filename)
+        self._file_cache[filename] = (page, mtime)
+        return page
+
+    def _split(self, filename, header_only=False):
+        """(meta text, body) of ``filename``; with ``header_only`` the body is not read."""
+        with open(filename, encoding=self.config('encoding')) as handler:
+            if not self.config('legacy_meta_parser'):
+                header = _read_header(handler)
+                if header is not None:
+                    return header, None if header_only else handler.read().lstrip('\n')
+                handler.seek(0)
+            content = handler.read()
+        # No closing '---' (or the legacy parser): let FlatPages split it the way it always has
+        if self.config('legacy_meta_parser'):
+            return self._legacy_parser(content)
+        return self._libyaml_parser(content)
+
+    def _read(self, filename, path, header_only=False):
+        """(meta, body) of ``filename``; raises what YAML raises if even FlatPages cannot split it."""
+        meta_text, body = self._split(filename, header_only)
+        try:
+            return _parse_meta(meta_text, path), body
+        except (yaml.YAMLError, ValueError):
+            # A header without an opening '---' may end at a blank line, with a '---'
+            # rule in the body: FlatPages' tokenizer finds where such a header ends
+            with open(filename, encoding=self.config('encoding')) as handler:
+                content = handler.read()
+            parse = self._legacy_parser if self.config('legacy_meta_parser') else self._libyaml_parser
+            meta_text, body = parse(content)
+            return _parse_meta(meta_text, path), None if header_only else body
+
+    def load_content(self, page):
+        """Read ``page``'s body and the metadata not kept in memory (no caching)."""
+        meta, body = self._read(page.filename, page.path)
+        return _Content(page, body, {key: value for key, value in meta.items() if key not in LISTING_FIELDS})
+
+    def content(self, page):
+        entry = self.body_cache.get(page)
+        if entry is None:
+            entry = self.load_content(page)
+            self.body_cache.put(entry)
+        return entry
+
+    def html(self, page):
+        entry = self.content(page)
+        if entry.html is None:
+            self.body_cache.set_html(entry, self._render(entry.body, page))
+        return entry.html
+
+    def _render(self, body, page):
+        # Resolved on every render: other extensions wrap FLATPAGES_HTML_RENDERER after us.
+        # Same calling convention as FlatPages: (body), (body, flatpages) or (body, flatpages, page)
+        renderer = self.config('html_renderer')
+        if not callable(renderer):
+            renderer = import_string(renderer)
+        try:
+            args = len(getfullargspec(renderer).args)
+        except TypeError:
+            return renderer(body)
+        return renderer(*(body, self, page)[:max(1, min(args, 3))])
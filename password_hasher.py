@@ -0,0 +1,166 @@
+# --- 1. IMPORTS ---
+import hashlib
+import multiprocessing
+import os
+import threading
+import time
+from concurrent.futures import ProcessPoolExecutor, TimeoutError
+from concurrent.futures.process import BrokenProcessPool
+
+
+class HasherBusy(Exception):
+    """Raised when too many password checks are already queued."""
+
+
+# --- 2. POOL WORKER FUNCTIONS ---
+# Module level so the pool can pickle them; they only need bcrypt, imported on
+# first use so processes that never hash a password do not load it.
+def _prepare(password, handle_long):
+    if isinstance(password, str):
+        password = password.encode('utf-8')
+    if handle_long:
+        # Same pre-hash as Flask-Bcrypt's BCRYPT_HANDLE_LONG_PASSWORDS
+        password = hashlib.sha256(password).hexdigest().encode('utf-8')
+    return password
+
+
+def _check(password_hash, password, handle_long):
+    import bcrypt
+    try:
+        return bcrypt.checkpw(_prepare(password, handle_long), password_hash.encode('utf-8'))
+    except ValueError:
+        return False
+
+
+def _generate(password, rounds, prefix, handle_long):
+    import bcrypt
+    return bcrypt.hashpw(_prepare(password, handle_long), bcrypt.gensalt(rounds, prefix)).decode('utf-8')
+
+
+# --- 3. PASSWORD HASHER ---
+class PasswordHasher:
+    """Runs bcrypt on a small process pool so logins never tie up the GIL.
+
+    At most PASSWORD_HASH_MAX_PENDING operations are queued or running; any
+    further login fails fast with ``HasherBusy`` instead of parking another
+    server thread. Hashes are compatible with Flask-Bcrypt (same rounds,
+    prefix and long-password handling). The pool starts on first use, so
+    CLI commands never spawn it.
+
+    Configuration:
+        PASSWORD_HASH_WORKERS      processes in the pool
+        PASSWORD_HASH_MAX_PENDING  operations allowed in flight at once
+        PASSWORD_HASH_TIMEOUT      seconds to wait for a slot and for the result
+    """
+
+    def __init__(self, app=None):
+        self._pool = None
+        self._slots = None
+        self._pool_lock = threading.Lock()
+        self._stats_lock = threading.Lock()
+        self._reset_stats()
+        os.register_at_fork(after_in_child=self._after_fork)
+        if app is not None:
+            self.init_app(app)
+
+    def _after_fork(self):
+        # The parent's pool and its management threads do not exist in the child
+        self._pool = None
+        self._pool_lock = threading.Lock()
+        self._stats_lock = threading.Lock()
+        if self._slots is not None:
+            self._slots = threading.BoundedSemaphore(self.max_pending)
+        self._reset_stats()
+
+    def _reset_stats(self):
+        self.completed = 0
+        self.rejected = 0
+        self.busy_seconds = 0.0
+        self.max_seconds = 0.0
+
+    def init_app(self, app):
+        app.config.setdefault('PASSWORD_HASH_WORKERS', max(1, (os.cpu_count() or 2) // 2))
+        app.config.setdefault('PASSWORD_HASH_MAX_PENDING', app.config['PASSWORD_HASH_WORKERS'] * 4)
+        app.config.setdefault('PASSWORD_HASH_TIMEOUT', 10.0)
+        self.workers = app.config['PASSWORD_HASH_WORKERS']
+        self.max_pending = app.config['PASSWORD_HASH_MAX_PENDING']
+        self.timeout = app.config['PASSWORD_HASH_TIMEOUT']
+        self.rounds = app.config.get('BCRYPT_LOG_ROUNDS', 12)
+        self.prefix = app.config.get('BCRYPT_HASH_PREFIX', '2b').encode('ascii')
+        self.handle_long = app.config.get('BCRYPT_HANDLE_LONG_PASSWORDS', False)
+        self._slots = threading.BoundedSemaphore(self.max_pending)
+        app.extensions['password_hasher'] = self
+
+    def _get_pool(self):
+        with self._pool_lock:
+            if self._pool is None:
+                # fork: spawn would re-import the app's __main__ in every worker. The
+                # workers only ever run bcrypt, so the inherited state is never used.
+                self._pool = ProcessPoolExecutor(self.workers, mp_context=multiprocessing.get_context('fork'))
+            return self._pool
+
+    def _run(self, function, *args):
+        if not self._slots.acquire(timeout=0):
+            with self._stats_lock:
+                self.rejected += 1
+            raise HasherBusy()
+        started = time.perf_counter()
+        try:
+            return self._get_pool().submit(function, *args).result(self.timeout)
+        except TimeoutError:
+            raise HasherBusy()
+        except BrokenProcessPool:
+            # A worker died (e.g. OOM-killed); start a fresh pool on the next call
+            with self._pool_lock:
+                self._pool = None
+            raise HasherBusy()
+        finally:
+            self._slots.release()
+            elapsed = time.perf_counter() - started
+            with self._stats_lock:
+                self.completed += 1
+                self.busy_seconds += elapsed
+                self.max_seconds = max(self.max_seconds, elapsed)
+
+    def check(self, password_hash, password):
+        """Whether ``password`` matches ``password_hash`` (False for an empty hash)."""
+        if not password_hash or not password:
+            return False
+        return self._run(_check, password_hash, password, self.handle_long)
+
+    def generate(self, password, inline=False):
+        """bcrypt hash of ``password``; ``inline`` hashes in this thread (scripts), skipping the pool."""
+        if inline:
+            return _generate(password, self.rounds, self.prefix, self.handle_long)
+        return self._run(_generate, password, self.rounds, self.prefix, self.handle_long)
+
+    def generate_many(self, passwords, workers=None):
+        """Hash ``passwords`` in bulk (CLI imports) on a throwaway pool of ``workers`` processes.
+
+        Bypasses the request-time pool and its admission limit on purpose.
+        """
+        passwords = list(passwords)
+        workers = min(workers or os.cpu_count() or 1, len(passwords))
+        if workers <= 1:
+            return [_generate(password, self.rounds, self.prefix, self.handle_long) for password in passwords]
+        count = len(passwords)
+        with ProcessPoolExecutor(workers, mp_context=multiprocessing.get_context('fork')) as pool:
+            return list(pool.map(_generate, passwords, [self.rounds] * count, [self.prefix] * count,
+                                 [self.handle_long] * count, chunksize=max(1, count // (workers * 4))))
+
+    def stats(self):
+        with self._stats_lock:
+            return {
+                'workers': self.workers,
+                'max_pending': self.max_pending,
+                'completed': self.completed,
+                'rejected': self.rejected,
+                'mean_seconds': self.busy_seconds / self.completed if self.completed else 0.0,
+                'max_seconds': self.max_seconds,
+            }
+
+    def shutdown(self):
+        with self._pool_lock:
+            if self._pool is not None:
+                self._pool.shutdown(wait=False, cancel_futures=True)
+                self._pool = None
@@ -0,0 +1,283 @@
+# --- 1. IMPORTS ---
+import logging
+import os
+import re
+import threading
+import zlib
+from urllib.parse import unquote
+from werkzeug.security import safe_join
+
+logger = logging.getLogger(__name__)
+
+# --- 2. MINIMAL PDF OBJECT PARSER ---
+# Just enough of the PDF syntax to walk the page tree: dictionaries, arrays,
+# names, numbers, strings and indirect references. Object streams (PDF 1.5+)
+# are inflated when they use FlateDecode, which is what TeX and most tools emit.
+WHITESPACE = b' \t\r\n\f\0'
+DELIMITERS = b'()<>[]{}/%'
+OBJ_HEADER = re.compile(rb'(\d+)\s+(\d+)\s+obj\b')
+STREAM_START = re.compile(rb'stream\r?\n')
+
+
+class Ref:
+    __slots__ = ('num',)
+
+    def __init__(self, num):
+        self.num = num
+
+
+class Name(str):
+    pass
+
+
+class _Parser:
+    def __init__(self, data, pos=0):
+        self.data = data
+        self.pos = pos
+
+    def skip(self):
+        data, pos = self.data, self.pos
+        while pos < len(data):
+            if data[pos] in WHITESPACE:
+                pos += 1
+            elif data[pos] == 0x25:  # '%' comment
+                while pos < len(data) and data[pos] not in b'\r\n':
+                    pos += 1
+            else:
+                break
+        self.pos = pos
+
+    def token(self):
+        self.skip()
+        data, start = self.data, self.pos
+        if start >= len(data):
+            return None
+        if data[start:start + 2] in (b'<<', b'>>'):
+            self.pos += 2
+            return data[start:start + 2]
+        if data[start] in b'[]{}':
+            self.pos += 1
+            return data[start:start + 1]
+        end = start + 1
+        while end < len(data) and data[end] not in WHITESPACE and data[end] not in DELIMITERS:
+            end += 1
+        self.pos = end
+        return data[start:end]
+
+    def value(self):
+        self.skip()
+        data, pos = self.data, self.pos
+        if pos >= len(data):
+            raise ValueError('unexpected end of data')
+        char = data[pos]
+        if data[pos:pos + 2] == b'<<':
+            self.pos += 2
+            result = {}
+            while True:
+                self.skip()
+                if self.data[self.pos:self.pos + 2] == b'>>':
+                    self.pos += 2
+                    return result
+                key = self.value()
+                result[key] = self.value()
+        if char == 0x5B:  # '['
+            self.pos += 1
+            result = []
+            while True:
+                self.skip()
+                if self.data[self.pos:self.pos + 1] == b']':
+                    self.pos += 1
+                    return result
+                result.append(self.value())
+        if char == 0x2F:  # '/'
+            end = pos + 1
+            while end < len(data) and data[end] not in WHITESPACE and data[end] not in DELIMITERS:
+                end += 1
+            self.pos = end
+            raw = data[pos + 1:end]
+            return Name(re.sub(rb'#([0-9A-Fa-f]{2})', lambda m: bytes([int(m.group(1), 16)]), raw).decode('latin-1'))
+        if char == 0x28:  # '(' literal string, may nest
+            depth, end = 0, pos
+            while end < len(data):
+                if data[end] == 0x5C:
+                    end += 2
+                    continue
+                if data[end] == 0x28:
+                    depth += 1
+                elif data[end] == 0x29:
+                    depth -= 1
+                    if depth == 0:
+                        break
+                end += 1
+            self.pos = end + 1
+            return data[pos + 1:end]
+        if char == 0x3C:  # '<' hex string
+            end = data.index(b'>', pos)
+            self.pos = end + 1
+            return data[pos + 1:end]
+
+        token = self.token()
+        if token in (b'true', b'false'):
+            return token == b'true'
+        if token == b'null':
+            return None
+        try:
+            number = float(token) if b'.' in token else int(token)
+        except ValueError:
+            return token
+        if isinstance(number, int):
+            # "12 0 R" is a reference to object 12
+            saved = self.pos
+            second, third = self.token(), self.token()
+            if second is not None and second.isdigit() and third == b'R':
+                return Ref(number)
+            self.pos = saved
+        return number
+
+
+def _read_objects(data):
+    """Map object number -> parsed object for every object in the file.
+
+    Later definitions win, which matches how incremental updates work.
+    """
+    objects, streams = {}, []
+    pos = 0
+    while True:
+        match = OBJ_HEADER.search(data, pos)
+        if match is None:
+            break
+        parser = _Parser(data, match.end())
+        try:
+            value = parser.value()
+        except (ValueError, IndexError):
+            pos = match.end()
+            continue
+        num = int(match.group(1))
+        objects[num] = value
+        pos = parser.pos
+        if isinstance(value, dict):
+            parser.skip()
+            stream = STREAM_START.match(data, parser.pos)
+            if stream is not None:
+                streams.append((num, value, stream.end()))
+                # Skip the (binary) stream body so it is never scanned for headers
+                length = value.get('Length')
+                if isinstance(length, int):
+                    pos = stream.end() + length
+                else:
+                    end = data.find(b'endstream', stream.end())
+                    pos = end if end != -1 else len(data)
+
+    for num, header, start in streams:
+        if header.get('Type') != 'ObjStm' or header.get('Filter') != 'FlateDecode':
+            continue
+        length = header.get('Length')
+        if isinstance(length, Ref):
+            length = objects.get(length.num)
+        if not isinstance(length, int):
+            continue
+        try:
+            content = zlib.decompress(data[start:start + length])
+        except zlib.error:
+            continue
+        first, count = header.get('First', 0), header.get('N', 0)
+        header_parser = _Parser(content[:first])
+        offsets = []
+        for _ in range(count):
+            offsets.append((int(header_parser.token()), int(header_parser.token())))
+        for obj_num, offset in offsets:
+            # Objects stored directly in the file take precedence (newer revisions)
+            if obj_num in objects:
+                continue
+            try:
+                objects[obj_num] = _Parser(content, first + offset).value()
+            except (ValueError, IndexError):
+                continue
+    return objects
+
+
+def _resolve(objects, value):
+    seen = 0
+    while isinstance(value, Ref) and seen < 32:
+        value = objects.get(value.num)
+        seen += 1
+    return value
+
+
+def parse_page_sizes(data):
+    """Return [(width, height), ...] in points for every page, in reading order."""
+    objects = _read_objects(data)
+    catalog = next((obj for obj in objects.values() if isinstance(obj, dict) and obj.get('Type') == 'Catalog'), None)
+    if catalog is None:
+        raise ValueError('no document catalog found')
+
+    sizes = []
+    # Depth-first walk of the page tree with inherited attributes
+    stack = [(_resolve(objects, catalog.get('Pages')), {})]
+    visited = set()
+    while stack:
+        node, inherited = stack.pop()
+        if not isinstance(node, dict) or id(node) in visited:
+            continue
+        visited.add(id(node))
+        attrs = dict(inherited)
+        for key in ('MediaBox', 'CropBox', 'Rotate'):
+            if key in node:
+                attrs[key] = _resolve(objects, node[key])
+        if node.get('Type') == 'Pages' or 'Kids' in node:
+            kids = _resolve(objects, node.get('Kids')) or []
+            for kid in reversed(kids):
+                stack.append((_resolve(objects, kid), attrs))
+            continue
+        box = attrs.get('CropBox') or attrs.get('MediaBox') or [0, 0, 612, 792]
+        box = [_resolve(objects, v) for v in box]
+        width, height = abs(box[2] - box[0]), abs(box[3] - box[1])
+        if (attrs.get('Rotate') or 0) % 180:
+            width, height = height, width
+        sizes.append((round(width, 2), round(height, 2)))
+    return sizes
+
+
+# --- 3. CACHED LOOKUPS ---
+_cache = {}
+_cache_lock = threading.Lock()
+
+
+def pdf_page_sizes(filename):
+    """Page sizes for ``filename``, parsed once per (mtime, size) of the file."""
+    stat = os.stat(filename)
+    signature = (stat.st_mtime_ns, stat.st_size)
+    cached = _cache.get(filename)
+    if cached is not None and cached[0] == signature:
+        return cached[1]
+    with open(filename, 'rb') as handler:
+        sizes = parse_page_sizes(handler.read())
+    with _cache_lock:
+        _cache[filename] = (signature, sizes)
+    return sizes
+
+
+PDF_EMBED_LINK = re.compile(r'<a\s[^>]*\bclass="[^"]*\bpdf-embed\b[^"]*"[^>]*>', re.IGNORECASE)
+HREF = re.compile(r'\bhref="([^"]+)"', re.IGNORECASE)
+
+
+def embedded_pdf_manifest(html, static_folder, static_url_path):
+    """Page layout of every local PDF linked with class="pdf-embed" in ``html``.
+
+    Returns {href: {'pages': [[width, height], ...]}} so the client can lay
+    out placeholders before pdf.js has downloaded anything.
+    """
+    manifest = {}
+    prefix = static_url_path.rstrip('/') + '/'
+    for tag in PDF_EMBED_LINK.findall(html):
+        href = HREF.search(tag)
+        if href is None or href.group(1) in manifest or not href.group(1).startswith(prefix):
+            continue
+        filename = safe_join(static_folder, unquote(href.group(1)[len(prefix):]))
+        if filename is None or not os.path.isfile(filename):
+            continue
+        try:
+            manifest[href.group(1)] = {'pages': [list(size) for size in pdf_page_sizes(filename)]}
+        except (ValueError, IndexError, KeyError, TypeError):
+            logger.warning('Could not read the page layout of %s', filename, exc_info=True)
+    return manifest
@@ -0,0 +1,220 @@
+# --- 1. IMPORTS ---
+import cProfile
+import heapq
+import io
+import itertools
+import marshal
+import pstats
+import random
+import sys
+import threading
+import time
+import tracemalloc
+import click
+from flask import Response, abort, current_app, g, jsonify, request
+from flask.cli import with_appcontext
+from flask_login import login_required
+
+# Traceback depth /admin/memory accepts; deeper ones make tracing much slower
+MAX_TRACEBACK_FRAMES = 50
+
+
+def _summary(profile, sort='cumulative', limit=25):
+    stream = io.StringIO()
+    pstats.Stats(profile, stream=stream).strip_dirs().sort_stats(sort).print_stats(limit)
+    return stream.getvalue()
+
+
+# --- 2. CLI: PROFILE ONE ROUTE ---
+@click.command('profile')
+@click.argument('url')
+@click.option('-n', '--n', 'count', default=200, show_default=True, help='Requests to profile.')
+@click.option('--warmup', default=5, show_default=True, help='Unprofiled requests first (fills caches).')
+@click.option('--output', '-o', default='profile.pstats', show_default=True, help='pstats file (snakeviz, flameprof, gprof2dot).')
+@click.option('--cache/--no-cache', default=False, show_default=True, help='Let the response cache answer.')
+@click.option('--sort', default='cumulative', show_default=True, help='pstats sort key for the printed summary.')
+@click.option('--limit', default=30, show_default=True, help='Functions in the printed summary.')
+@with_appcontext
+def profile_command(url, count, warmup, output, cache, sort, limit):
+    """Request URL repeatedly through the test client under cProfile."""
+    app = current_app._get_current_object()
+    response_cache = app.extensions.get('response_cache')
+    backend = response_cache.backend if response_cache else None
+    if response_cache and not cache:
+        response_cache.backend = None
+    try:
+        client = app.test_client()
+        for _ in range(warmup):
+            client.get(url)
+        profile = cProfile.Profile()
+        statuses = {}
+        started = time.perf_counter()
+        for _ in range(count):
+            profile.enable()
+            response = client.get(url)
+            response.get_data()
+            profile.disable()
+            statuses[response.status_code] = statuses.get(response.status_code, 0) + 1
+        elapsed = time.perf_counter() - started
+    finally:
+        if response_cache:
+            response_cache.backend = backend
+
+    profile.dump_stats(output)
+    click.echo(_summary(profile, sort, limit))
+    click.echo('%d requests to %s in %.2fs (%.2f ms/request, statuses %s); stats written to %s'
+               % (count, url, elapsed, elapsed * 1000 / max(count, 1), statuses, output))
+
+
+# --- 3. SAMPLING PROFILER ---
+class Profiler:
+    """Profiles a random sample of live requests and keeps the slowest ones.
+
+    Off by default (rate 0). Editors turn it on with
+    ``POST /admin/profiling rate=0.01``; ``GET /admin/profiling`` lists the
+    slowest sampled requests and ``/admin/profiling/<id>.pstats`` downloads
+    one. ``/admin/memory`` reports tracemalloc's top allocation sites (after
+    ``POST /admin/memory start=1``) and the size of the FlatPages collection.
+
+    Configuration:
+        PROFILE_SAMPLE_RATE  fraction of requests to profile
+        PROFILE_KEEP         how many of the slowest profiles to keep
+    """
+
+    def __init__(self, app=None, pages=None):
+        self.pages = pages
+        self._slowest = []
+        self._ids = itertools.count(1)
+        self._lock = threading.Lock()
+        if app is not None:
+            self.init_app(app, pages)
+
+    def init_app(self, app, pages=None):
+        app.config.setdefault('PROFILE_SAMPLE_RATE', 0.0)
+        app.config.setdefault('PROFILE_KEEP', 20)
+        self.pages = pages if pages is not None else self.pages
+        self.rate = app.config['PROFILE_SAMPLE_RATE']
+        self.keep = app.config['PROFILE_KEEP']
+        app.before_request(self._before_request)
+        app.teardown_request(self._teardown_request)
+        app.add_url_rule('/admin/profiling', 'profiling', login_required(self.profiling_view), methods=['GET', 'POST'])
+        app.add_url_rule('/admin/profiling/<int:profile_id>.pstats', 'profiling_download', login_required(self.download_view))
+        app.add_url_rule('/admin/memory', 'memory', login_required(self.memory_view), methods=['GET', 'POST'])
+        app.extensions['profiler'] = self
+
+    # --- Sampling ---
+    def _before_request(self):
+        if not self.rate or random.random() >= self.rate:
+            return
+        profile = cProfile.Profile()
+        try:
+            profile.enable()
+        except ValueError:
+            # Another profiler (e.g. 'flask profile') already owns this thread
+            return
+        g._profile = (profile, time.perf_counter())
+
+    def _teardown_request(self, exc):
+        sampled = g.pop('_profile', None)
+        if sampled is None:
+            return
+        profile, started = sampled
+        profile.disable()
+        duration = time.perf_counter() - started
+        with self._lock:
+            if len(self._slowest) >= self.keep and duration <= self._slowest[0][0]:
+                return
+        profile.create_stats()
+        # Serialize first: pstats.Stats() takes the stats out of the profile
+        stats = marshal.dumps(profile.stats)  # the pstats file format
+        record = {
+            'id': next(self._ids),
+            'url': request.full_path.rstrip('?'),
+            'endpoint': request.endpoint,
+            'duration_ms': round(duration * 1000, 2),
+            'at': time.time(),
+            'summary': _summary(profile, limit=15),
+            'stats': stats,
+        }
+        with self._lock:
+            heapq.heappush(self._slowest, (duration, record['id'], record))
+            while len(self._slowest) > self.keep:
+                heapq.heappop(self._slowest)
+
+    # --- Views ---
+    def profiling_view(self):
+        if request.method == 'POST':
+            values = request.get_json(silent=True) or request.form
+            try:
+                self.rate = min(max(float(values.get('rate', self.rate)), 0.0), 1.0)
+                self.keep = max(int(values.get('keep', self.keep)), 1)
+            except ValueError:
+                abort(400)
+            if values.get('clear'):
+                with self._lock:
+                    self._slowest = []
+        with self._lock:
+            records = [record for _, _, record in sorted(self._slowest, reverse=True)]
+        return jsonify(rate=self.rate, keep=self.keep, profiles=[
+            {key: value for key, value in record.items() if key != 'stats'} for record in records])
+
+    def download_view(self, profile_id):
+        with self._lock:
+            record = next((record for _, _, record in self._slowest if record['id'] == profile_id), None)
+        if record is None:
+            abort(404)
+        response = Response(record['stats'], mimetype='application/octet-stream')
+        response.headers['Content-Disposition'] = 'attachment; filename=profile-%d.pstats' % profile_id
+        return response
+
+    def memory_view(self):
+        """Top allocation sites (tracemalloc) plus what the content collection weighs.
+
+        Tracing is switched with ``POST start=1 frames=<n>`` or ``POST stop=1``;
+        GET only reports.
+        """
+        if request.method == 'POST':
+            values = request.get_json(silent=True) or request.form
+            try:
+                frames = min(max(int(values.get('frames', 1)), 1), MAX_TRACEBACK_FRAMES)
+            except ValueError:
+                abort(400)
+            if values.get('stop'):
+                tracemalloc.stop()
+            elif values.get('start') and not tracemalloc.is_tracing():
+                # Only allocations made from now on are seen; GET this page later
+                tracemalloc.start(frames)
+        group = request.args.get('group', 'lineno')
+        if group not in ('lineno', 'filename', 'traceback'):
+            abort(400)
+        limit = min(max(request.args.get('top', 25, type=int), 1), 500)
+        report = {'tracing': tracemalloc.is_tracing(), 'content': self._content_sizes()}
+        if not report['tracing']:
+            report['note'] = 'tracemalloc is off; POST start=1 to trace allocations from now on'
+            return jsonify(report)
+        snapshot = tracemalloc.take_snapshot().filter_traces((
+            tracemalloc.Filter(False, tracemalloc.__file__),
+            tracemalloc.Filter(False, '<frozen importlib._bootstrap>'),
+        ))
+        current, peak = tracemalloc.get_traced_memory()
+        report.update(traced_bytes=current, peak_bytes=peak, top=[
+            {'site': str(stat.traceback[0]), 'size_bytes': stat.size, 'count': stat.count}
+            for stat in snapshot.statistics(group)[:limit]
+        ])
+        return jsonify(report)
+
+    def _content_sizes(self):
+        if self.pages is None:
+            return None
+        pages = list(self.pages)
+        body_cache = getattr(self.pages, 'body_cache', None)
+        if body_cache is not None:
+            # PageStore: bodies and HTML live in the byte-bounded LRU, not on the pages
+            return dict(pages=len(pages), **body_cache.stats())
+        rendered = [page.__dict__['html'] for page in pages if 'html' in page.__dict__]
+        return {
+            'pages': len(pages),
+            'body_bytes': sum(sys.getsizeof(page.body) for page in pages),
+            'rendered_pages': len(rendered),
+            'rendered_html_bytes': sum(sys.getsizeof(html) for html in rendered),
+        }
@@ -0,0 +1,155 @@
+# --- 1. IMPORTS ---
+from flask import Blueprint, abort, current_app, jsonify, render_template, request, stream_template, url_for
+from flask_login import current_user
+from catalog import SECTIONS
+from extensions import catalog, pages, render_cache, response_cache, search_index, user_cache
+from pdf_manifest import embedded_pdf_manifest
+
+# --- 2. BLUEPRINT ---
+# Pages anyone can see; anonymous responses go through the response cache
+public = Blueprint('public', __name__)
+
+# --- 3. HELPERS ---
+def listing_page(section, cursor, limit=None):
+    """One page of a catalog section; a malformed cursor is a 400, not a 500."""
+    try:
+        return catalog.snapshot.page(section, cursor, limit or current_app.config['LISTING_PAGE_SIZE'])
+    except (TypeError, ValueError):
+        abort(400)
+
+def buffered(chunks, size):
+    """Coalesce Jinja's many tiny string events into chunks of about ``size`` characters."""
+    buffer, length = [], 0
+    for chunk in chunks:
+        buffer.append(chunk)
+        length += len(chunk)
+        if length >= size:
+            yield ''.join(buffer)
+            buffer, length = [], 0
+    if buffer:
+        yield ''.join(buffer)
+
+def render_listing(template, **context):
+    """render_template, or a streamed response when STREAM_TEMPLATES is on.
+
+    Streaming flushes <head> and the navbar before the cards are rendered, and
+    keeps only one chunk of HTML in memory; stream_template runs the generator
+    inside the request context, so url_for and current_user keep working.
+    """
+    if not current_app.config['STREAM_TEMPLATES']:
+        return render_template(template, **context)
+    return current_app.response_class(buffered(stream_template(template, **context), current_app.config['STREAM_TEMPLATES_BUFFER']))
+
+# --- 4. ROUTES ---
+@public.route('/')
+@response_cache.cached
+def index():
+    snapshot = catalog.snapshot
+    news_posts = snapshot.news[:current_app.config['INDEX_NEWS_LIMIT']]
+    return render_template('index.html', logado=current_user.is_authenticated, news_posts=news_posts, problem_post=snapshot.open_problem)
+
+@public.route('/about')
+@response_cache.cached
+def about(): return render_template('about.html', logado=current_user.is_authenticated)
+
+@public.route('/materials')
+@response_cache.cached
+def materials(): return render_template('materials.html', logado=current_user.is_authenticated)
+
+@public.route('/months-problems')
+@response_cache.cached
+def months_problems():
+    # Published "Month-Problem" posts, open ones first (see catalog.py)
+    post_list, next_cursor = listing_page('problems', request.args.get('cursor'))
+    return render_listing('months-problems.html', logado=current_user.is_authenticated, post_list=post_list, next_cursor=next_cursor)
+
+@public.route('/news')
+@response_cache.cached
+def news():
+    # Each section pages on its own: /news?awards=<cursor>&others=<cursor>
+    award_posts, awards_cursor = listing_page('awards', request.args.get('awards'))
+    other_news_posts, others_cursor = listing_page('others', request.args.get('others'))
+    return render_listing('news.html', logado=current_user.is_authenticated, award_posts=award_posts, awards_cursor=awards_cursor,
+                           other_news_posts=other_news_posts, others_cursor=others_cursor)
+
+@public.route('/team')
+@response_cache.cached
+def team(): return render_template('team.html', logado=current_user.is_authenticated)
+
+@public.route('/faq')
+@response_cache.cached
+def faq(): return render_template('faq.html', logado=current_user.is_authenticated)
+
+@public.route('/contact')
+@response_cache.cached
+def contact(): return render_template('contact.html', logado=current_user.is_authenticated)
+
+@public.route('/search')
+@response_cache.cached
+def search():
+    query = request.args.get('q', '').strip()
+    # Clamped, so a huge ?page= cannot overflow SQLite's OFFSET
+    page = min(max(request.args.get('page', 1, type=int), 1), current_app.config['SEARCH_MAX_PAGE'])
+    page_size = current_app.config['SEARCH_PAGE_SIZE']
+    snapshot = catalog.snapshot
+    total, hits = search_index.search(query, limit=page_size, offset=(page - 1) * page_size, paths=snapshot.by_path)
+    results = [(snapshot.by_path[path], snippet) for path, snippet in hits]
+    if request.args.get('format') == 'json':
+        return jsonify(query=query, page=page, total=total, results=[{
+            'path': post.path,
+            'url': url_for('public.view_post', path=post.path),
+            'title': post.meta.get('title'),
+            'desc': post.meta.get('desc'),
+            'date': post.meta['date'].isoformat() if post.meta.get('date') else None,
+            'snippet': str(snippet),
+        } for post, snippet in results])
+    return render_template('search.html', logado=current_user.is_authenticated, query=query, page=page, page_size=page_size, total=total, results=results)
+
+@public.route('/api/posts')
+@response_cache.cached
+def api_posts():
+    """A page of a listing as JSON, with the rendered card of each post for infinite scroll."""
+    section = request.args.get('section', 'news')
+    if section not in SECTIONS:
+        abort(400)
+    limit = min(max(request.args.get('limit', current_app.config['LISTING_PAGE_SIZE'], type=int), 1), current_app.config['LISTING_MAX_PAGE_SIZE'])
+    posts, next_cursor = listing_page(section, request.args.get('cursor'), limit)
+    card = 'partials/problem_card.html' if section == 'problems' else 'partials/news_card.html'
+    return jsonify(section=section, next_cursor=next_cursor, items=[{
+        'path': post.path,
+        'url': url_for('public.view_post', path=post.path),
+        'title': post.meta.get('title'),
+        'desc': post.meta.get('desc'),
+        'date': post.meta['date'].isoformat() if post.meta.get('date') else None,
+        'image': post.meta.get('image'),
+        'is_solved': bool(post.meta.get('is_solved', False)),
+        'html': render_template(card, post=post),
+    } for post in posts])
+
+@public.route('/healthz')
+def healthz():
+    """Liveness: the process answers requests."""
+    return jsonify(status='ok')
+
+@public.route('/readyz')
+def readyz():
+    """Readiness: content is loaded and the render cache and search index are warm."""
+    checks = {
+        'content': current_app.extensions['content_loaded'].is_set(),
+        'render_cache': render_cache.warmed.is_set(),
+        'search_index': search_index.ready.is_set(),
+    }
+    ready = all(checks.values())
+    return jsonify(ready=ready, checks=checks), 200 if ready else 503
+
+@public.route('/post/<path:path>')
+@response_cache.cached
+def view_post(path):
+    post = pages.get_or_404(path)
+    author = None
+    author_email = post.meta.get('author_email')
+    if author_email:
+        author = user_cache.get_by_email(author_email)
+    # Page sizes of embedded PDFs, so the client can lay out pages before downloading them
+    pdf_manifest = embedded_pdf_manifest(post.html, current_app.static_folder, current_app.static_url_path)
+    return render_template('view-post-flat.html', post=post, author=author, pdf_manifest=pdf_manifest, logado=current_user.is_authenticated)
@@ -0,0 +1,49 @@
+# --- 1. IMPORTS ---
+import threading
+import time
+from collections import OrderedDict
+
+
+# --- 2. TOKEN BUCKET ---
+class TokenBucketLimiter:
+    """Per-key token buckets: ``burst`` requests at once, refilled at ``rate`` per second.
+
+    Buckets are kept in least recently used order and the oldest is dropped
+    once the table grows past ``max_keys`` (it is usually full again by then),
+    so memory stays bounded and each call O(1) even when every request comes
+    from a new address.
+    """
+
+    def __init__(self, rate, burst, max_keys=10000):
+        self.rate = float(rate)
+        self.burst = float(burst)
+        self.max_keys = max_keys
+        self.limited = 0
+        self._buckets = OrderedDict()
+        self._lock = threading.Lock()
+
+    def consume(self, key, tokens=1.0):
+        """Take ``tokens`` from ``key``'s bucket. Returns 0 when allowed, else seconds to wait."""
+        now = time.monotonic()
+        with self._lock:
+            available, updated = self._buckets.get(key, (self.burst, now))
+            available = min(self.burst, available + (now - updated) * self.rate)
+            if available >= tokens:
+                self._store(key, available - tokens, now)
+                return 0.0
+            self._store(key, available, now)
+            self.limited += 1
+            return (tokens - available) / self.rate if self.rate else float('inf')
+
+    def _store(self, key, available, now):
+        self._buckets[key] = (available, now)
+        self._buckets.move_to_end(key)
+        if len(self._buckets) > self.max_keys:
+            self._buckets.popitem(last=False)
+
+    def reset(self, key):
+        with self._lock:
+            self._buckets.pop(key, None)
+
+    def stats(self):
+        return {'keys': len(self._buckets), 'limited': self.limited, 'rate': self.rate, 'burst': self.burst}
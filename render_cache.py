@@ -0,0 +1,167 @@
+# --- 1. IMPORTS ---
+import hashlib
+import logging
+import os
+import sqlite3
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+import markdown
+from flask_flatpages.utils import pygmented_markdown
+
+logger = logging.getLogger(__name__)
+
+
+# --- 2. RENDER CACHE ---
+class RenderCache:
+    """Markdown-to-HTML cache persisted in SQLite and shared across processes and deploys.
+
+    Entries are keyed by the SHA-256 of the renderer configuration plus the
+    Markdown body, so an unchanged post never gets converted twice, and a
+    change to the body or to the Markdown setup simply misses. Concurrent
+    misses on the same body within a process wait for a single render.
+    Entries older than ``RENDER_CACHE_MAX_AGE`` that a full warm did not use
+    are deleted, so edits and renderer changes do not grow the file forever.
+
+    Configuration:
+        RENDER_CACHE_PATH          SQLite file (defaults to the instance folder)
+        RENDER_CACHE_WARM_WORKERS  threads used by ``warm``
+        RENDER_CACHE_MAX_AGE       seconds before unused entries may be evicted (None keeps them)
+    """
+
+    def __init__(self, app=None, renderer=pygmented_markdown):
+        self.renderer = renderer
+        self.path = None
+        self.warmed = threading.Event()
+        self._local = threading.local()
+        self._inflight = {}
+        self._inflight_lock = threading.Lock()
+        self._touched = None
+        # SQLite connections and locks must not be shared with forked children
+        os.register_at_fork(after_in_child=self._after_fork)
+        if app is not None:
+            self.init_app(app)
+
+    def _after_fork(self):
+        self._local = threading.local()
+        self._inflight = {}
+        self._inflight_lock = threading.Lock()
+
+    def init_app(self, app):
+        app.config.setdefault('RENDER_CACHE_PATH', os.path.join(app.instance_path, 'render-cache.db'))
+        app.config.setdefault('RENDER_CACHE_WARM_WORKERS', min(8, (os.cpu_count() or 1) + 2))
+        app.config.setdefault('RENDER_CACHE_MAX_AGE', 30 * 24 * 3600)
+        self.app = app
+        self.path = app.config['RENDER_CACHE_PATH']
+        os.makedirs(os.path.dirname(os.path.abspath(self.path)), exist_ok=True)
+        with self._connect() as conn:
+            conn.execute('CREATE TABLE IF NOT EXISTS render_cache (key TEXT PRIMARY KEY, html TEXT NOT NULL, created REAL NOT NULL)')
+
+        # FlatPages inspects the renderer's signature, so hand it a plain function
+        def html_renderer(body, flatpages):
+            return self.render(body, flatpages)
+        app.config['FLATPAGES_HTML_RENDERER'] = html_renderer
+        app.extensions['render_cache'] = self
+
+    def _connect(self):
+        conn = getattr(self._local, 'conn', None)
+        if conn is None:
+            conn = sqlite3.connect(self.path, timeout=5, isolation_level=None)
+            conn.execute('PRAGMA journal_mode=WAL')
+            conn.execute('PRAGMA synchronous=NORMAL')
+            self._local.conn = conn
+        return conn
+
+    def config_signature(self, flatpages):
+        if flatpages is None:
+            return markdown.__version__
+        return '%s|%r|%r' % (markdown.__version__, flatpages.config('markdown_extensions'), flatpages.config('extension_configs'))
+
+    def key(self, body, flatpages=None):
+        digest = hashlib.sha256(self.config_signature(flatpages).encode('utf-8'))
+        digest.update(b'\0')
+        digest.update(body.encode('utf-8'))
+        return digest.hexdigest()
+
+    def render(self, body, flatpages=None):
+        key = self.key(body, flatpages)
+        # Keys used while a full warm runs survive its eviction; anything missed is just rendered again
+        touched = self._touched
+        if touched is not None:
+            touched.add(key)
+        html = self._get(key)
+        if html is not None:
+            return html
+
+        with self._inflight_lock:
+            lock = self._inflight.setdefault(key, threading.Lock())
+        with lock:
+            # Someone else may have rendered it while we waited
+            html = self._get(key)
+            if html is None:
+                html = self.renderer(body, flatpages)
+                self._set(key, html)
+        with self._inflight_lock:
+            self._inflight.pop(key, None)
+        return html
+
+    def _get(self, key):
+        row = self._connect().execute('SELECT html FROM render_cache WHERE key = ?', (key,)).fetchone()
+        return row[0] if row else None
+
+    def _set(self, key, html):
+        try:
+            self._connect().execute('INSERT OR IGNORE INTO render_cache VALUES (?, ?, ?)', (key, html, time.time()))
+        except sqlite3.OperationalError:
+            logger.warning('Could not store rendered HTML (database busy)')
+
+    def warm(self, pages, wait=False, evict=False):
+        """Render every page in a thread pool so first visitors hit a warm cache.
+
+        With ``evict`` (``pages`` being the whole site), old entries the warm did
+        not use are deleted afterwards.
+        """
+        def render_page(page):
+            try:
+                page.html
+                return True
+            except Exception:
+                logger.exception('Could not render %s', page.path)
+                return False
+
+        def run():
+            started = time.perf_counter()
+            if evict:
+                self._touched = set()
+            with ThreadPoolExecutor(self.app.config['RENDER_CACHE_WARM_WORKERS'], thread_name_prefix='render-warm') as pool:
+                count = sum(pool.map(render_page, list(pages)))
+            logger.info('Warmed %d rendered posts in %.2fs', count, time.perf_counter() - started)
+            if evict:
+                touched, self._touched = self._touched, None
+                self.evict(touched)
+            self.warmed.set()
+
+        if wait:
+            run()
+        else:
+            threading.Thread(target=run, name='render-warm', daemon=True).start()
+        return self.warmed
+
+    def evict(self, keep):
+        """Delete entries older than RENDER_CACHE_MAX_AGE whose key is not in ``keep``."""
+        max_age = self.app.config['RENDER_CACHE_MAX_AGE']
+        if max_age is None:
+            return 0
+        conn = self._connect()
+        try:
+            conn.execute('CREATE TEMP TABLE IF NOT EXISTS render_cache_keep (key TEXT PRIMARY KEY)')
+            conn.execute('DELETE FROM render_cache_keep')
+            conn.executemany('INSERT OR IGNORE INTO render_cache_keep VALUES (?)', ((key,) for key in keep))
+            deleted = conn.execute('DELETE FROM render_cache WHERE created < ? AND key NOT IN (SELECT key FROM render_cache_keep)',
+                                   (time.time() - max_age,)).rowcount
+        except sqlite3.OperationalError:
+            logger.warning('Could not evict rendered HTML (database busy)')
+            return 0
+        if deleted:
+            logger.info('Evicted %d unused rendered posts', deleted)
+        return deleted
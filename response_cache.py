@@ -0,0 +1,317 @@
+# --- 1. IMPORTS ---
+import hashlib
+import os
+import sqlite3
+import threading
+import time
+from collections import OrderedDict
+from functools import wraps
+from urllib.parse import urlencode
+from flask import request, session, make_response
+from flask_login import current_user
+
+
+# --- 2. HELPERS ---
+def templates_fingerprint(app):
+    """Hash of every file in the template folder, identical across workers and hosts."""
+    digest = hashlib.sha1()
+    folder = os.path.join(app.root_path, app.template_folder or 'templates')
+    for cur_path, _, filenames in sorted(os.walk(folder)):
+        for name in sorted(filenames):
+            digest.update(os.path.join(os.path.relpath(cur_path, folder), name).encode('utf-8', 'surrogateescape'))
+            with open(os.path.join(cur_path, name), 'rb') as handler:
+                digest.update(hashlib.sha1(handler.read()).digest())
+    return digest.hexdigest()
+
+
+class TemplatesVersion:
+    """Callable returning ``templates_fingerprint(app)``, kept current while Jinja auto-reloads.
+
+    With TEMPLATES_AUTO_RELOAD (or debug) on, edited templates are picked up
+    without a restart, so the fingerprint is recomputed, at most every
+    ``interval`` seconds. Otherwise Jinja never re-reads a template and the
+    fingerprint taken at startup stays right until the next restart.
+    """
+
+    def __init__(self, app, interval=1.0):
+        self.app = app
+        self.interval = interval
+        self.value = templates_fingerprint(app)
+        self._checked = time.monotonic()
+
+    def __call__(self):
+        if self.app.jinja_env.auto_reload and time.monotonic() - self._checked >= self.interval:
+            self._checked = time.monotonic()
+            self.value = templates_fingerprint(self.app)
+        return self.value
+
+
+# --- 3. CACHE ENTRY ---
+class CachedResponse:
+    """A rendered response body plus what is needed to replay and revalidate it."""
+    __slots__ = ('body', 'status', 'content_type', 'etag', 'created', 'generation')
+
+    def __init__(self, body, status, content_type, etag, created, generation):
+        self.body = body
+        self.status = status
+        self.content_type = content_type
+        self.etag = etag
+        self.created = created
+        self.generation = generation
+
+    @property
+    def size(self):
+        return len(self.body) + 256
+
+
+# --- 4. BACKENDS ---
+class MemoryBackend:
+    """In-process LRU bounded by the total size of the cached bodies."""
+
+    def __init__(self, max_bytes):
+        self.max_bytes = max_bytes
+        self.current_bytes = 0
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key):
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None:
+                self._entries.move_to_end(key)
+            return entry
+
+    def set(self, key, entry):
+        if entry.size > self.max_bytes:
+            return
+        with self._lock:
+            previous = self._entries.pop(key, None)
+            if previous is not None:
+                self.current_bytes -= previous.size
+            self._entries[key] = entry
+            self.current_bytes += entry.size
+            while self.current_bytes > self.max_bytes:
+                _, evicted = self._entries.popitem(last=False)
+                self.current_bytes -= evicted.size
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+            self.current_bytes = 0
+
+    def __len__(self):
+        return len(self._entries)
+
+
+class SQLiteBackend:
+    """Cache shared by every worker process through one SQLite file.
+
+    Each thread keeps its own connection. Access times are only refreshed once
+    a minute per entry so cache hits stay read-only most of the time.
+    """
+    TOUCH_INTERVAL = 60
+    EVICT_EVERY = 100
+
+    def __init__(self, path, max_bytes):
+        self.path = path
+        self.max_bytes = max_bytes
+        self._local = threading.local()
+        self._writes = 0
+        # SQLite connections must not be shared with forked children
+        os.register_at_fork(after_in_child=self._after_fork)
+        os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+        with self._connect() as conn:
+            conn.execute('''CREATE TABLE IF NOT EXISTS response_cache (
+                key TEXT PRIMARY KEY, generation TEXT NOT NULL, etag TEXT NOT NULL,
+                created REAL NOT NULL, accessed REAL NOT NULL, status INTEGER NOT NULL,
+                content_type TEXT NOT NULL, size INTEGER NOT NULL, body BLOB NOT NULL)''')
+            conn.execute('CREATE INDEX IF NOT EXISTS ix_response_cache_accessed ON response_cache (accessed)')
+
+    def _after_fork(self):
+        self._local = threading.local()
+
+    def _connect(self):
+        conn = getattr(self._local, 'conn', None)
+        if conn is None:
+            conn = sqlite3.connect(self.path, timeout=5, isolation_level=None)
+            conn.execute('PRAGMA journal_mode=WAL')
+            conn.execute('PRAGMA synchronous=NORMAL')
+            conn.execute('PRAGMA mmap_size=268435456')
+            self._local.conn = conn
+        return conn
+
+    def get(self, key):
+        conn = self._connect()
+        row = conn.execute('SELECT body, status, content_type, etag, created, generation, accessed FROM response_cache WHERE key = ?', (key,)).fetchone()
+        if row is None:
+            return None
+        now = time.time()
+        if now - row[6] > self.TOUCH_INTERVAL:
+            try:
+                conn.execute('UPDATE response_cache SET accessed = ? WHERE key = ?', (now, key))
+            except sqlite3.OperationalError:
+                pass
+        return CachedResponse(*row[:6])
+
+    def set(self, key, entry):
+        if entry.size > self.max_bytes:
+            return
+        conn = self._connect()
+        try:
+            conn.execute('INSERT OR REPLACE INTO response_cache VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)',
+                         (key, entry.generation, entry.etag, entry.created, time.time(), entry.status,
+                          entry.content_type, entry.size, entry.body))
+        except sqlite3.OperationalError:
+            # Another worker holds the write lock; the next miss will store it
+            return
+        self._writes += 1
+        if self._writes % self.EVICT_EVERY == 0:
+            self._evict(conn)
+
+    def _evict(self, conn):
+        total = conn.execute('SELECT COALESCE(SUM(size), 0) FROM response_cache').fetchone()[0]
+        if total <= self.max_bytes:
+            return
+        # Drop the least recently used rows until we are back under budget
+        conn.execute('''DELETE FROM response_cache WHERE key IN (
+            SELECT key FROM (SELECT key, SUM(size) OVER (ORDER BY accessed DESC) AS running FROM response_cache)
+            WHERE running > ?)''', (self.max_bytes,))
+
+    def clear(self):
+        self._connect().execute('DELETE FROM response_cache')
+
+
+# --- 5. RESPONSE CACHE ---
+class ResponseCache:
+    """Full-page cache for anonymous GET requests.
+
+    Entries are keyed by endpoint, view arguments and query string, and tagged
+    with a generation made of the content version and a fingerprint of the
+    templates (see TemplatesVersion); an entry from an older generation is
+    simply re-rendered. Cached
+    pages carry an ETag and Last-Modified so conditional requests get a 304
+    without rendering anything. Logged-in editors always bypass the cache.
+
+    Configuration:
+        RESPONSE_CACHE_BACKEND    'memory', 'sqlite' or None to disable
+        RESPONSE_CACHE_MAX_BYTES  byte budget for the cached bodies
+        RESPONSE_CACHE_PATH       SQLite file (defaults to the instance folder)
+        RESPONSE_CACHE_STREAM_MAX_BYTES  streamed pages larger than this are not kept
+    """
+
+    def __init__(self, app=None, version=None):
+        self.version = version or (lambda: None)
+        self.backend = None
+        self.templates_version = None
+        if app is not None:
+            self.init_app(app)
+
+    def init_app(self, app):
+        app.config.setdefault('RESPONSE_CACHE_BACKEND', 'memory')
+        app.config.setdefault('RESPONSE_CACHE_MAX_BYTES', 64 * 1024 * 1024)
+        app.config.setdefault('RESPONSE_CACHE_PATH', os.path.join(app.instance_path, 'response-cache.db'))
+        app.config.setdefault('RESPONSE_CACHE_STREAM_MAX_BYTES', 1024 * 1024)
+        self.app = app
+        backend = app.config['RESPONSE_CACHE_BACKEND']
+        if backend == 'memory':
+            self.backend = MemoryBackend(app.config['RESPONSE_CACHE_MAX_BYTES'])
+        elif backend == 'sqlite':
+            self.backend = SQLiteBackend(app.config['RESPONSE_CACHE_PATH'], app.config['RESPONSE_CACHE_MAX_BYTES'])
+        elif backend:
+            raise ValueError('Unknown RESPONSE_CACHE_BACKEND: %r' % backend)
+        self.templates_version = TemplatesVersion(app)
+        app.extensions['response_cache'] = self
+
+    @property
+    def generation(self):
+        return '%s:%s' % (self.version(), self.templates_version())
+
+    def make_key(self):
+        # Percent-encoded, so an argument value containing '&' or '=' cannot pass for several arguments
+        view_args = urlencode(sorted((request.view_args or {}).items()))
+        query = urlencode(sorted(request.args.items(multi=True)))
+        return '%s|%s|%s|anon' % (request.endpoint, view_args, query)
+
+    def should_bypass(self):
+        return (self.backend is None or self.app.debug or request.method not in ('GET', 'HEAD')
+                or '_flashes' in session or current_user.is_authenticated)
+
+    def lookup(self, key=None, stale=False):
+        """Return the cached entry for the current request, if it is still fresh (or ``stale`` is allowed)."""
+        entry = self.backend.get(key or self.make_key())
+        if entry is None or (not stale and entry.generation != self.generation):
+            return None
+        return entry
+
+    def respond(self, entry):
+        response = make_response(entry.body, entry.status)
+        response.content_type = entry.content_type
+        self._add_validators(response, entry.etag, entry.created)
+        return response.make_conditional(request)
+
+    def store(self, key, response):
+        if response.status_code != 200 or response.is_streamed or 'Set-Cookie' in response.headers:
+            return None
+        return self._store_body(key, response, response.get_data(), self.generation)
+
+    def _store_body(self, key, response, body, generation):
+        entry = CachedResponse(body, response.status_code, response.content_type,
+                               hashlib.sha1(body).hexdigest(), time.time(), generation)
+        self.backend.set(key, entry)
+        return entry
+
+    def tee(self, key, response):
+        """Let a streamed response through unchanged and cache its body once it completes.
+
+        The first visitor still gets the page chunk by chunk; only a stream
+        that runs to the end (client did not disconnect) and stays under
+        RESPONSE_CACHE_STREAM_MAX_BYTES is stored, under the generation that
+        was current when rendering started.
+        """
+        if response.status_code != 200 or 'Set-Cookie' in response.headers:
+            return response
+        limit = self.app.config['RESPONSE_CACHE_STREAM_MAX_BYTES']
+        generation = self.generation
+        chunks = response.iter_encoded()
+
+        def generate():
+            parts, size = [], 0
+            for chunk in chunks:
+                if parts is not None:
+                    size += len(chunk)
+                    if size > limit:
+                        parts = None
+                    else:
+                        parts.append(chunk)
+                yield chunk
+            if parts is not None:
+                self._store_body(key, response, b''.join(parts), generation)
+
+        response.response = generate()
+        return response
+
+    def _add_validators(self, response, etag, created):
+        response.set_etag(etag)
+        response.last_modified = int(created)
+        response.cache_control.no_cache = True
+        response.vary.add('Cookie')
+
+    def cached(self, view):
+        """Decorator for views whose anonymous output only depends on the URL."""
+        @wraps(view)
+        def wrapper(*args, **kwargs):
+            if self.should_bypass():
+                return view(*args, **kwargs)
+            key = self.make_key()
+            entry = self.lookup(key)
+            if entry is not None:
+                return self.respond(entry)
+            response = make_response(view(*args, **kwargs))
+            if response.is_streamed:
+                return self.tee(key, response)
+            entry = self.store(key, response)
+            if entry is not None:
+                self._add_validators(response, entry.etag, entry.created)
+                response = response.make_conditional(request)
+            return response
+        return wrapper
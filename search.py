@@ -0,0 +1,153 @@
+# --- 1. IMPORTS ---
+import hashlib
+import logging
+import os
+import re
+import sqlite3
+import threading
+import time
+from markupsafe import Markup, escape
+
+logger = logging.getLogger(__name__)
+
+# --- 2. CONSTANTS ---
+# bm25 weights for (path, title, desc, body, solution); path is not indexed
+COLUMN_WEIGHTS = (0.0, 10.0, 4.0, 1.0, 1.0)
+TERM = re.compile(r'\w+', re.UNICODE)
+HIGHLIGHT_START, HIGHLIGHT_END = '\x02', '\x03'
+
+
+def _document(page):
+    meta = page.meta
+    return (page.path, str(meta.get('title') or ''), str(meta.get('desc') or ''), page.body, str(meta.get('solution_content') or ''))
+
+
+def _signature(document):
+    return hashlib.sha1('\0'.join(document).encode('utf-8', 'surrogateescape')).hexdigest()
+
+
+def build_match_query(query):
+    """Turn free text into an FTS5 query: every word must match, as a prefix."""
+    terms = TERM.findall(query)
+    return ' '.join('"%s"*' % term for term in terms[:16])
+
+
+# --- 3. SEARCH INDEX ---
+class SearchIndex:
+    """Full-text index over the published posts, stored in SQLite FTS5.
+
+    Titles, descriptions, bodies and solutions are tokenized with
+    ``unicode61 remove_diacritics 2``, so "premio" finds "Prêmio". The index
+    lives on disk and is updated one file at a time from the content
+    watcher; ``sync`` only touches documents whose text changed.
+
+    Configuration:
+        SEARCH_INDEX_PATH  SQLite file (defaults to the instance folder)
+    """
+
+    def __init__(self, app=None):
+        self.path = None
+        self.ready = threading.Event()
+        self._local = threading.local()
+        self._write_lock = threading.Lock()
+        os.register_at_fork(after_in_child=self._after_fork)
+        if app is not None:
+            self.init_app(app)
+
+    def _after_fork(self):
+        self._local = threading.local()
+        self._write_lock = threading.Lock()
+
+    def init_app(self, app):
+        app.config.setdefault('SEARCH_INDEX_PATH', os.path.join(app.instance_path, 'search.db'))
+        self.path = app.config['SEARCH_INDEX_PATH']
+        os.makedirs(os.path.dirname(os.path.abspath(self.path)), exist_ok=True)
+        conn = self._connect()
+        conn.execute('CREATE TABLE IF NOT EXISTS search_documents (path TEXT PRIMARY KEY, signature TEXT NOT NULL)')
+        conn.execute('''CREATE VIRTUAL TABLE IF NOT EXISTS search_fts USING fts5(
+            path UNINDEXED, title, desc, body, solution, tokenize='unicode61 remove_diacritics 2')''')
+        app.extensions['search'] = self
+
+    def _connect(self):
+        conn = getattr(self._local, 'conn', None)
+        if conn is None:
+            conn = sqlite3.connect(self.path, timeout=10, isolation_level=None)
+            conn.execute('PRAGMA journal_mode=WAL')
+            conn.execute('PRAGMA synchronous=NORMAL')
+            self._local.conn = conn
+        return conn
+
+    # --- Indexing ---
+    def sync(self, pages):
+        """Bring the index in line with ``pages``, re-indexing only what changed."""
+        started = time.perf_counter()
+        published = {p.path: p for p in pages if p.meta.get('status') == 'published'}
+        conn = self._connect()
+        known = dict(conn.execute('SELECT path, signature FROM search_documents'))
+        changed = self._apply(published.values(), [path for path in known if path not in published], known)
+        logger.info('Search index synced (%d documents changed) in %.2fs', changed, time.perf_counter() - started)
+        self.ready.set()
+        return changed
+
+    def update(self, pages, paths):
+        """Re-index the given page paths after a content change (removed pages are dropped)."""
+        updated, removed = [], []
+        for path in paths:
+            page = pages.get(path)
+            if page is not None and page.meta.get('status') == 'published':
+                updated.append(page)
+            else:
+                removed.append(path)
+        return self._apply(updated, removed)
+
+    def _apply(self, pages, removed, known=None):
+        changed = 0
+        with self._write_lock:
+            conn = self._connect()
+            conn.execute('BEGIN IMMEDIATE')
+            try:
+                for path in removed:
+                    conn.execute('DELETE FROM search_fts WHERE path = ?', (path,))
+                    conn.execute('DELETE FROM search_documents WHERE path = ?', (path,))
+                    changed += 1
+                for page in pages:
+                    document = _document(page)
+                    signature = _signature(document)
+                    if known is not None and known.get(page.path) == signature:
+                        continue
+                    conn.execute('DELETE FROM search_fts WHERE path = ?', (page.path,))
+                    conn.execute('INSERT INTO search_fts (path, title, desc, body, solution) VALUES (?, ?, ?, ?, ?)', document)
+                    conn.execute('INSERT OR REPLACE INTO search_documents VALUES (?, ?)', (page.path, signature))
+                    changed += 1
+                conn.execute('COMMIT')
+            except Exception:
+                conn.execute('ROLLBACK')
+                raise
+        return changed
+
+    # --- Querying ---
+    def search(self, query, limit=20, offset=0, paths=None):
+        """Return (total, [(path, snippet Markup), ...]) for ``query``, best matches first.
+
+        With ``paths``, hits outside it (e.g. unpublished since the last sync)
+        are left out of both the results and the total.
+        """
+        match = build_match_query(query)
+        if not match:
+            return 0, []
+        conn = self._connect()
+        ranked = [row[0] for row in conn.execute(
+            'SELECT path FROM search_fts WHERE search_fts MATCH ? ORDER BY bm25(search_fts, %s)'
+            % ', '.join(map(str, COLUMN_WEIGHTS)), (match,))]
+        if paths is not None:
+            ranked = [path for path in ranked if path in paths]
+        page = ranked[offset:offset + limit]
+        if not page:
+            return len(ranked), []
+        snippets = dict(conn.execute(
+            'SELECT path, snippet(search_fts, -1, ?, ?, ?, 16) FROM search_fts WHERE search_fts MATCH ? AND path IN (%s)'
+            % ', '.join('?' * len(page)), (HIGHLIGHT_START, HIGHLIGHT_END, '…', match, *page)))
+        return len(ranked), [(path, self._highlight(snippets[path])) for path in page if path in snippets]
+
+    def _highlight(self, snippet):
+        return Markup(str(escape(snippet)).replace(HIGHLIGHT_START, '<mark>').replace(HIGHLIGHT_END, '</mark>'))
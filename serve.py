@@ -0,0 +1,201 @@
+# --- 1. IMPORTS ---
+import logging
+import os
+import signal
+import socket
+import time
+import click
+import waitress
+from blinker import Namespace
+from flask import current_app
+from flask.cli import with_appcontext
+from waitress import wasyncore
+from waitress.channel import HTTPChannel
+
+logger = logging.getLogger(__name__)
+
+# Sent in every process about to serve requests, before it serves anything: each
+# forked worker right after the fork, or the single process of '--workers 1'.
+# Start background threads here (threads do not survive fork).
+worker_started = Namespace().signal('worker-started')
+# Sent in the pre-fork master once it is warm, before the first fork: stop
+# background threads here, the master only supervises and every worker runs its own.
+master_ready = Namespace().signal('master-ready')
+
+
+# --- 2. READINESS ---
+def wait_until_ready(app, timeout):
+    """Poll /readyz in-process until it answers 200; False if ``timeout`` runs out."""
+    client = app.test_client()
+    deadline = time.monotonic() + timeout
+    while True:
+        if client.get('/readyz').status_code == 200:
+            return True
+        if time.monotonic() >= deadline:
+            return False
+        time.sleep(0.2)
+
+
+def create_server(app, **options):
+    """waitress.create_server, with its task queue timed for admission control (see admission.py)."""
+    server = waitress.create_server(app, **options)
+    admission = app.extensions.get('admission')
+    if admission is not None:
+        admission.instrument(server.task_dispatcher)
+    return server
+
+
+# --- 3. WORKER PROCESS ---
+def _busy(channel):
+    return bool(channel.requests or channel.request is not None or channel.total_outbufs_len)
+
+
+def run_worker(app, sock, options, graceful_timeout):
+    """Serve ``sock`` with waitress until SIGTERM, then drain in-flight requests."""
+    stopping = []
+    signal.signal(signal.SIGTERM, lambda *_: stopping.append(True))
+    signal.signal(signal.SIGINT, signal.SIG_IGN)  # the master turns Ctrl-C into SIGTERM
+    signal.signal(signal.SIGHUP, signal.SIG_IGN)
+    worker_started.send(app)
+
+    server = create_server(app, sockets=[sock], **options)
+    while not stopping:
+        wasyncore.loop(timeout=0.5, map=server._map, count=1)
+
+    # Stop accepting (other workers still do), let open requests finish
+    server.del_channel()
+    sock.close()
+    deadline = time.monotonic() + graceful_timeout
+    while time.monotonic() < deadline:
+        channels = [c for c in list(server._map.values()) if isinstance(c, HTTPChannel)]
+        for channel in channels:
+            if not _busy(channel):
+                channel.handle_close()
+        if not any(_busy(c) for c in channels):
+            break
+        wasyncore.loop(timeout=0.2, map=server._map, count=1)
+    server.task_dispatcher.shutdown(timeout=max(0.0, deadline - time.monotonic()))
+
+
+# --- 4. MASTER PROCESS ---
+class Master:
+    """Pre-fork supervisor: one listening socket shared by ``workers`` processes.
+
+    Signals: TERM/INT stop gracefully; HUP replaces every worker with a fresh
+    one (new workers start before the old ones drain, so nothing is refused).
+    Workers that die unexpectedly are replaced. Code changes still need a
+    restart of the master, which is the process that imported the app.
+    """
+
+    def __init__(self, app, sock, workers, options, graceful_timeout):
+        self.app = app
+        self.sock = sock
+        self.workers = workers
+        self.options = options
+        self.graceful_timeout = graceful_timeout
+        self.children = {}
+        self.generation = 0
+        self.stopping = False
+        self.reloading = False
+
+    def spawn(self):
+        pid = os.fork()
+        if pid == 0:
+            code = 0
+            try:
+                run_worker(self.app, self.sock, self.options, self.graceful_timeout)
+            except BaseException:
+                logger.exception('Worker %d crashed', os.getpid())
+                code = 1
+            finally:
+                os._exit(code)
+        self.children[pid] = self.generation
+        logger.info('Started worker %d (generation %d)', pid, self.generation)
+
+    def _signal(self, signum, frame):
+        if signum == signal.SIGHUP:
+            self.reloading = True
+        else:
+            self.stopping = True
+
+    def reap(self):
+        while self.children:
+            try:
+                pid, status = os.waitpid(-1, os.WNOHANG)
+            except ChildProcessError:
+                return
+            if pid == 0:
+                return
+            generation = self.children.pop(pid, None)
+            if generation == self.generation and not self.stopping:
+                logger.warning('Worker %d exited with status %d, replacing it', pid, os.waitstatus_to_exitcode(status))
+                time.sleep(1)  # do not spin if workers crash on start
+                self.spawn()
+
+    def signal_children(self, signum, pids=None):
+        for pid in pids if pids is not None else list(self.children):
+            try:
+                os.kill(pid, signum)
+            except ProcessLookupError:
+                pass
+
+    def run(self):
+        for signum in (signal.SIGTERM, signal.SIGINT, signal.SIGHUP):
+            signal.signal(signum, self._signal)
+        for _ in range(self.workers):
+            self.spawn()
+
+        while not self.stopping:
+            if self.reloading:
+                self.reloading = False
+                old = list(self.children)
+                self.generation += 1
+                for _ in range(self.workers):
+                    self.spawn()
+                self.signal_children(signal.SIGTERM, old)
+            self.reap()
+            time.sleep(0.5)
+
+        self.signal_children(signal.SIGTERM)
+        deadline = time.monotonic() + self.graceful_timeout + 5
+        while self.children and time.monotonic() < deadline:
+            self.reap()
+            time.sleep(0.1)
+        self.signal_children(signal.SIGKILL)
+        self.sock.close()
+
+
+# --- 5. CLI COMMAND ---
+@click.command('serve')
+@click.option('--host', default='0.0.0.0', show_default=True)
+@click.option('--port', default=5000, show_default=True)
+@click.option('--threads', default=8, show_default=True, help='Request threads per process.')
+@click.option('--connection-limit', default=200, show_default=True, help='Open connections per process.')
+@click.option('--backlog', default=1024, show_default=True, help='Listen backlog of the socket.')
+@click.option('--channel-timeout', default=60, show_default=True, help='Seconds before an inactive connection is closed.')
+@click.option('--workers', '-w', default=1, show_default=True, help='Processes sharing the socket (0 = one per CPU).')
+@click.option('--graceful-timeout', default=30, show_default=True, help='Seconds a stopping worker may spend on open requests.')
+@click.option('--warm-timeout', default=120, show_default=True, help='Seconds to wait for /readyz before forking workers.')
+@with_appcontext
+def serve_command(host, port, threads, connection_limit, backlog, channel_timeout, workers, graceful_timeout, warm_timeout):
+    """Run the site with waitress, optionally as several pre-forked processes."""
+    app = current_app._get_current_object()
+    options = {'threads': threads, 'connection_limit': connection_limit, 'backlog': backlog,
+               'channel_timeout': channel_timeout, 'ident': 'nemo'}
+    workers = workers or os.cpu_count() or 1
+    if workers == 1:
+        logging.basicConfig()
+        worker_started.send(app)
+        server = create_server(app, host=host, port=port, **options)
+        server.print_listen('Serving on http://{}:{}')
+        server.run()
+        return
+
+    sock = socket.create_server((host, port), backlog=backlog)
+    sock.set_inheritable(True)
+    # Warm up once in the master so every worker starts with ready caches (copy-on-write)
+    if not wait_until_ready(app, warm_timeout):
+        click.echo('Not ready after %ds, starting workers anyway' % warm_timeout, err=True)
+    master_ready.send(app)
+    click.echo('Serving on http://%s:%d with %d workers x %d threads' % (host, port, workers, threads))
+    Master(app, sock, workers, options, graceful_timeout).run()
@@ -0,0 +1,97 @@
+# --- 1. IMPORTS ---
+import logging
+from sqlalchemy import event
+
+logger = logging.getLogger(__name__)
+
+# --- 2. PROFILES ---
+# Pragmas applied to every new SQLite connection, in order. journal_mode is
+# stored in the database file, the others only last as long as the connection.
+PROFILES = {
+    'production': {
+        'journal_mode': 'WAL',
+        'synchronous': 'NORMAL',    # durable at checkpoints; safe with WAL
+        'busy_timeout': 5000,       # ms to wait for a writer instead of "database is locked"
+        'mmap_size': 256 * 1024 * 1024,
+        'cache_size': -16000,       # negative = KiB, i.e. 16 MB of page cache per connection
+        'foreign_keys': 'ON',
+        'temp_store': 'MEMORY',
+    },
+    'durable': {
+        'journal_mode': 'WAL',
+        'synchronous': 'FULL',
+        'busy_timeout': 5000,
+        'foreign_keys': 'ON',
+    },
+    # Plain SQLite defaults, e.g. for network filesystems where WAL does not work
+    'default': {},
+}
+
+
+# --- 3. FLASK INTEGRATION ---
+class SQLiteProfile:
+    """Applies a pragma profile and sensible pool settings to the SQLite engine.
+
+    Each waitress thread checks a connection out of a small QueuePool, so
+    connections (and their page cache) are reused instead of reopened per
+    request, and are handed between threads, which is safe because the pool
+    never lets two threads use one at the same time. Non-SQLite databases
+    are left alone.
+
+    Flask-SQLAlchemy creates its engine in ``init_app``, so set this up
+    first and ``attach`` the SQLAlchemy instance afterwards::
+
+        profile = SQLiteProfile(app)
+        db = SQLAlchemy(app)
+        profile.attach(db)
+
+    Configuration:
+        SQLITE_PROFILE    name in PROFILES, or None to skip the pragmas
+        SQLITE_PRAGMAS    extra pragmas, overriding the profile's values
+        SQLITE_POOL_SIZE  connections kept open (about the server thread count)
+    """
+
+    def __init__(self, app=None):
+        self.app = None
+        self.pragmas = {}
+        if app is not None:
+            self.init_app(app)
+
+    def init_app(self, app):
+        app.config.setdefault('SQLITE_PROFILE', 'production')
+        app.config.setdefault('SQLITE_PRAGMAS', {})
+        app.config.setdefault('SQLITE_POOL_SIZE', 8)
+        if not app.config['SQLALCHEMY_DATABASE_URI'].startswith('sqlite'):
+            return
+        if app.config['SQLITE_PROFILE']:
+            self.pragmas.update(PROFILES[app.config['SQLITE_PROFILE']])
+        self.pragmas.update(app.config['SQLITE_PRAGMAS'])
+
+        self.app = app
+        options = app.config.setdefault('SQLALCHEMY_ENGINE_OPTIONS', {})
+        options.setdefault('pool_size', app.config['SQLITE_POOL_SIZE'])
+        options.setdefault('max_overflow', app.config['SQLITE_POOL_SIZE'])
+        options.setdefault('pool_timeout', 10)
+        connect_args = options.setdefault('connect_args', {})
+        connect_args.setdefault('check_same_thread', False)
+        connect_args.setdefault('timeout', self.pragmas.get('busy_timeout', 5000) / 1000)
+        app.extensions['sqlite_profile'] = self
+
+    def attach(self, db):
+        """Apply the pragmas to every connection ``db``'s engine opens from now on."""
+        if self.app is None:
+            return
+        with self.app.app_context():
+            event.listen(db.engine, 'connect', self.apply)
+
+    def apply(self, dbapi_connection, connection_record=None):
+        cursor = dbapi_connection.cursor()
+        try:
+            for name, value in self.pragmas.items():
+                cursor.execute('PRAGMA %s=%s' % (name, value))
+            if self.pragmas.get('journal_mode', '').upper() == 'WAL':
+                mode = cursor.execute('PRAGMA journal_mode').fetchone()[0]
+                if mode.upper() != 'WAL':
+                    logger.warning('SQLite refused WAL mode (journal_mode=%s)', mode)
+        finally:
+            cursor.close()
@@ -0,0 +1,55 @@
+// Appends the next page of a listing, fetched from /api/posts, to its container.
+// Every ".load-more" link carries the section and the cursor of the next page;
+// without JavaScript it is a plain link to that page.
+const postsApi = document.currentScript.dataset.api;
+
+function setupLoadMore(link) {
+    const target = document.querySelector(link.dataset.target);
+    if (!target) return;
+    let loading = false;
+    let observer = null;
+
+    const loadNextPage = async () => {
+        if (loading || !link.dataset.nextCursor) return;
+        loading = true;
+        try {
+            const params = new URLSearchParams({ section: link.dataset.section, cursor: link.dataset.nextCursor });
+            const response = await fetch(`${postsApi}?${params}`, { headers: { 'Accept': 'application/json' } });
+            if (!response.ok) throw new Error(`HTTP ${response.status}`);
+            const page = await response.json();
+
+            target.insertAdjacentHTML('beforeend', page.items.map(item => item.html).join(''));
+            target.dispatchEvent(new CustomEvent('cards-added', { bubbles: true }));
+
+            if (page.next_cursor) {
+                link.dataset.nextCursor = page.next_cursor;
+                link.href = link.href.replace(/=[^=&]*$/, `=${encodeURIComponent(page.next_cursor)}`);
+            } else {
+                link.parentElement.remove();
+                if (observer) observer.disconnect();
+            }
+        } catch (error) {
+            // Leave the link in place: it still works as a normal page link
+            console.error('Could not load more posts:', error);
+        } finally {
+            loading = false;
+        }
+    };
+
+    link.addEventListener('click', event => {
+        event.preventDefault();
+        loadNextPage();
+    });
+
+    // Lists marked data-autoload keep growing as the visitor scrolls down
+    if ('autoload' in link.dataset && 'IntersectionObserver' in window) {
+        observer = new IntersectionObserver(entries => {
+            if (entries.some(entry => entry.isIntersecting)) loadNextPage();
+        }, { rootMargin: '600px 0px' });
+        observer.observe(link);
+    }
+}
+
+document.addEventListener('DOMContentLoaded', () => {
+    document.querySelectorAll('.load-more[data-next-cursor]').forEach(setupLoadMore);
+});
@@ -1,67 +1,110 @@
-import * as pdfjsLib from '../pdfjs/build/pdf.mjs';
-
-document.addEventListener("DOMContentLoaded", function() {
-    // Set the path to the worker script
-    pdfjsLib.GlobalWorkerOptions.workerSrc = '/static/pdfjs/build/pdf.worker.mjs';
-
-    // Find all links with the class 'pdf-embed'
-    const pdfLinks = document.querySelectorAll('a.pdf-embed');
-
-    pdfLinks.forEach(link => {
-        const url = link.href;
-        
-        // Create a container for our viewer
-        const viewerContainer = document.createElement('div');
-        viewerContainer.classList.add('pdf-viewer-container');
-        
-        // Create the download button
-        const downloadBtn = document.createElement('a');
-        downloadBtn.href = url;
-        downloadBtn.textContent = 'Fazer Download do PDF';
-        downloadBtn.classList.add('pdf-download-btn');
-        downloadBtn.setAttribute('download', url.split('/').pop());
-        
-        // Add the button to our container (it will be at the end)
-        viewerContainer.appendChild(downloadBtn);
-        
-        // Replace the original link with our new viewer container
-        link.parentNode.replaceChild(viewerContainer, link);
-
-        // --- NEW: Asynchronous function to render all pages ---
-        const renderAllPages = async (pdf) => {
-            for (let pageNum = 1; pageNum <= pdf.numPages; pageNum++) {
-                const page = await pdf.getPage(pageNum);
-                
-                const scale = 1.5;
-                const viewport = page.getViewport({ scale: scale });
-
-                // Create a canvas for this specific page
-                const canvas = document.createElement('canvas');
-                const context = canvas.getContext('2d');
-                canvas.height = viewport.height;
-                canvas.width = viewport.width;
-
-                // Insert the canvas before the download button
-                viewerContainer.insertBefore(canvas, downloadBtn);
-
-                // Render PDF page into canvas context
-                const renderContext = {
-                    canvasContext: context,
-                    viewport: viewport
-                };
-                await page.render(renderContext).promise;
-                console.log(`Page ${pageNum} rendered`);
-            }
-        };
-
-        // --- Initialize PDF.js ---
-        const loadingTask = pdfjsLib.getDocument(url);
-        loadingTask.promise.then(function(pdf) {
-            console.log('PDF loaded');
-            renderAllPages(pdf); // Call our new function to render every page
-        }, function (reason) {
+// The template passes the (fingerprinted) pdf.js URLs on this script tag
+const pdfScript = document.querySelector('script[data-pdfjs-src]');
+
+// Page sizes extracted on the server: { href: { pages: [[width, height], ...] } }
+const manifestTag = document.getElementById('pdf-manifest');
+const pdfManifest = manifestTag ? JSON.parse(manifestTag.textContent) : {};
+
+// pdf.js itself is only downloaded once the first page scrolls into view
+let pdfjsPromise = null;
+function loadPdfjs() {
+    if (!pdfjsPromise) {
+        pdfjsPromise = import(pdfScript.dataset.pdfjsSrc).then(function(pdfjsLib) {
+            pdfjsLib.GlobalWorkerOptions.workerSrc = pdfScript.dataset.pdfjsWorker;
+            return pdfjsLib;
+        });
+    }
+    return pdfjsPromise;
+}
+
+function createViewer(link) {
+    const url = link.href;
+    const layout = pdfManifest[link.getAttribute('href')];
+
+    // Create a container for our viewer
+    const viewerContainer = document.createElement('div');
+    viewerContainer.classList.add('pdf-viewer-container');
+
+    // Create the download button
+    const downloadBtn = document.createElement('a');
+    downloadBtn.href = url;
+    downloadBtn.textContent = 'Fazer Download do PDF';
+    downloadBtn.classList.add('pdf-download-btn');
+    downloadBtn.setAttribute('download', url.split('/').pop());
+
+    // Add the button to our container (it will be at the end)
+    viewerContainer.appendChild(downloadBtn);
+
+    // Replace the original link with our new viewer container
+    link.parentNode.replaceChild(viewerContainer, link);
+
+    // Open the document once, fetching only the byte ranges the visible pages need
+    let documentPromise = null;
+    const getDocument = () => {
+        if (!documentPromise) {
+            documentPromise = loadPdfjs().then(pdfjsLib =>
+                pdfjsLib.getDocument({ url: url, disableAutoFetch: true, disableStream: true }).promise);
+        }
+        return documentPromise;
+    };
+
+    const renderPage = async (placeholder) => {
+        try {
+            const pdf = await getDocument();
+            const page = await pdf.getPage(Number(placeholder.dataset.page));
+
+            // Render at the displayed width instead of a fixed scale
+            const baseViewport = page.getViewport({ scale: 1 });
+            const scale = placeholder.clientWidth * (window.devicePixelRatio || 1) / baseViewport.width;
+            const viewport = page.getViewport({ scale: scale });
+
+            const canvas = document.createElement('canvas');
+            canvas.width = Math.floor(viewport.width);
+            canvas.height = Math.floor(viewport.height);
+            placeholder.appendChild(canvas);
+
+            await page.render({ canvasContext: canvas.getContext('2d'), viewport: viewport }).promise;
+        } catch (reason) {
             console.error(reason);
-            viewerContainer.textContent = "Error: Could not load PDF.";
+            placeholder.textContent = "Error: Could not load PDF.";
+        }
+    };
+
+    // Pages are rendered when they get close to the viewport, and only once
+    const observer = new IntersectionObserver((entries) => {
+        entries.forEach(entry => {
+            if (entry.isIntersecting) {
+                observer.unobserve(entry.target);
+                renderPage(entry.target);
+            }
         });
+    }, { rootMargin: '400px 0px' });
+
+    const addPlaceholder = (pageNum, width, height) => {
+        const placeholder = document.createElement('div');
+        placeholder.classList.add('pdf-page');
+        placeholder.dataset.page = pageNum;
+        placeholder.style.aspectRatio = `${width} / ${height}`;
+        viewerContainer.insertBefore(placeholder, downloadBtn);
+        observer.observe(placeholder);
+    };
+
+    if (layout) {
+        layout.pages.forEach(([width, height], index) => addPlaceholder(index + 1, width, height));
+        return;
+    }
+
+    // No server-side layout (e.g. external PDF): ask pdf.js for the page sizes first
+    getDocument().then(async (pdf) => {
+        for (let pageNum = 1; pageNum <= pdf.numPages; pageNum++) {
+            const viewport = (await pdf.getPage(pageNum)).getViewport({ scale: 1 });
+            addPlaceholder(pageNum, viewport.width, viewport.height);
+        }
+    }, function (reason) {
+        console.error(reason);
+        viewerContainer.textContent = "Error: Could not load PDF.";
     });
-});
\ No newline at end of file
+}
+
+// Find all links with the class 'pdf-embed'
+document.querySelectorAll('a.pdf-embed').forEach(createViewer);
\ No newline at end of file
@@ -1,15 +1,17 @@
 function setupResponsiveShowcase(showcase) {
-    const cards = showcase.querySelectorAll('.news-post-item');
+    // Cards can be appended later (see infinite-scroll.js), so always query them fresh
+    const getCards = () => showcase.querySelectorAll('.news-post-item');
     const buttonContainer = showcase.nextElementSibling;
 
     // Exit if there are no cards or a button container to manage
-    if (cards.length === 0 || !buttonContainer) return;
+    if (getCards().length === 0 || !buttonContainer) return;
 
     const showMoreBtn = buttonContainer.querySelector('.show-more-btn');
     const showLessBtn = buttonContainer.querySelector('.show-less-btn'); // This might be null
 
     // --- Core function to hide/show cards ---
     const updateVisibleCards = () => {
+        const cards = getCards();
         cards.forEach(card => card.style.display = 'block');
         if (cards.length === 0) return;
 
@@ -39,7 +41,7 @@ function setupResponsiveShowcase(showcase) {
         // Otherwise, it's just a link to another page, and we let the browser handle it.
         if (showLessBtn) {
             showMoreBtn.addEventListener('click', () => {
-                cards.forEach(card => card.style.display = 'block');
+                getCards().forEach(card => card.style.display = 'block');
                 showMoreBtn.style.display = 'none';
                 showLessBtn.style.display = 'inline-block';
             });
@@ -53,6 +55,15 @@ function setupResponsiveShowcase(showcase) {
         });
     }
 
+    // Newly loaded cards follow the current state: expanded shows them, collapsed hides them
+    showcase.addEventListener('cards-added', () => {
+        if (showLessBtn && showLessBtn.style.display === 'inline-block') {
+            getCards().forEach(card => card.style.display = 'block');
+        } else {
+            updateVisibleCards();
+        }
+    });
+
     // Initial run and setup resize listener
     updateVisibleCards();
     window.addEventListener('resize', updateVisibleCards);
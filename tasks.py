@@ -0,0 +1,28 @@
+# --- 1. IMPORTS ---
+import os
+from flask import current_app
+from extensions import db, jobs, pages, uploads
+from models import Post, User
+
+
+# --- 2. BACKGROUND JOBS ---
+# Queued by the auth and editor routes; run by the job queue's workers (see jobs.py)
+@jobs.task('files.delete')
+def delete_file(path):
+    if os.path.exists(path):
+        os.remove(path)
+
+@jobs.task('uploads.gc')
+def collect_upload_garbage():
+    """Drop blobs that no post, user or Markdown file mentions any more."""
+    texts = [value for row in db.session.execute(db.select(Post.image_path, Post.content, Post.solution_content)) for value in row]
+    texts += [value for row in db.session.execute(db.select(User.profile_image_path, User.about_me)) for value in row]
+    for page in list(pages):
+        with open(page.filename, encoding='utf-8', errors='replace') as handler:
+            texts.append(handler.read())
+    deleted, freed, spooled = uploads.collect_garbage(uploads.referenced_digests(texts))
+    current_app.logger.info('Upload GC: deleted %d blobs (%d bytes) and %d abandoned spool files', deleted, freed, spooled)
+
+def schedule_upload_gc():
+    # Coalesced: edits within a minute of each other share one collection
+    jobs.enqueue('uploads.gc', key='uploads.gc', delay=60)
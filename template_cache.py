@@ -0,0 +1,115 @@
+# --- 1. IMPORTS ---
+import os
+import threading
+from jinja2 import FileSystemBytecodeCache, nodes
+from jinja2.ext import Extension
+from markupsafe import Markup
+from response_cache import MemoryBackend, TemplatesVersion
+
+
+# --- 2. FRAGMENT ENTRY ---
+class CachedFragment:
+    __slots__ = ('html', 'generation')
+
+    def __init__(self, html, generation):
+        self.html = html
+        self.generation = generation
+
+    @property
+    def size(self):
+        return len(self.html) + 128
+
+
+# --- 3. JINJA EXTENSION ---
+class FragmentCacheExtension(Extension):
+    """``{% cache 'name', part, ... %}...{% endcache %}`` renders the body once per key.
+
+    Every value the body depends on besides the content version must be part
+    of the key (e.g. ``logado`` for markup that differs for editors). Without
+    a ``fragment_cache`` on the environment the body is simply rendered.
+    """
+    tags = {'cache'}
+
+    def __init__(self, environment):
+        super().__init__(environment)
+        environment.extend(fragment_cache=None)
+
+    def parse(self, parser):
+        lineno = next(parser.stream).lineno
+        parts = [parser.parse_expression()]
+        while parser.stream.skip_if('comma'):
+            parts.append(parser.parse_expression())
+        body = parser.parse_statements(('name:endcache',), drop_needle=True)
+        return nodes.CallBlock(self.call_method('_render', [nodes.List(parts)]), [], [], body).set_lineno(lineno)
+
+    def _render(self, parts, caller):
+        cache = self.environment.fragment_cache
+        if cache is None:
+            return caller()
+        return cache.render(parts, caller)
+
+
+# --- 4. FLASK INTEGRATION ---
+class TemplateCache:
+    """Jinja bytecode cache on disk plus the fragment cache behind ``{% cache %}``.
+
+    Compiled templates are written to a folder shared by every worker, so a
+    new process skips parsing and compiling them. Fragments are kept per
+    process in an LRU and tagged with the content version and a fingerprint
+    of the templates; a fragment from an older generation is rendered again.
+
+    Configuration:
+        TEMPLATE_BYTECODE_CACHE_PATH  folder for compiled templates (None to disable)
+        FRAGMENT_CACHE_MAX_BYTES      byte budget for cached fragments (0 to disable)
+    """
+
+    def __init__(self, app=None, version=None):
+        self.version = version or (lambda: None)
+        self.backend = None
+        self.hits = self.misses = 0
+        self._stats_lock = threading.Lock()
+        if app is not None:
+            self.init_app(app)
+
+    def init_app(self, app):
+        app.config.setdefault('TEMPLATE_BYTECODE_CACHE_PATH', os.path.join(app.instance_path, 'jinja-bytecode'))
+        app.config.setdefault('FRAGMENT_CACHE_MAX_BYTES', 8 * 1024 * 1024)
+        self.app = app
+        path = app.config['TEMPLATE_BYTECODE_CACHE_PATH']
+        if path:
+            os.makedirs(path, exist_ok=True)
+            app.jinja_env.bytecode_cache = FileSystemBytecodeCache(path)
+        app.jinja_env.add_extension(FragmentCacheExtension)
+        if app.config['FRAGMENT_CACHE_MAX_BYTES']:
+            self.backend = MemoryBackend(app.config['FRAGMENT_CACHE_MAX_BYTES'])
+            app.jinja_env.fragment_cache = self
+        self.templates_version = TemplatesVersion(app)
+        app.extensions['template_cache'] = self
+
+    @property
+    def generation(self):
+        return '%s:%s' % (self.version(), self.templates_version())
+
+    def render(self, parts, caller):
+        # Templates reload from disk in debug mode, so the fingerprint would lie
+        if self.app.debug:
+            return caller()
+        key = '\0'.join(map(str, parts))
+        generation = self.generation
+        entry = self.backend.get(key)
+        hit = entry is not None and entry.generation == generation
+        with self._stats_lock:
+            if hit:
+                self.hits += 1
+            else:
+                self.misses += 1
+        if hit:
+            return entry.html
+        html = Markup(caller())
+        self.backend.set(key, CachedFragment(html, generation))
+        return html
+
+    def stats(self):
+        with self._stats_lock:
+            return {'hits': self.hits, 'misses': self.misses, 'entries': len(self.backend or ()),
+                    'bytes': self.backend.current_bytes if self.backend else 0}
@@ -0,0 +1,238 @@
+# --- 1. IMPORTS ---
+import hashlib
+import mimetypes
+import os
+import posixpath
+import re
+import shutil
+import tempfile
+import time
+from flask import Request, current_app, send_from_directory, url_for
+from werkzeug.utils import secure_filename
+
+# --- 2. CONSTANTS ---
+# Sharded content-addressed names: uploads/ab/cd/abcd...<64 hex>.ext
+BLOB_NAME = re.compile(r'^([0-9a-f]{2})/([0-9a-f]{2})/\1\2[0-9a-f]{60}(\.[a-z0-9]{1,8})?$')
+DIGEST = re.compile(r'[0-9a-f]{64}')
+# Spellings normalized so the same bytes never get two names
+EXTENSIONS = {'.jpeg': '.jpg', '.jpe': '.jpg', '.tif': '.tiff', '.htm': '.html'}
+
+
+def normalized_extension(filename):
+    ext = os.path.splitext(secure_filename(filename or ''))[1].lower()
+    if not re.match(r'^\.[a-z0-9]{1,8}$', ext):
+        return ''
+    return EXTENSIONS.get(ext, ext)
+
+
+# --- 3. HASHING SPOOL ---
+class HashingFile:
+    """Temporary file that hashes whatever is written to it.
+
+    The multipart parser writes each uploaded file into one of these as the
+    request body arrives, so the upload is never held in memory and its
+    digest is known the moment parsing ends. The file is deleted on close
+    unless the store moved it into place.
+    """
+
+    def __init__(self, directory):
+        self._file = tempfile.NamedTemporaryFile('w+b', dir=directory, prefix='upload-', delete=False)
+        self.name = self._file.name
+        self._hash = hashlib.sha256()
+        self.size = 0
+
+    def write(self, data):
+        self._hash.update(data)
+        self.size += len(data)
+        return self._file.write(data)
+
+    def hexdigest(self):
+        return self._hash.hexdigest()
+
+    def __getattr__(self, name):
+        # read/readline/seek/tell/flush for FileStorage and friends
+        return getattr(self._file, name)
+
+    def __iter__(self):
+        return iter(self._file)
+
+    def close(self):
+        self._file.close()
+        try:
+            os.remove(self.name)
+        except FileNotFoundError:  # Moved into the store
+            pass
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
+
+
+class UploadRequest(Request):
+    """Request whose file parts are spooled straight into the upload store's temp folder."""
+
+    def _get_file_stream(self, total_content_length, content_type, filename=None, content_length=None):
+        store = current_app.extensions.get('uploads')
+        if store is None:
+            return super()._get_file_stream(total_content_length, content_type, filename, content_length)
+        return HashingFile(store.tmp_folder)
+
+
+# --- 4. STORE ---
+class StoredBlob:
+    __slots__ = ('digest', 'path', 'url', 'size', 'created')
+
+    def __init__(self, digest, path, url, size, created):
+        self.digest = digest
+        self.path = path        # 'static/uploads/ab/cd/<digest>.jpg', as kept in the database
+        self.url = url
+        self.size = size
+        self.created = created  # False when the same bytes were already stored
+
+
+class UploadStore:
+    """Content-addressed storage for user uploads under ``static/uploads/``.
+
+    ``save(file_storage)`` stores each distinct blob once, named after its
+    SHA-256 in two levels of sharded folders, and returns its stable URL.
+    Those names never change content, so the static endpoint serves them with
+    ``Cache-Control: immutable``. Uploads arrive through ``UploadRequest``,
+    which hashes them into a temp file while the body is parsed; oversized
+    bodies are refused with a 413 by MAX_CONTENT_LENGTH before that.
+
+    Configuration:
+        MAX_CONTENT_LENGTH  largest request body accepted, in bytes
+        UPLOAD_FOLDER       where blobs are stored (relative to the app root)
+        UPLOAD_TMP_FOLDER   spool folder for uploads in flight (keep it off the static folder)
+        UPLOAD_CHUNK_SIZE   read size when copying streams that were not spooled
+        UPLOAD_MAX_AGE      Cache-Control max-age of the blobs
+        UPLOAD_GC_GRACE     seconds an unreferenced blob is kept by ``collect_garbage``
+    """
+
+    def __init__(self, app=None):
+        if app is not None:
+            self.init_app(app)
+
+    def init_app(self, app):
+        app.config.setdefault('MAX_CONTENT_LENGTH', 16 * 1024 * 1024)
+        app.config.setdefault('UPLOAD_FOLDER', 'static/uploads/')
+        app.config.setdefault('UPLOAD_TMP_FOLDER', os.path.join(app.instance_path, 'upload-tmp'))
+        app.config.setdefault('UPLOAD_CHUNK_SIZE', 64 * 1024)
+        app.config.setdefault('UPLOAD_MAX_AGE', 365 * 24 * 3600)
+        app.config.setdefault('UPLOAD_GC_GRACE', 24 * 3600)
+        self.app = app
+        self.folder = os.path.join(app.root_path, app.config['UPLOAD_FOLDER'])
+        self.tmp_folder = app.config['UPLOAD_TMP_FOLDER']
+        os.makedirs(self.folder, exist_ok=True)
+        os.makedirs(self.tmp_folder, exist_ok=True)
+        app.request_class = UploadRequest
+        # Chain in front of the current static view (the assets one, if any)
+        self._send_static = app.view_functions['static']
+        app.view_functions['static'] = self.send_static_file
+        app.extensions['uploads'] = self
+
+    def blob_name(self, digest, filename):
+        return '%s/%s/%s%s' % (digest[:2], digest[2:4], digest, normalized_extension(filename))
+
+    def save(self, storage):
+        """Store an uploaded ``FileStorage`` (or any binary stream with a filename) once."""
+        stream = getattr(storage, 'stream', storage)
+        if isinstance(stream, HashingFile):
+            spool = stream
+        else:
+            # Not spooled by UploadRequest (tests, CLI imports): copy it through a hashing spool
+            spool = HashingFile(self.tmp_folder)
+            chunk_size = self.app.config['UPLOAD_CHUNK_SIZE']
+            for chunk in iter(lambda: stream.read(chunk_size), b''):
+                spool.write(chunk)
+        try:
+            spool.flush()
+            digest = spool.hexdigest()
+            name = self.blob_name(digest, getattr(storage, 'filename', None))
+            target = os.path.join(self.folder, *name.split('/'))
+            created = not os.path.exists(target)
+            if created:
+                os.makedirs(os.path.dirname(target), exist_ok=True)
+                os.chmod(spool.name, 0o644)
+                try:
+                    os.replace(spool.name, target)
+                except OSError:  # Temp folder on another filesystem
+                    shutil.copyfile(spool.name, target + '.tmp')
+                    os.replace(target + '.tmp', target)
+            else:
+                # Fresh again: garbage collection spares blobs uploaded within its grace period
+                os.utime(target)
+            return StoredBlob(digest, posixpath.join(self.app.config['UPLOAD_FOLDER'].rstrip('/'), name),
+                              self.url(name), spool.size, created)
+        finally:
+            if spool is not stream:
+                spool.close()
+
+    def is_blob(self, path):
+        """True for a stored path ('static/uploads/ab/cd/...') that belongs to this store."""
+        prefix = self.app.config['UPLOAD_FOLDER'].rstrip('/') + '/'
+        return path.startswith(prefix) and BLOB_NAME.match(path[len(prefix):]) is not None
+
+    def collect_garbage(self, referenced, grace=None):
+        """Delete blobs whose digest is not in ``referenced`` and abandoned spool files.
+
+        Only files untouched for ``grace`` seconds go: an image uploaded from
+        the editor is not referenced anywhere until its post is saved.
+        Returns (blobs deleted, bytes freed, spool files deleted).
+        """
+        cutoff = time.time() - (self.app.config['UPLOAD_GC_GRACE'] if grace is None else grace)
+        deleted = freed = 0
+        for cur_path, dirnames, filenames in os.walk(self.folder, topdown=False):
+            for filename in filenames:
+                path = os.path.join(cur_path, filename)
+                name = os.path.relpath(path, self.folder).replace(os.sep, '/')
+                if not BLOB_NAME.match(name) or filename[:64] in referenced:
+                    continue
+                try:
+                    stat = os.stat(path)
+                    if stat.st_mtime < cutoff:
+                        os.remove(path)
+                        deleted += 1
+                        freed += stat.st_size
+                except FileNotFoundError:
+                    pass
+            # Emptied shard folders (bottom-up, so 'ab/cd' goes before 'ab')
+            if cur_path != self.folder and re.match(r'^[0-9a-f]{2}$', os.path.basename(cur_path)):
+                try:
+                    os.rmdir(cur_path)
+                except OSError:  # Not empty
+                    pass
+        spooled = 0
+        for entry in os.scandir(self.tmp_folder):
+            try:
+                if entry.name.startswith('upload-') and entry.stat().st_mtime < cutoff:
+                    os.remove(entry.path)
+                    spooled += 1
+            except FileNotFoundError:
+                pass
+        return deleted, freed, spooled
+
+    def referenced_digests(self, texts):
+        """Every blob digest mentioned in ``texts`` (paths, URLs, HTML or Markdown)."""
+        digests = set()
+        for text in texts:
+            if text:
+                digests.update(DIGEST.findall(text))
+        return digests
+
+    def url(self, name):
+        static_rel = os.path.relpath(self.folder, self.app.static_folder).replace(os.sep, '/')
+        return url_for('static', filename=posixpath.join(static_rel, name))
+
+    def send_static_file(self, filename):
+        static_rel = os.path.relpath(self.folder, self.app.static_folder).replace(os.sep, '/') + '/'
+        if not filename.startswith(static_rel) or not BLOB_NAME.match(filename[len(static_rel):]):
+            return self._send_static(filename)
+        name = filename[len(static_rel):]
+        mimetype = mimetypes.guess_type(name)[0] or 'application/octet-stream'
+        response = send_from_directory(self.folder, name, mimetype=mimetype, max_age=self.app.config['UPLOAD_MAX_AGE'])
+        response.cache_control.public = True
+        response.cache_control.immutable = True
+        return response
@@ -0,0 +1,140 @@
+# --- 1. IMPORTS ---
+import logging
+import threading
+import time
+from collections import OrderedDict
+from flask_login import UserMixin
+from sqlalchemy import select
+from sqlalchemy.exc import SQLAlchemyError
+
+logger = logging.getLogger(__name__)
+
+# Columns copied into snapshots; the password hash deliberately stays in the database
+FIELDS = ('id', 'email', 'name', 'about_me', 'profile_image_path')
+
+
+# --- 2. USER SNAPSHOT ---
+class CachedUser(UserMixin):
+    """Read-only copy of a user row, safe to share between threads and requests.
+
+    Good enough for Flask-Login and templates; code that changes a user must
+    load the ORM object and call ``UserCache.invalidate`` after committing.
+    """
+    __slots__ = FIELDS
+
+    def __init__(self, id, email, name, about_me, profile_image_path):
+        self.id = id
+        self.email = email
+        self.name = name
+        self.about_me = about_me
+        self.profile_image_path = profile_image_path
+
+    def __repr__(self):
+        return '<CachedUser %r>' % self.email
+
+
+# --- 3. USER CACHE ---
+class UserCache:
+    """In-process id -> user and email -> user cache in front of the user table.
+
+    Everything is loaded in one query at startup; afterwards a lookup is a
+    dict access until its entry is older than USER_CACHE_TTL. Unknown ids
+    and emails are cached as misses too, so posts whose author has no
+    account do not query SQLite on every view. Other worker processes see
+    a change at the latest after the TTL.
+
+    Configuration:
+        USER_CACHE_TTL       seconds an entry is trusted
+        USER_CACHE_MAX_SIZE  entries kept per index (least recently used go first)
+    """
+
+    def __init__(self, app=None, db=None, model=None):
+        self._by_id = OrderedDict()
+        self._by_email = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = self.misses = 0
+        if app is not None:
+            self.init_app(app, db, model)
+
+    def init_app(self, app, db, model):
+        app.config.setdefault('USER_CACHE_TTL', 300)
+        app.config.setdefault('USER_CACHE_MAX_SIZE', 1000)
+        self.db = db
+        self.model = model
+        self.ttl = app.config['USER_CACHE_TTL']
+        self.max_size = app.config['USER_CACHE_MAX_SIZE']
+        app.extensions['user_cache'] = self
+
+    def _query(self, *where):
+        statement = select(*(getattr(self.model, field) for field in FIELDS)).where(*where)
+        return [CachedUser(*row) for row in self.db.session.execute(statement)]
+
+    def load_all(self):
+        """Bulk-load every user (up to the size bound). Needs an app context."""
+        try:
+            users = self._query()[:self.max_size]
+        except SQLAlchemyError:
+            # Fresh checkout without 'flask db upgrade' yet: fall back to lazy loading
+            logger.warning('Could not preload users', exc_info=True)
+            self.db.session.rollback()
+            return 0
+        with self._lock:
+            for user in users:
+                self._remember(user.id, user.email, user)
+        return len(users)
+
+    def _remember(self, user_id, email, user):
+        expires = time.monotonic() + self.ttl
+        if user_id is not None:
+            self._by_id[user_id] = (expires, user)
+            self._by_id.move_to_end(user_id)
+        if email is not None:
+            self._by_email[email] = (expires, user)
+            self._by_email.move_to_end(email)
+        for index in (self._by_id, self._by_email):
+            while len(index) > self.max_size:
+                index.popitem(last=False)
+
+    def _lookup(self, index, key):
+        with self._lock:
+            entry = index.get(key)
+            if entry is not None and entry[0] > time.monotonic():
+                index.move_to_end(key)
+                self.hits += 1
+                return True, entry[1]
+            self.misses += 1
+            return False, None
+
+    def get(self, user_id):
+        """User with ``user_id`` or None, as a CachedUser."""
+        found, user = self._lookup(self._by_id, user_id)
+        if not found:
+            users = self._query(self.model.id == user_id)
+            user = users[0] if users else None
+            with self._lock:
+                self._remember(user_id, user.email if user else None, user)
+        return user
+
+    def get_by_email(self, email):
+        found, user = self._lookup(self._by_email, email)
+        if not found:
+            users = self._query(self.model.email == email)
+            user = users[0] if users else None
+            with self._lock:
+                self._remember(user.id if user else None, email, user)
+        return user
+
+    def invalidate(self, user_id=None):
+        """Forget one user (every email it was cached under too), or everyone."""
+        with self._lock:
+            if user_id is None:
+                self._by_id.clear()
+                self._by_email.clear()
+                return
+            self._by_id.pop(user_id, None)
+            # Cached misses go too: the user may have just taken one of those emails
+            for email in [email for email, (_, user) in self._by_email.items() if user is None or user.id == user_id]:
+                del self._by_email[email]
+
+    def stats(self):
+        return {'users': len(self._by_id), 'emails': len(self._by_email), 'hits': self.hits, 'misses': self.misses}
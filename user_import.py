@@ -0,0 +1,186 @@
+# --- 1. IMPORTS ---
+import csv
+import json
+import os
+import time
+import click
+from flask.cli import AppGroup
+from sqlalchemy import insert, select
+from sqlalchemy.exc import IntegrityError
+from extensions import db, password_hasher
+from models import User
+
+# --- 2. CONSTANTS ---
+# Column limits of the user table
+EMAIL_MAX_LENGTH = 128
+NAME_MAX_LENGTH = 100
+REPORT_FIELDS = ('line', 'email', 'error')
+
+
+# --- 3. READING ---
+def read_rows(handler, format):
+    """Yield (line number, row dict, None) from a CSV (with a header) or JSON Lines stream.
+
+    Lines that cannot be parsed are yielded as (line, None, error) so they end
+    up in the report instead of aborting the import.
+    """
+    if format == 'csv':
+        reader = csv.DictReader(handler)
+        for row in reader:
+            yield reader.line_num, row, None
+        return
+    for number, line in enumerate(handler, 1):
+        if not line.strip():
+            continue
+        try:
+            row = json.loads(line)
+        except ValueError as error:
+            yield number, None, 'invalid JSON: %s' % error
+            continue
+        if not isinstance(row, dict):
+            yield number, None, 'expected a JSON object'
+            continue
+        yield number, row, None
+
+
+def _detect_format(handler):
+    name = getattr(handler, 'name', '') or ''
+    if name.endswith(('.jsonl', '.ndjson', '.json')):
+        return 'jsonl'
+    if name.endswith('.csv'):
+        return 'csv'
+    # stdin or an unusual name: JSON Lines start with an object
+    buffer = getattr(handler, 'buffer', None)
+    start = buffer.peek(4)[:4].lstrip(b'\xef\xbb\xbf \t\r\n') if hasattr(buffer, 'peek') else b''
+    return 'jsonl' if start[:1] == b'{' else 'csv'
+
+
+def validate(row, default_name):
+    """(email, name, password) of ``row``, or raise ValueError with the reason."""
+    email = str(row.get('email') or '').strip()
+    password = row.get('password')
+    name = str(row.get('name') or '').strip() or default_name
+    if not email:
+        raise ValueError('email is empty')
+    if '@' not in email:
+        raise ValueError('email is not an address')
+    if len(email) > EMAIL_MAX_LENGTH:
+        raise ValueError('email is longer than %d characters' % EMAIL_MAX_LENGTH)
+    if not password or not isinstance(password, str):
+        raise ValueError('password is empty')
+    if len(name) > NAME_MAX_LENGTH:
+        raise ValueError('name is longer than %d characters' % NAME_MAX_LENGTH)
+    return email, name, password
+
+
+# --- 4. IMPORTING ---
+class UserImport:
+    """Validates, deduplicates, hashes and inserts users one batch at a time.
+
+    Existing emails are loaded with a single query up front and compared
+    case-insensitively, as are emails repeated within the file. Each batch
+    is hashed on a process pool and written with one executemany INSERT in
+    its own transaction; if that fails (a row created concurrently), the
+    batch is retried row by row so only the offending rows are reported.
+    """
+
+    def __init__(self, db, model, hasher, batch_size=500, workers=None, dry_run=False, report=None):
+        self.db = db
+        self.model = model
+        self.hasher = hasher
+        self.batch_size = batch_size
+        self.workers = workers
+        self.dry_run = dry_run
+        self.report = report
+        self.created = self.skipped = self.failed = 0
+        self.known = {email.lower() for email in db.session.execute(select(model.email)).scalars()}
+
+    def error(self, line, email, message, duplicate=False):
+        if duplicate:
+            self.skipped += 1
+        else:
+            self.failed += 1
+        if self.report is not None:
+            self.report.writerow({'line': line, 'email': email or '', 'error': message})
+
+    def run(self, rows, default_name):
+        batch = []
+        for line, row, problem in rows:
+            if problem:
+                self.error(line, None, problem)
+                continue
+            try:
+                email, name, password = validate(row, default_name)
+            except ValueError as error:
+                self.error(line, row.get('email'), str(error))
+                continue
+            if email.lower() in self.known:
+                self.error(line, email, 'email already exists', duplicate=True)
+                continue
+            self.known.add(email.lower())
+            batch.append((line, email, name, password))
+            if len(batch) >= self.batch_size:
+                self.flush(batch)
+                batch = []
+        if batch:
+            self.flush(batch)
+
+    def flush(self, batch):
+        if self.dry_run:
+            self.created += len(batch)
+            return
+        hashes = self.hasher.generate_many([password for _, _, _, password in batch], self.workers)
+        rows = [{'email': email, 'name': name, 'password_hash': password_hash}
+                for (_, email, name, _), password_hash in zip(batch, hashes)]
+        try:
+            self.db.session.execute(insert(self.model), rows)
+            self.db.session.commit()
+            self.created += len(rows)
+            return
+        except IntegrityError:
+            self.db.session.rollback()
+        for (line, email, _, _), values in zip(batch, rows):
+            try:
+                self.db.session.execute(insert(self.model), [values])
+                self.db.session.commit()
+                self.created += 1
+            except IntegrityError:
+                self.db.session.rollback()
+                self.error(line, email, 'email already exists', duplicate=True)
+
+
+# --- 5. CLI COMMANDS ---
+users_cli = AppGroup('users', help='Manage user accounts in bulk.')
+
+
+@users_cli.command('import')
+@click.argument('source', type=click.File('r', encoding='utf-8-sig'))
+@click.option('--format', 'format', type=click.Choice(['auto', 'csv', 'jsonl']), default='auto', show_default=True,
+              help='Input format; auto goes by the file extension, then by the first character.')
+@click.option('--dry-run', is_flag=True, help='Validate and deduplicate only; nothing is hashed or written.')
+@click.option('--batch-size', default=500, show_default=True, help='Users hashed and inserted per transaction.')
+@click.option('--jobs', '-j', type=int, help='Hashing processes  [default: all cores]')
+@click.option('--report', type=click.File('w', encoding='utf-8'), help='Write rejected rows (line, email, error) as CSV here.')
+@click.option('--default-name', default='user', show_default=True, help='Name for rows without one.')
+def import_command(source, format, dry_run, batch_size, jobs, report, default_name):
+    """Create the users listed in SOURCE (CSV or JSON Lines with email, password and name; - for stdin).
+
+    Rows whose email already exists, in the database or earlier in the file,
+    are skipped, so a rerun is harmless. Exit status 1 if any row was invalid.
+    Running servers see the new users once their user cache entries expire
+    (USER_CACHE_TTL); nothing is signalled to them.
+    """
+    if format == 'auto':
+        format = _detect_format(source)
+    writer = None
+    if report is not None:
+        writer = csv.DictWriter(report, REPORT_FIELDS)
+        writer.writeheader()
+    started = time.perf_counter()
+    job = UserImport(db, User, password_hasher, batch_size=max(1, batch_size),
+                     workers=jobs or os.cpu_count(), dry_run=dry_run, report=writer)
+    job.run(read_rows(source, format), default_name)
+    click.echo('%s %d users, skipped %d existing, %d invalid in %.1fs' % (
+        'Would create' if dry_run else 'Created', job.created, job.skipped, job.failed, time.perf_counter() - started))
+    if job.failed:
+        raise click.exceptions.Exit(1)